@@ -0,0 +1,53 @@
+"""Add partial index on available promo codes
+
+Revision ID: 5b8d0f3c9a21
+Revises: ae4fe6f30609
+Create Date: 2026-10-19 00:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8d0f3c9a21'
+down_revision: Union[str, None] = 'ae4fe6f30609'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AVAILABLE = sa.text("status = 'AVAILABLE'")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # Build without blocking claims on a live table
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_promo_codes_available_id',
+                'promo_codes',
+                ['id'],
+                postgresql_where=AVAILABLE,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    else:
+        op.create_index(
+            'ix_promo_codes_available_id',
+            'promo_codes',
+            ['id'],
+            sqlite_where=AVAILABLE,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                'ix_promo_codes_available_id',
+                table_name='promo_codes',
+                postgresql_concurrently=True,
+            )
+    else:
+        op.drop_index('ix_promo_codes_available_id', table_name='promo_codes')
@@ -0,0 +1,46 @@
+"""Add broadcasts table
+
+Revision ID: c3f1a8e5b742
+Revises: 9e4a7c1d2f60
+Create Date: 2026-10-19 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1a8e5b742'
+down_revision: Union[str, None] = '9e4a7c1d2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('broadcasts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bot_id', sa.BigInteger(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('status', sa.Enum('RUNNING', 'COMPLETED', 'CANCELLED', 'FAILED', name='broadcast_status'), nullable=False),
+        sa.Column('admin_chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('status_message_id', sa.Integer(), nullable=True),
+        sa.Column('last_user_id', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('sent', sa.Integer(), nullable=False),
+        sa.Column('blocked', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_broadcasts_status'), 'broadcasts', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_broadcasts_status'), table_name='broadcasts')
+    op.drop_table('broadcasts')
+    sa.Enum(name='broadcast_status').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,81 @@
+"""Add campaigns and scope promo codes by campaign
+
+Revision ID: 9e4a7c1d2f60
+Revises: 5b8d0f3c9a21
+Create Date: 2026-10-19 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4a7c1d2f60'
+down_revision: Union[str, None] = '5b8d0f3c9a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AVAILABLE = sa.text("status = 'AVAILABLE'")
+
+
+def upgrade() -> None:
+    op.create_table('campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('slug', sa.String(length=64), nullable=False),
+        sa.Column('bot_token', sa.String(length=255), nullable=False),
+        sa.Column('channel_username', sa.String(length=255), nullable=False),
+        sa.Column('promo_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('promo_end', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_active', sa.Boolean(), server_default='true', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('slug'),
+        sa.UniqueConstraint('bot_token'),
+    )
+
+    # Nullable column without default: no table rewrite on PostgreSQL
+    op.add_column('promo_codes', sa.Column('campaign_id', sa.Integer(), nullable=True))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_foreign_key(
+            'fk_promo_codes_campaign_id', 'promo_codes', 'campaigns',
+            ['campaign_id'], ['id'],
+        )
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_promo_codes_campaign_available', 'promo_codes',
+                ['campaign_id', 'id'],
+                postgresql_where=AVAILABLE,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.create_index(
+                'ix_promo_codes_campaign_user', 'promo_codes',
+                ['campaign_id', 'assigned_to_user_id'],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    else:
+        op.create_index(
+            'ix_promo_codes_campaign_available', 'promo_codes',
+            ['campaign_id', 'id'],
+            sqlite_where=AVAILABLE,
+        )
+        op.create_index(
+            'ix_promo_codes_campaign_user', 'promo_codes',
+            ['campaign_id', 'assigned_to_user_id'],
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_promo_codes_campaign_user', table_name='promo_codes')
+    op.drop_index('ix_promo_codes_campaign_available', table_name='promo_codes')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('fk_promo_codes_campaign_id', 'promo_codes', type_='foreignkey')
+        op.drop_column('promo_codes', 'campaign_id')
+    else:
+        with op.batch_alter_table('promo_codes') as batch_op:
+            batch_op.drop_column('campaign_id')
+    op.drop_table('campaigns')
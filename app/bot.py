@@ -4,34 +4,47 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
-from app.config import config
-from app.handlers import setup_routers
-from app.middleware import DbSessionMiddleware
+from app.middleware import DbSessionMiddleware, CampaignMiddleware
+from app.services.campaign_service import CampaignSettings
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
 
-def create_bot() -> Bot:
-    """Create and configure bot instance."""
+def create_bot(campaign: CampaignSettings) -> Bot:
+    """Create and configure bot instance for a campaign."""
     bot = Bot(
-        token=config.BOT_TOKEN,
+        token=campaign.bot_token,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
-    logger.info("Bot instance created")
+    logger.info("Bot instance created", campaign=campaign.slug, bot_id=bot.id)
     return bot
 
 
-def create_dispatcher() -> Dispatcher:
-    """Create and configure dispatcher."""
+def create_dispatcher(campaigns: dict[int, CampaignSettings]) -> Dispatcher:
+    """
+    Create and configure dispatcher.
+
+    One dispatcher serves every bot; handlers get the campaign of the bot
+    that received the update from CampaignMiddleware.
+
+    Args:
+        campaigns: Campaign settings by bot id
+    """
     dp = Dispatcher()
 
     # Setup middleware
+    campaign_middleware = CampaignMiddleware(campaigns)
+    dp.message.middleware(campaign_middleware)
+    dp.callback_query.middleware(campaign_middleware)
     dp.message.middleware(DbSessionMiddleware())
     dp.callback_query.middleware(DbSessionMiddleware())
     logger.info("Middleware configured")
 
-    # Setup routers
+    # Setup routers; handlers are imported here so that config and
+    # database checks can fail before paying for them
+    from app.handlers import setup_routers
+
     main_router = setup_routers()
     dp.include_router(main_router)
     logger.info("Routers configured")
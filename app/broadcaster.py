@@ -0,0 +1,311 @@
+"""Background sender for admin broadcasts."""
+
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from app.config import config
+from app.database import async_session_maker, read_session
+from app.database.models import Broadcast, BroadcastStatus
+from app.services import BroadcastService
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+STOP_CALLBACK_PREFIX = "broadcast_stop:"
+
+_STATUS_TITLES = {
+    BroadcastStatus.RUNNING: "⏳ идёт",
+    BroadcastStatus.COMPLETED: "✅ завершена",
+    BroadcastStatus.CANCELLED: "⏹ остановлена",
+    BroadcastStatus.FAILED: "❌ прервана из-за ошибки",
+}
+
+
+def format_status(broadcast: Broadcast, rate: Optional[float] = None) -> str:
+    """Text of the admin's status message."""
+    processed = broadcast.sent + broadcast.blocked + broadcast.failed
+    text = (
+        f"📣 <b>Рассылка #{broadcast.id}</b> — {_STATUS_TITLES[broadcast.status]}\n\n"
+        f"├ Обработано: {processed} из {broadcast.total}\n"
+        f"├ Доставлено: {broadcast.sent}\n"
+        f"├ Заблокировали бота: {broadcast.blocked}\n"
+        f"└ Ошибки: {broadcast.failed}"
+    )
+    if rate is not None and broadcast.status == BroadcastStatus.RUNNING:
+        text += f"\n\nСкорость: {rate:.1f} сообщ./с"
+    return text
+
+
+def stop_keyboard(broadcast_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[
+            InlineKeyboardButton(
+                text="⏹ Остановить",
+                callback_data=f"{STOP_CALLBACK_PREFIX}{broadcast_id}",
+            )
+        ]]
+    )
+
+
+class _Pacer:
+    """Spaces sends evenly at ``rate`` per second; pauses on flood control."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate
+        self.next_at = 0.0
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self.next_at > now:
+            await asyncio.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+    def pause(self, seconds: float) -> None:
+        self.next_at = max(self.next_at, asyncio.get_running_loop().time() + seconds)
+
+
+class Broadcaster:
+    """
+    Runs broadcasts as background tasks, one message in flight at a time.
+
+    Each broadcast sends at BROADCAST_RATE messages per second, below the
+    per-bot Telegram limit, so replies to users are not throttled. Recipients
+    are read page by page (from the read replica when configured) and the
+    cursor is saved after every page: after a restart a broadcast continues
+    from the last saved page, resending at most one page.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._cancel_requested: set[int] = set()
+
+    def is_running(self, broadcast_id: int) -> bool:
+        return broadcast_id in self._tasks
+
+    def start(self, bot: Bot, broadcast_id: int) -> None:
+        """Start sending a broadcast in the background."""
+        if broadcast_id in self._tasks:
+            return
+        task = asyncio.create_task(
+            self._run(bot, broadcast_id),
+            name=f"broadcast-{broadcast_id}",
+        )
+        self._tasks[broadcast_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(broadcast_id, None))
+
+    async def cancel(self, broadcast_id: int) -> bool:
+        """
+        Stop a broadcast for good.
+
+        Returns:
+            True if the broadcast was running
+        """
+        task = self._tasks.get(broadcast_id)
+        if task is None:
+            # Not sent by this process (e.g. its bot is no longer served)
+            async with async_session_maker() as session:
+                return await BroadcastService.cancel_broadcast(session, broadcast_id)
+
+        self._cancel_requested.add(broadcast_id)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        self._cancel_requested.discard(broadcast_id)
+        # A task cancelled before it loaded the broadcast left it RUNNING
+        async with async_session_maker() as session:
+            await BroadcastService.cancel_broadcast(session, broadcast_id)
+        return True
+
+    async def resume(self, bots: dict[int, Bot]) -> None:
+        """Restart broadcasts interrupted by a shutdown."""
+        async with async_session_maker() as session:
+            broadcasts = await BroadcastService.get_running_broadcasts(session)
+
+        for broadcast in broadcasts:
+            bot = bots.get(broadcast.bot_id)
+            if bot is None:
+                logger.warning(
+                    "Bot of unfinished broadcast is not served, skipping",
+                    broadcast_id=broadcast.id,
+                    bot_id=broadcast.bot_id,
+                )
+                continue
+            logger.info(
+                "Resuming broadcast",
+                broadcast_id=broadcast.id,
+                last_user_id=broadcast.last_user_id,
+            )
+            self.start(bot, broadcast.id)
+
+    async def stop(self) -> None:
+        """Interrupt all broadcasts on shutdown; they resume on next start."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, bot: Bot, broadcast_id: int) -> None:
+        async with async_session_maker() as session:
+            broadcast = await BroadcastService.get_broadcast(session, broadcast_id)
+        if broadcast is None or broadcast.status != BroadcastStatus.RUNNING:
+            return
+
+        loop = asyncio.get_running_loop()
+        pacer = _Pacer(config.BROADCAST_RATE)
+        started_at = loop.time()
+        processed_at_start = broadcast.sent + broadcast.blocked + broadcast.failed
+        status_at = started_at
+
+        def current_rate() -> float:
+            processed = broadcast.sent + broadcast.blocked + broadcast.failed
+            elapsed = loop.time() - started_at
+            return (processed - processed_at_start) / elapsed if elapsed > 0 else 0.0
+
+        try:
+            while True:
+                async with read_session() as read:
+                    recipients = await BroadcastService.get_recipients(
+                        read,
+                        broadcast.campaign_id,
+                        broadcast.last_user_id,
+                        config.BROADCAST_BATCH_SIZE,
+                    )
+                if not recipients:
+                    break
+
+                for user_id, telegram_id in recipients:
+                    outcome = await self._deliver(bot, pacer, telegram_id, broadcast.text)
+                    setattr(broadcast, outcome, getattr(broadcast, outcome) + 1)
+                    broadcast.last_user_id = user_id
+
+                    if loop.time() - status_at >= config.BROADCAST_STATUS_INTERVAL:
+                        status_at = loop.time()
+                        await self._update_status(bot, broadcast, current_rate())
+
+                await self._save(broadcast)
+
+            broadcast.status = BroadcastStatus.COMPLETED
+            broadcast.finished_at = datetime.utcnow()
+            logger.info(
+                "Broadcast completed",
+                broadcast_id=broadcast.id,
+                sent=broadcast.sent,
+                blocked=broadcast.blocked,
+                failed=broadcast.failed,
+                rate=round(current_rate(), 1),
+            )
+        except asyncio.CancelledError:
+            if broadcast_id in self._cancel_requested:
+                self._cancel_requested.discard(broadcast_id)
+                broadcast.status = BroadcastStatus.CANCELLED
+                broadcast.finished_at = datetime.utcnow()
+                logger.info("Broadcast cancelled by admin", broadcast_id=broadcast.id)
+            else:
+                logger.info(
+                    "Broadcast interrupted, will resume on restart",
+                    broadcast_id=broadcast.id,
+                    last_user_id=broadcast.last_user_id,
+                )
+            raise
+        except Exception as e:
+            # Finished for good: a RUNNING row would block new broadcasts
+            # of this bot until a restart resumed it
+            broadcast.status = BroadcastStatus.FAILED
+            broadcast.finished_at = datetime.utcnow()
+            logger.error(
+                "Broadcast failed",
+                broadcast_id=broadcast.id,
+                last_user_id=broadcast.last_user_id,
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+        finally:
+            try:
+                await self._save(broadcast)
+            except Exception as e:
+                logger.error(
+                    "Could not save broadcast progress",
+                    broadcast_id=broadcast.id,
+                    error=str(e),
+                )
+            await self._update_status(bot, broadcast, current_rate())
+
+    async def _deliver(
+        self,
+        bot: Bot,
+        pacer: _Pacer,
+        telegram_id: int,
+        text: str,
+    ) -> str:
+        """Send one message; returns the Broadcast counter to increment."""
+        for attempt in range(1, config.BROADCAST_MAX_ATTEMPTS + 1):
+            await pacer.wait()
+            try:
+                await bot.send_message(chat_id=telegram_id, text=text)
+                return "sent"
+            except TelegramRetryAfter as e:
+                # Flood control applies to the whole bot: pause everything
+                logger.warning(
+                    "Broadcast hit flood control",
+                    retry_after=e.retry_after,
+                    telegram_id=telegram_id,
+                )
+                pacer.pause(e.retry_after)
+            except TelegramForbiddenError:
+                return "blocked"
+            except TelegramBadRequest as e:
+                # Chat not found, user deactivated: retrying won't help
+                logger.debug("Broadcast message rejected", telegram_id=telegram_id, error=str(e))
+                return "failed"
+            except (TelegramNetworkError, TelegramServerError) as e:
+                logger.warning(
+                    "Broadcast send error, retrying",
+                    telegram_id=telegram_id,
+                    attempt=attempt,
+                    error=str(e),
+                )
+                pacer.pause(min(2 ** attempt, 30))
+            except TelegramAPIError as e:
+                logger.warning("Broadcast send failed", telegram_id=telegram_id, error=str(e))
+                return "failed"
+        return "failed"
+
+    async def _save(self, broadcast: Broadcast) -> None:
+        async with async_session_maker() as session:
+            await BroadcastService.save_progress(session, broadcast)
+
+    async def _update_status(
+        self,
+        bot: Bot,
+        broadcast: Broadcast,
+        rate: Optional[float] = None,
+    ) -> None:
+        if broadcast.status_message_id is None:
+            return
+        running = broadcast.status == BroadcastStatus.RUNNING
+        try:
+            await bot.edit_message_text(
+                text=format_status(broadcast, rate),
+                chat_id=broadcast.admin_chat_id,
+                message_id=broadcast.status_message_id,
+                reply_markup=stop_keyboard(broadcast.id) if running else None,
+            )
+        except TelegramAPIError as e:
+            # "message is not modified" and the like must not stop sending
+            logger.debug("Could not update broadcast status", error=str(e))
+
+
+broadcaster = Broadcaster()
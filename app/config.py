@@ -1,11 +1,10 @@
 """Application configuration."""
 
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List
 
 from dotenv import load_dotenv
-import pytz
 
 load_dotenv()
 
@@ -13,7 +12,8 @@ load_dotenv()
 class Config:
     """Application configuration class."""
 
-    # Bot settings
+    # Bot settings of the default campaign; may be empty when every bot
+    # comes from the campaigns table (tools.manage_campaigns)
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
 
     # Database settings
@@ -22,6 +22,38 @@ class Config:
         "sqlite+aiosqlite:///./promo_bot.db"
     )
 
+    # Optional read replica for admin/reporting queries
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL", "")
+    # Seconds to keep using the primary after the replica failed to connect
+    DATABASE_READ_RETRY: int = int(os.getenv("DATABASE_READ_RETRY", "30"))
+
+    # Startup schema handling: "check" refuses to start unless the database
+    # is at the Alembic head revision, "create_all" creates missing tables
+    # (local development only)
+    DB_INIT_MODE: str = os.getenv("DB_INIT_MODE", "check")
+
+    # Connection pool settings (PostgreSQL only)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Seconds after which a connection is replaced; -1 keeps it forever
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+    # Pre-ping costs one round trip per checkout; with it disabled, rely on
+    # DB_POOL_RECYCLE to drop connections before the server does
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # asyncpg prepared statements cached per connection; 0 disables (pgbouncer)
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # Connections opened at startup so the first updates don't pay for connect
+    DB_POOL_WARMUP: int = int(os.getenv("DB_POOL_WARMUP", "0"))
+    # Seconds between pool statistics log records; 0 disables
+    DB_POOL_STATS_INTERVAL: int = int(os.getenv("DB_POOL_STATS_INTERVAL", "300"))
+
+    # SQLite settings (applied on every new connection)
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+
     # Channel for subscription check
     CHANNEL_USERNAME: str = os.getenv("CHANNEL_USERNAME", "@uppetit_info")
 
@@ -36,12 +68,28 @@ class Config:
     PROMO_START: datetime = datetime.strptime(
         os.getenv("PROMO_START", "2026-03-01"),
         "%Y-%m-%d"
-    ).replace(tzinfo=pytz.UTC)
+    ).replace(tzinfo=timezone.utc)
 
     PROMO_END: datetime = datetime.strptime(
         os.getenv("PROMO_END", "2026-05-30"),
         "%Y-%m-%d"
-    ).replace(hour=23, minute=59, second=59, tzinfo=pytz.UTC)
+    ).replace(hour=23, minute=59, second=59, tzinfo=timezone.utc)
+
+    # Signed QR payloads that tills verify offline: "hmac:<id>:<secret>" or
+    # "ed25519:<id>:<seed>" (same key as the landing's QR_SIGNING_KEY);
+    # empty puts the bare code into the QR
+    QR_SIGNING_KEY: str = os.getenv("QR_SIGNING_KEY", "")
+    # Days after the campaign end during which signed QR codes stay valid
+    QR_PAYLOAD_GRACE_DAYS: int = int(os.getenv("QR_PAYLOAD_GRACE_DAYS", "30"))
+
+    # Broadcast settings: messages per second per broadcast; Telegram allows
+    # about 30/s per bot, the rest is left for replies to users
+    BROADCAST_RATE: float = float(os.getenv("BROADCAST_RATE", "20"))
+    # Recipients fetched per page; progress is saved after every page
+    BROADCAST_BATCH_SIZE: int = int(os.getenv("BROADCAST_BATCH_SIZE", "100"))
+    # Seconds between edits of the admin's status message
+    BROADCAST_STATUS_INTERVAL: float = float(os.getenv("BROADCAST_STATUS_INTERVAL", "5"))
+    BROADCAST_MAX_ATTEMPTS: int = int(os.getenv("BROADCAST_MAX_ATTEMPTS", "5"))
 
     # Logging settings
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -49,14 +97,26 @@ class Config:
     @classmethod
     def validate(cls) -> None:
         """Validate configuration."""
-        if not cls.BOT_TOKEN:
-            raise ValueError("BOT_TOKEN is not set")
-
         if not cls.DATABASE_URL:
             raise ValueError("DATABASE_URL is not set")
 
+        if cls.DB_INIT_MODE not in ("check", "create_all"):
+            raise ValueError("DB_INIT_MODE must be 'check' or 'create_all'")
+
+        if cls.DB_POOL_SIZE < 1 or cls.DB_MAX_OVERFLOW < 0:
+            raise ValueError("DB_POOL_SIZE must be >= 1 and DB_MAX_OVERFLOW >= 0")
+
+        if cls.BROADCAST_RATE <= 0 or cls.BROADCAST_BATCH_SIZE < 1:
+            raise ValueError("BROADCAST_RATE must be > 0 and BROADCAST_BATCH_SIZE >= 1")
+
         if cls.PROMO_START >= cls.PROMO_END:
             raise ValueError("PROMO_START must be before PROMO_END")
 
+        if cls.QR_SIGNING_KEY:
+            # Fail at startup rather than on the first claimed code
+            from app.utils.qr_payload import PayloadSigner
+
+            PayloadSigner(cls.QR_SIGNING_KEY)
+
 
 config = Config()
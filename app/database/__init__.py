@@ -1,15 +1,28 @@
 """Database package."""
 
 from .base import Base
-from .models import User, PromoCode, CodeStatus
-from .session import async_session_maker, init_db, close_db
+from .models import Broadcast, BroadcastStatus, Campaign, User, PromoCode, CodeStatus
+from .session import (
+    async_session_maker,
+    read_session,
+    init_db,
+    close_db,
+    warm_up_pool,
+    start_pool_monitor,
+)
 
 __all__ = [
     "Base",
+    "Broadcast",
+    "BroadcastStatus",
+    "Campaign",
     "User",
     "PromoCode",
     "CodeStatus",
     "async_session_maker",
+    "read_session",
     "init_db",
     "close_db",
+    "warm_up_pool",
+    "start_pool_monitor",
 ]
@@ -12,6 +12,9 @@ from sqlalchemy import (
     Enum,
     ForeignKey,
     Index,
+    Integer,
+    Text,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -25,6 +28,47 @@ class CodeStatus(enum.Enum):
     ASSIGNED = "assigned"
 
 
+class BroadcastStatus(enum.Enum):
+    """Broadcast status enum."""
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+class Campaign(Base):
+    """Promo campaign served by its own bot token."""
+
+    __tablename__ = "campaigns"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    slug: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    bot_token: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    channel_username: Mapped[str] = mapped_column(String(255), nullable=False)
+    promo_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False
+    )
+    promo_end: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False
+    )
+    is_active: Mapped[bool] = mapped_column(
+        Boolean,
+        default=True,
+        server_default="true",
+        nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<Campaign(id={self.id}, slug={self.slug})>"
+
+
 class User(Base):
     """User model."""
 
@@ -103,6 +147,11 @@ class PromoCode(Base):
         server_default=func.now(),
         nullable=False
     )
+    # NULL for codes of the default campaign configured in .env
+    campaign_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("campaigns.id"),
+        nullable=True
+    )
 
     # Relationship
     assigned_user: Mapped[Optional["User"]] = relationship(
@@ -111,6 +160,23 @@ class PromoCode(Base):
 
     __table_args__ = (
         Index("ix_promo_codes_status_assigned", "status", "assigned_to_user_id"),
+        # Claims scan only available codes in id order; the partial index
+        # never contains assigned rows, so it stays small as stock runs out
+        Index(
+            "ix_promo_codes_available_id",
+            "id",
+            postgresql_where=text("status = 'AVAILABLE'"),
+            sqlite_where=text("status = 'AVAILABLE'"),
+        ),
+        # Same as above and for "already has a code" checks, per campaign
+        Index(
+            "ix_promo_codes_campaign_available",
+            "campaign_id",
+            "id",
+            postgresql_where=text("status = 'AVAILABLE'"),
+            sqlite_where=text("status = 'AVAILABLE'"),
+        ),
+        Index("ix_promo_codes_campaign_user", "campaign_id", "assigned_to_user_id"),
     )
 
     def __repr__(self) -> str:
@@ -145,3 +211,48 @@ class Admin(Base):
             f"<Admin(id={self.id}, telegram_id={self.telegram_id}, "
             f"username={self.username})>"
         )
+
+
+class Broadcast(Base):
+    """Admin broadcast to the participants of a campaign."""
+
+    __tablename__ = "broadcasts"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # Bot that sends the broadcast (and resumes it after a restart)
+    bot_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # NULL: default campaign, sent to every user
+    campaign_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("campaigns.id"),
+        nullable=True
+    )
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[BroadcastStatus] = mapped_column(
+        Enum(BroadcastStatus, name="broadcast_status"),
+        default=BroadcastStatus.RUNNING,
+        nullable=False,
+        index=True
+    )
+    admin_chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    status_message_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Keyset cursor: users.id of the last processed recipient
+    last_user_id: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sent: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    blocked: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    failed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<Broadcast(id={self.id}, status={self.status.value}, "
+            f"sent={self.sent}/{self.total})>"
+        )
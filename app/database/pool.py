@@ -0,0 +1,98 @@
+"""Connection pool with checkout wait-time statistics."""
+
+import asyncio
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# QueuePool._do_get() retries by calling itself; only the outermost call
+# is timed so that a retried checkout is counted once
+_in_checkout: ContextVar[bool] = ContextVar("_in_checkout", default=False)
+
+
+class PoolStats:
+    """Checkout wait-time counters accumulated between reports."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all counters."""
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        """Account one checkout that waited ``wait`` seconds."""
+        self.checkouts += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def snapshot(self) -> dict[str, float]:
+        """Return counters as milliseconds and reset them."""
+        data = {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(
+                self.total_wait / self.checkouts * 1000, 3
+            ) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+        self.reset()
+        return data
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that measures how long checkouts wait."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        if _in_checkout.get():
+            return super()._do_get()
+
+        token = _in_checkout.set(True)
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record(time.perf_counter() - started)
+            _in_checkout.reset(token)
+
+
+async def log_pool_stats(engine: AsyncEngine, name: str, interval: float) -> None:
+    """
+    Periodically log pool usage and checkout wait times.
+
+    Args:
+        engine: Engine whose pool is reported
+        name: Engine label used in log records
+        interval: Seconds between reports
+    """
+    while True:
+        await asyncio.sleep(interval)
+        pool = engine.pool
+        if not isinstance(pool, TimedAsyncQueuePool):
+            return
+        logger.info(
+            "Database pool stats",
+            engine=name,
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            **pool.stats.snapshot(),
+        )
@@ -0,0 +1,88 @@
+"""Database schema revision check."""
+
+import ast
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+VERSIONS_DIR = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+
+class SchemaMismatchError(RuntimeError):
+    """Database revision differs from the migration scripts head."""
+
+
+def get_head_revisions(versions_dir: Path = VERSIONS_DIR) -> set[str]:
+    """
+    Get head revisions of the Alembic migration scripts.
+
+    Revision identifiers are read with ``ast`` instead of loading the
+    scripts through Alembic, whose import alone outweighs the check.
+
+    Args:
+        versions_dir: Directory with migration scripts
+
+    Returns:
+        Set of head revision identifiers
+    """
+    revisions: set[str] = set()
+    parents: set[str] = set()
+
+    for path in versions_dir.glob("*.py"):
+        module = ast.parse(path.read_text(encoding="utf-8"))
+        for node in module.body:
+            if isinstance(node, ast.AnnAssign):
+                targets, value = [node.target], node.value
+            elif isinstance(node, ast.Assign):
+                targets, value = node.targets, node.value
+            else:
+                continue
+
+            names = {t.id for t in targets if isinstance(t, ast.Name)}
+            if "revision" in names:
+                revisions.add(ast.literal_eval(value))
+            elif "down_revision" in names:
+                down = ast.literal_eval(value)
+                if isinstance(down, str):
+                    parents.add(down)
+                elif down:
+                    parents.update(down)
+
+    return revisions - parents
+
+
+async def get_current_revisions(engine: AsyncEngine) -> set[str]:
+    """Get revisions stamped in the database (empty if never migrated)."""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(
+                text("SELECT version_num FROM alembic_version")
+            )
+        except DBAPIError:
+            return set()
+        return {row[0] for row in result}
+
+
+async def check_schema_revision(engine: AsyncEngine) -> None:
+    """
+    Ensure the database is migrated to the Alembic head.
+
+    Raises:
+        SchemaMismatchError: If database and migration heads differ
+    """
+    heads = get_head_revisions()
+    current = await get_current_revisions(engine)
+
+    if current != heads:
+        raise SchemaMismatchError(
+            f"Database revision {sorted(current) or 'none'} does not match "
+            f"migrations head {sorted(heads)}; run 'alembic upgrade head'"
+        )
+
+    logger.info("Database schema revision verified", revision=sorted(current))
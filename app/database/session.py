@@ -1,5 +1,11 @@
 """Database session management."""
 
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncContextManager, AsyncIterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
@@ -10,26 +16,95 @@ from sqlalchemy.ext.asyncio import (
 from app.config import config
 from app.utils.logging import get_logger
 
+from .pool import TimedAsyncQueuePool, log_pool_stats
+
 logger = get_logger(__name__)
 
-# Create async engine
-# Pool parameters only for PostgreSQL (not supported by SQLite)
-engine_kwargs = {
-    "echo": False,
-}
-
-if "postgresql" in config.DATABASE_URL:
-    engine_kwargs.update({
-        "pool_pre_ping": True,
-        "pool_size": 10,
-        "max_overflow": 20,
-    })
+IS_POSTGRES = "postgresql" in config.DATABASE_URL
+IS_SQLITE = config.DATABASE_URL.startswith("sqlite")
+
+
+def build_engine_kwargs(url: str) -> dict:
+    """Engine arguments for ``url``; pool parameters only for PostgreSQL."""
+    kwargs = {
+        "echo": False,
+    }
+
+    if "postgresql" in url:
+        kwargs.update({
+            "poolclass": TimedAsyncQueuePool,
+            "pool_pre_ping": config.DB_POOL_PRE_PING,
+            "pool_size": config.DB_POOL_SIZE,
+            "max_overflow": config.DB_MAX_OVERFLOW,
+            "pool_timeout": config.DB_POOL_TIMEOUT,
+            "pool_recycle": config.DB_POOL_RECYCLE,
+            "connect_args": {
+                "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+            },
+        })
 
+    return kwargs
+
+
+# Create async engine
 engine: AsyncEngine = create_async_engine(
     config.DATABASE_URL,
-    **engine_kwargs,
+    **build_engine_kwargs(config.DATABASE_URL),
 )
 
+# Optional read replica for admin/reporting queries
+read_engine: Optional[AsyncEngine] = None
+if config.DATABASE_READ_URL:
+    read_engine = create_async_engine(
+        config.DATABASE_READ_URL,
+        **build_engine_kwargs(config.DATABASE_READ_URL),
+    )
+
+_pool_stats_tasks: list[asyncio.Task] = []
+
+# Replica is skipped until this loop time after a failed connect
+_replica_down_until = 0.0
+
+# SQLite ignores FOR UPDATE SKIP LOCKED, so claims are serialized in-process
+_claim_lock = asyncio.Lock()
+
+
+def apply_sqlite_pragmas(sqlite_engine: AsyncEngine) -> None:
+    """
+    Tune every new SQLite connection of the engine.
+
+    WAL lets readers proceed while a claim is writing, synchronous=NORMAL
+    is durable in WAL mode without an fsync per commit, and busy_timeout
+    makes concurrent writers (e.g. tools.import_codes) wait instead of
+    failing with "database is locked".
+    """
+
+    @event.listens_for(sqlite_engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+if IS_SQLITE:
+    apply_sqlite_pragmas(engine)
+
+
+def claim_guard() -> AsyncContextManager:
+    """
+    Guard for the check-and-assign section of a code claim.
+
+    On PostgreSQL row locks make claims safe and this is a no-op. SQLite
+    has no row locks, so concurrent claims are serialized by a process-wide
+    lock; the bot is the only process that assigns codes.
+    """
+    return _claim_lock if IS_SQLITE else nullcontext()
+
+
 # Create session factory
 async_session_maker = async_sessionmaker(
     engine,
@@ -37,20 +112,119 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+async_read_session_maker: Optional[async_sessionmaker[AsyncSession]] = None
+if read_engine is not None:
+    if config.DATABASE_READ_URL.startswith("sqlite"):
+        apply_sqlite_pragmas(read_engine)
+    async_read_session_maker = async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+
+@asynccontextmanager
+async def read_session(allow_stale: bool = True) -> AsyncIterator[AsyncSession]:
+    """
+    Session for read-only queries.
+
+    Staleness-tolerant reads go to the replica so that reporting never
+    takes primary connections from claims. The primary is used when
+    ``allow_stale`` is False, no replica is configured, or the replica
+    cannot be reached (it is then skipped for DATABASE_READ_RETRY seconds).
+
+    Args:
+        allow_stale: Whether replication lag is acceptable for this call
+    """
+    global _replica_down_until
+
+    loop = asyncio.get_running_loop()
+    if (
+        allow_stale
+        and async_read_session_maker is not None
+        and loop.time() >= _replica_down_until
+    ):
+        session = async_read_session_maker()
+        try:
+            await session.connection()
+        except (DBAPIError, OSError, asyncio.TimeoutError) as e:
+            await session.close()
+            _replica_down_until = loop.time() + config.DATABASE_READ_RETRY
+            logger.warning(
+                "Read replica unavailable, falling back to primary",
+                error=str(e),
+                retry_in=config.DATABASE_READ_RETRY,
+            )
+        else:
+            async with session:
+                yield session
+            return
+
+    async with async_session_maker() as session:
+        yield session
+
 
 async def init_db() -> None:
-    """Initialize database (create tables)."""
-    from .base import Base
+    """
+    Initialize database.
 
+    In "check" mode only the Alembic revision is verified, which is a single
+    query instead of reflecting every table; "create_all" creates missing
+    tables for local development.
+    """
     logger.info("Initializing database", url=config.DATABASE_URL)
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if config.DB_INIT_MODE == "create_all":
+        from .base import Base
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    else:
+        from .schema import check_schema_revision
+
+        await check_schema_revision(engine)
 
     logger.info("Database initialized successfully")
 
 
+async def warm_up_pool() -> None:
+    """Open DB_POOL_WARMUP connections ahead of the first updates."""
+    count = min(config.DB_POOL_WARMUP, config.DB_POOL_SIZE)
+    if not IS_POSTGRES or count <= 0:
+        return
+
+    connections = await asyncio.gather(
+        *(engine.connect().start() for _ in range(count))
+    )
+    for conn in connections:
+        await conn.close()
+
+    logger.info("Database pool warmed up", connections=count)
+
+
+def start_pool_monitor() -> None:
+    """Start periodic pool statistics logging."""
+    if config.DB_POOL_STATS_INTERVAL <= 0 or _pool_stats_tasks:
+        return
+
+    engines = {"primary": engine}
+    if read_engine is not None:
+        engines["replica"] = read_engine
+
+    for name, monitored in engines.items():
+        if isinstance(monitored.pool, TimedAsyncQueuePool):
+            _pool_stats_tasks.append(asyncio.create_task(
+                log_pool_stats(monitored, name, config.DB_POOL_STATS_INTERVAL)
+            ))
+
+
 async def close_db() -> None:
     """Close database connection."""
     logger.info("Closing database connection")
+    for task in _pool_stats_tasks:
+        task.cancel()
+    _pool_stats_tasks.clear()
+
     await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
@@ -7,8 +7,16 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.broadcaster import STOP_CALLBACK_PREFIX, broadcaster, format_status, stop_keyboard
 from app.config import config
-from app.services import PromoService, AdminService, UserService
+from app.database import read_session
+from app.services import (
+    PromoService,
+    AdminService,
+    UserService,
+    BroadcastService,
+    CampaignSettings,
+)
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -21,6 +29,7 @@ class AdminStates(StatesGroup):
     waiting_for_admin_id = State()
     waiting_for_codes = State()
     waiting_for_delete_code = State()
+    waiting_for_broadcast_text = State()
 
 
 async def is_admin(user_id: int, session: AsyncSession) -> bool:
@@ -33,23 +42,27 @@ async def is_admin(user_id: int, session: AsyncSession) -> bool:
 
 
 @router.message(Command("stats"))
-async def cmd_stats(message: Message, session: AsyncSession) -> None:
+async def cmd_stats(message: Message, session: AsyncSession, campaign: CampaignSettings) -> None:
     """
-    Show promo codes statistics (admin only).
+    Show promo codes statistics of the bot's campaign (admin only).
 
     Args:
         message: Telegram message
-        session: Database session
+        session: Database session (primary, for the admin check)
+        campaign: Campaign served by the bot
     """
-    if not await is_admin(message.from_user.id, session):
-        logger.warning(
-            "Non-admin tried to access stats",
-            telegram_id=message.from_user.id,
-        )
-        return
-
     try:
-        stats = await PromoService.get_codes_stats(session)
+        # Admin rights come from the primary: a removed admin loses access
+        # at once, not when the replica catches up
+        if not await is_admin(message.from_user.id, session):
+            logger.warning(
+                "Non-admin tried to access stats",
+                telegram_id=message.from_user.id,
+            )
+            return
+
+        async with read_session() as read:
+            stats = await PromoService.get_codes_stats(read, campaign.id)
 
         response = (
             "📊 <b>Статистика промокодов:</b>\n\n"
@@ -63,6 +76,7 @@ async def cmd_stats(message: Message, session: AsyncSession) -> None:
         logger.info(
             "Stats requested by admin",
             telegram_id=message.from_user.id,
+            campaign=campaign.slug,
             stats=stats,
         )
 
@@ -106,14 +120,20 @@ async def cmd_new_codes(message: Message, session: AsyncSession, state: FSMConte
 
 
 @router.message(AdminStates.waiting_for_codes)
-async def process_new_codes(message: Message, session: AsyncSession, state: FSMContext) -> None:
+async def process_new_codes(
+    message: Message,
+    session: AsyncSession,
+    state: FSMContext,
+    campaign: CampaignSettings,
+) -> None:
     """
-    Process new promo codes input.
+    Process new promo codes input; codes go to the bot's campaign.
 
     Args:
         message: Telegram message
         session: Database session
         state: FSM context
+        campaign: Campaign served by the bot
     """
     # Check for cancel command
     if message.text and message.text.strip().lower() == '/cancel':
@@ -137,7 +157,7 @@ async def process_new_codes(message: Message, session: AsyncSession, state: FSMC
 
     try:
         # Add codes to database
-        added, skipped = await PromoService.add_codes(session, codes)
+        added, skipped = await PromoService.add_codes(session, codes, campaign.id)
 
         response = (
             "✅ <b>Коды успешно добавлены!</b>\n\n"
@@ -152,6 +172,7 @@ async def process_new_codes(message: Message, session: AsyncSession, state: FSMC
         logger.info(
             "New codes added via /new_codes",
             telegram_id=message.from_user.id,
+            campaign=campaign.slug,
             added=added,
             skipped=skipped,
             total=len(codes),
@@ -169,28 +190,30 @@ async def process_new_codes(message: Message, session: AsyncSession, state: FSMC
 
 
 @router.message(Command("show_info"))
-async def cmd_show_info(message: Message, session: AsyncSession) -> None:
+async def cmd_show_info(message: Message, session: AsyncSession, campaign: CampaignSettings) -> None:
     """
     Show detailed information (admin only).
 
     Args:
         message: Telegram message
-        session: Database session
+        session: Database session (primary, for the admin check)
+        campaign: Campaign served by the bot
     """
-    if not await is_admin(message.from_user.id, session):
-        logger.warning(
-            "Non-admin tried to access show_info",
-            telegram_id=message.from_user.id,
-        )
-        return
-
     try:
-        stats = await PromoService.get_codes_stats(session)
-        unique_users = await AdminService.get_unique_users_count(session)
+        if not await is_admin(message.from_user.id, session):
+            logger.warning(
+                "Non-admin tried to access show_info",
+                telegram_id=message.from_user.id,
+            )
+            return
+
+        async with read_session() as read:
+            stats = await PromoService.get_codes_stats(read, campaign.id)
+            unique_users = await UserService.get_unique_users_count(read, campaign.id)
 
         response = (
             "📊 <b>Детальная информация:</b>\n\n"
-            f"<b>Промокоды:</b>\n"
+            f"<b>Промокоды ({campaign.slug}):</b>\n"
             f"├ Всего кодов: {stats['total']}\n"
             f"├ Выдано кодов: {stats['assigned']}\n"
             f"└ Кодов в запасе: {stats['available']}\n\n"
@@ -217,23 +240,27 @@ async def cmd_show_info(message: Message, session: AsyncSession) -> None:
 
 
 @router.message(Command("show_users"))
-async def cmd_show_users(message: Message, session: AsyncSession) -> None:
+async def cmd_show_users(
+    message: Message, session: AsyncSession, campaign: CampaignSettings
+) -> None:
     """
-    Show all bot users (admin only).
+    Show the users of the bot's campaign (admin only).
 
     Args:
         message: Telegram message
-        session: Database session
+        session: Database session (primary, for the admin check)
+        campaign: Campaign served by the bot
     """
-    if not await is_admin(message.from_user.id, session):
-        logger.warning(
-            "Non-admin tried to access show_users",
-            telegram_id=message.from_user.id,
-        )
-        return
-
     try:
-        users = await UserService.get_all_users(session)
+        if not await is_admin(message.from_user.id, session):
+            logger.warning(
+                "Non-admin tried to access show_users",
+                telegram_id=message.from_user.id,
+            )
+            return
+
+        async with read_session() as read:
+            users = await UserService.get_all_users(read, campaign.id)
 
         if not users:
             await message.answer("👥 Пользователей пока нет")
@@ -516,17 +543,20 @@ async def cmd_delete_admin(message: Message, session: AsyncSession) -> None:
 
 
 @router.message(Command("add_another_qr"))
-async def cmd_add_another_qr(message: Message, session: AsyncSession) -> None:
+async def cmd_add_another_qr(
+    message: Message, session: AsyncSession, campaign: CampaignSettings
+) -> None:
     """Allow a specific user to receive an additional promo code (admin only)."""
-    if not await is_admin(message.from_user.id, session):
-        logger.warning(
-            "Non-admin tried to use add_another_qr",
-            telegram_id=message.from_user.id,
-        )
-        return
-
     try:
-        users = await UserService.get_users_with_codes(session)
+        if not await is_admin(message.from_user.id, session):
+            logger.warning(
+                "Non-admin tried to use add_another_qr",
+                telegram_id=message.from_user.id,
+            )
+            return
+
+        async with read_session() as read:
+            users = await UserService.get_users_with_codes(read, campaign.id)
 
         if not users:
             await message.answer("👥 Нет пользователей, получивших подарок")
@@ -655,3 +685,182 @@ async def process_delete_admin(callback: CallbackQuery, session: AsyncSession) -
             error=str(e),
         )
         await callback.answer("Ошибка при удалении админа", show_alert=True)
+
+
+@router.message(Command("broadcast"))
+async def cmd_broadcast(
+    message: Message,
+    session: AsyncSession,
+    state: FSMContext,
+    campaign: CampaignSettings,
+) -> None:
+    """
+    Start a broadcast to the participants of the bot's campaign (admin only).
+
+    Args:
+        message: Telegram message
+        session: Database session
+        state: FSM context
+        campaign: Campaign served by the bot
+    """
+    if not await is_admin(message.from_user.id, session):
+        logger.warning(
+            "Non-admin tried to start broadcast",
+            telegram_id=message.from_user.id,
+        )
+        return
+
+    running = await BroadcastService.get_running_broadcasts(session, message.bot.id)
+    if running:
+        await message.answer(
+            f"⏳ Рассылка #{running[0].id} ещё идёт. "
+            "Дождитесь её окончания или остановите кнопкой в статусе."
+        )
+        return
+
+    await state.set_state(AdminStates.waiting_for_broadcast_text)
+    await message.answer(
+        "📣 <b>Рассылка</b>\n\n"
+        f"Отправьте текст сообщения для участников кампании {campaign.slug}. "
+        "Форматирование сохранится.\n\n"
+        "Для отмены отправьте /cancel",
+        parse_mode="HTML",
+    )
+
+
+@router.message(AdminStates.waiting_for_broadcast_text)
+async def process_broadcast_text(
+    message: Message,
+    state: FSMContext,
+    campaign: CampaignSettings,
+) -> None:
+    """
+    Show the broadcast preview and ask for confirmation.
+
+    Args:
+        message: Telegram message
+        state: FSM context
+        campaign: Campaign served by the bot
+    """
+    if message.text and message.text.strip().lower() == '/cancel':
+        await state.clear()
+        await message.answer("❌ Рассылка отменена")
+        return
+
+    if not message.text:
+        await message.answer("❌ Отправьте текст сообщения или /cancel для отмены.")
+        return
+
+    async with read_session() as read:
+        total = await BroadcastService.count_recipients(read, campaign.id)
+
+    await state.update_data(broadcast_text=message.html_text)
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[[
+            InlineKeyboardButton(text="✅ Отправить", callback_data="broadcast_confirm"),
+            InlineKeyboardButton(text="❌ Отмена", callback_data="broadcast_abort"),
+        ]]
+    )
+    await message.answer(message.html_text, parse_mode="HTML")
+    await message.answer(
+        f"☝️ Так выглядит сообщение. Получателей: <b>{total}</b>.\n"
+        "Отправить?",
+        reply_markup=keyboard,
+        parse_mode="HTML",
+    )
+
+
+@router.callback_query(F.data == "broadcast_confirm")
+async def process_broadcast_confirm(
+    callback: CallbackQuery,
+    session: AsyncSession,
+    state: FSMContext,
+    campaign: CampaignSettings,
+) -> None:
+    """Create the broadcast and start sending it in the background."""
+    if not await is_admin(callback.from_user.id, session):
+        await callback.answer("У вас нет прав для этого действия", show_alert=True)
+        return
+
+    data = await state.get_data()
+    text = data.get("broadcast_text")
+    await state.clear()
+    if not text:
+        await callback.answer("Рассылка уже отправлена или отменена", show_alert=True)
+        return
+
+    try:
+        total = await BroadcastService.count_recipients(session, campaign.id)
+        # The confirmation message becomes the live status message
+        broadcast = await BroadcastService.create_broadcast(
+            session,
+            bot_id=callback.bot.id,
+            campaign_id=campaign.id,
+            text=text,
+            admin_chat_id=callback.message.chat.id,
+            status_message_id=callback.message.message_id,
+            total=total,
+        )
+        await callback.message.edit_text(
+            format_status(broadcast),
+            reply_markup=stop_keyboard(broadcast.id),
+            parse_mode="HTML",
+        )
+        broadcaster.start(callback.bot, broadcast.id)
+        await callback.answer()
+
+        logger.info(
+            "Broadcast started by admin",
+            telegram_id=callback.from_user.id,
+            broadcast_id=broadcast.id,
+            campaign=campaign.slug,
+            total=total,
+        )
+
+    except Exception as e:
+        logger.error(
+            "Error starting broadcast",
+            telegram_id=callback.from_user.id,
+            error=str(e),
+        )
+        await callback.answer("Ошибка при запуске рассылки", show_alert=True)
+
+
+@router.callback_query(F.data == "broadcast_abort")
+async def process_broadcast_abort(
+    callback: CallbackQuery,
+    session: AsyncSession,
+    state: FSMContext,
+) -> None:
+    """Cancel a broadcast before it started."""
+    if not await is_admin(callback.from_user.id, session):
+        await callback.answer("У вас нет прав для этого действия", show_alert=True)
+        return
+
+    await state.clear()
+    await callback.message.edit_text("❌ Рассылка отменена")
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith(STOP_CALLBACK_PREFIX))
+async def process_broadcast_stop(callback: CallbackQuery, session: AsyncSession) -> None:
+    """Stop a running broadcast."""
+    if not await is_admin(callback.from_user.id, session):
+        await callback.answer("У вас нет прав для этого действия", show_alert=True)
+        return
+
+    broadcast_id = int(callback.data.removeprefix(STOP_CALLBACK_PREFIX))
+    # A broadcast sent by this process refreshes its status message itself
+    sent_here = broadcaster.is_running(broadcast_id)
+    if await broadcaster.cancel(broadcast_id):
+        await callback.answer("Рассылка остановлена")
+        if not sent_here:
+            broadcast = await BroadcastService.get_broadcast(session, broadcast_id)
+            await callback.message.edit_text(format_status(broadcast), parse_mode="HTML")
+        logger.info(
+            "Broadcast stopped by admin",
+            telegram_id=callback.from_user.id,
+            broadcast_id=broadcast_id,
+        )
+    else:
+        await callback.answer("Рассылка уже завершена", show_alert=True)
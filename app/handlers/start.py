@@ -1,7 +1,5 @@
 """Start command handler."""
 
-from datetime import datetime
-
 from aiogram import Router, F, Bot
 from aiogram.filters import CommandStart, Command
 from aiogram.types import (
@@ -12,10 +10,8 @@ from aiogram.types import (
     InlineKeyboardButton,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
-import pytz
 
-from app.config import config
-from app.services import UserService, PromoService, QRService
+from app.services import UserService, PromoService, QRService, CampaignSettings
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -25,17 +21,11 @@ router = Router()
 SUBSCRIBE_CALLBACK = "check_subscription"
 
 
-def is_promo_active() -> bool:
-    """Check if promo period is active."""
-    now = datetime.now(pytz.UTC)
-    return config.PROMO_START <= now <= config.PROMO_END
-
-
-async def is_subscribed_to_channel(bot: Bot, user_id: int) -> bool:
-    """Check if user is subscribed to the required channel."""
+async def is_subscribed_to_channel(bot: Bot, user_id: int, channel_username: str) -> bool:
+    """Check if user is subscribed to the campaign channel."""
     try:
         member = await bot.get_chat_member(
-            chat_id=config.CHANNEL_USERNAME,
+            chat_id=channel_username,
             user_id=user_id,
         )
         return member.status not in ("left", "kicked", "banned")
@@ -43,14 +33,14 @@ async def is_subscribed_to_channel(bot: Bot, user_id: int) -> bool:
         logger.warning(
             "Could not check channel subscription",
             error=str(e),
-            channel=config.CHANNEL_USERNAME,
+            channel=channel_username,
             user_id=user_id,
         )
         return True  # fail open — не блокируем пользователей при ошибке API
 
 
-def get_subscribe_keyboard() -> InlineKeyboardMarkup:
-    channel = config.CHANNEL_USERNAME.lstrip("@")
+def get_subscribe_keyboard(channel_username: str) -> InlineKeyboardMarkup:
+    channel = channel_username.lstrip("@")
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text="Подписаться на канал", url=f"https://t.me/{channel}")],
@@ -62,6 +52,7 @@ def get_subscribe_keyboard() -> InlineKeyboardMarkup:
 async def send_gift(
     message: Message,
     session: AsyncSession,
+    campaign: CampaignSettings,
     telegram_id: int,
     username: str | None,
     first_name: str | None,
@@ -76,22 +67,27 @@ async def send_gift(
         last_name=last_name,
     )
 
-    has_code = await PromoService.user_has_code(session, user)
+    has_code = await PromoService.user_has_code(session, user, campaign.id)
     if has_code:
         if not user.extra_gift_allowed:
             await message.answer("Вы уже получили подарок")
             logger.info("User already has code", telegram_id=telegram_id, user_id=user.id)
             return
         # Extra gift granted by admin — use dedicated method
-        promo_code = await PromoService.get_extra_code(session, user)
+        promo_code = await PromoService.get_extra_code(session, user, campaign.id)
     else:
-        promo_code = await PromoService.get_available_code(session, user)
+        promo_code = await PromoService.get_available_code(session, user, campaign.id)
     if not promo_code:
         await message.answer(
             "К сожалению, все подарки уже разобрали. "
             "Спасибо за интерес к UPPETIT!"
         )
-        logger.warning("No codes available", telegram_id=telegram_id, user_id=user.id)
+        logger.warning(
+            "No codes available",
+            telegram_id=telegram_id,
+            user_id=user.id,
+            campaign=campaign.slug,
+        )
         return
 
     await message.answer(
@@ -100,7 +96,9 @@ async def send_gift(
         "Просто покажи QR код на кассе"
     )
 
-    qr_buffer = QRService.generate_qr_code(promo_code.raw_code)
+    qr_buffer = QRService.generate_qr_code(
+        QRService.qr_data(promo_code.raw_code, campaign.promo_end)
+    )
     qr_file = BufferedInputFile(qr_buffer.read(), filename="qr_code.png")
     await message.answer_photo(
         photo=qr_file,
@@ -113,6 +111,7 @@ async def send_gift(
         user_id=user.id,
         code_id=promo_code.id,
         raw_code=promo_code.raw_code,
+        campaign=campaign.slug,
     )
 
 
@@ -140,15 +139,24 @@ async def cmd_my_id(message: Message) -> None:
 
 
 @router.message(CommandStart())
-async def cmd_start(message: Message, session: AsyncSession) -> None:
+async def cmd_start(
+    message: Message,
+    session: AsyncSession,
+    campaign: CampaignSettings,
+) -> None:
     user_telegram_id = message.from_user.id
     username = message.from_user.username
     first_name = message.from_user.first_name
     last_name = message.from_user.last_name
 
-    logger.info("User started bot", telegram_id=user_telegram_id, username=username)
+    logger.info(
+        "User started bot",
+        telegram_id=user_telegram_id,
+        username=username,
+        campaign=campaign.slug,
+    )
 
-    if not is_promo_active():
+    if not campaign.is_promo_active():
         await message.answer(
             "К сожалению, акция в данный момент неактивна. "
             "Следите за нашими новостями, чтобы не пропустить следующую акцию!"
@@ -156,22 +164,26 @@ async def cmd_start(message: Message, session: AsyncSession) -> None:
         logger.info("Promo not active, user notified", telegram_id=user_telegram_id)
         return
 
-    subscribed = await is_subscribed_to_channel(message.bot, user_telegram_id)
+    subscribed = await is_subscribed_to_channel(
+        message.bot, user_telegram_id, campaign.channel_username
+    )
     if not subscribed:
         await message.answer(
             f"Для получения подарка необходимо подписаться на наш канал!\n\n"
-            f"Подпишитесь на {config.CHANNEL_USERNAME} и нажмите кнопку «Я подписался ✅».",
-            reply_markup=get_subscribe_keyboard(),
+            f"Подпишитесь на {campaign.channel_username} и нажмите кнопку «Я подписался ✅».",
+            reply_markup=get_subscribe_keyboard(campaign.channel_username),
         )
         logger.info(
             "User not subscribed to channel",
             telegram_id=user_telegram_id,
-            channel=config.CHANNEL_USERNAME,
+            channel=campaign.channel_username,
         )
         return
 
     try:
-        await send_gift(message, session, user_telegram_id, username, first_name, last_name)
+        await send_gift(
+            message, session, campaign, user_telegram_id, username, first_name, last_name
+        )
     except Exception as e:
         logger.error(
             "Error processing start command",
@@ -183,7 +195,11 @@ async def cmd_start(message: Message, session: AsyncSession) -> None:
 
 
 @router.callback_query(F.data == SUBSCRIBE_CALLBACK)
-async def check_subscription_callback(callback: CallbackQuery, session: AsyncSession) -> None:
+async def check_subscription_callback(
+    callback: CallbackQuery,
+    session: AsyncSession,
+    campaign: CampaignSettings,
+) -> None:
     user_telegram_id = callback.from_user.id
     username = callback.from_user.username
     first_name = callback.from_user.first_name
@@ -194,11 +210,13 @@ async def check_subscription_callback(callback: CallbackQuery, session: AsyncSes
         telegram_id=user_telegram_id,
     )
 
-    if not is_promo_active():
+    if not campaign.is_promo_active():
         await callback.answer("Акция в данный момент неактивна.", show_alert=True)
         return
 
-    subscribed = await is_subscribed_to_channel(callback.bot, user_telegram_id)
+    subscribed = await is_subscribed_to_channel(
+        callback.bot, user_telegram_id, campaign.channel_username
+    )
     if not subscribed:
         await callback.answer(
             "Вы ещё не подписались на канал. Подпишитесь и попробуйте снова.",
@@ -215,7 +233,13 @@ async def check_subscription_callback(callback: CallbackQuery, session: AsyncSes
 
     try:
         await send_gift(
-            callback.message, session, user_telegram_id, username, first_name, last_name
+            callback.message,
+            session,
+            campaign,
+            user_telegram_id,
+            username,
+            first_name,
+            last_name,
         )
     except Exception as e:
         logger.error(
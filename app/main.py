@@ -3,19 +3,23 @@
 import asyncio
 import signal
 import sys
+import time
+from typing import TYPE_CHECKING
 
-from app.bot import create_bot, create_dispatcher
 from app.config import config
-from app.database import init_db, close_db
 from app.utils.logging import setup_logging, get_logger
+from app.utils.timing import StartupTimer
+
+if TYPE_CHECKING:
+    from app.services.campaign_service import CampaignSettings
 
 # Setup logging
 setup_logging(config.LOG_LEVEL)
 logger = get_logger(__name__)
 
 
-async def on_startup() -> None:
-    """Execute on bot startup."""
+async def on_startup(timer: StartupTimer) -> None:
+    """Execute on bot startup, before polling begins."""
     logger.info("Starting UPPETIT Promo Bot")
 
     # Validate configuration
@@ -25,6 +29,10 @@ async def on_startup() -> None:
     except ValueError as e:
         logger.error("Configuration error", error=str(e))
         sys.exit(1)
+    timer.mark("config")
+
+    # SQLAlchemy and the models are imported only once the config is valid
+    from app.database import init_db, start_pool_monitor, warm_up_pool
 
     # Initialize database
     try:
@@ -32,25 +40,82 @@ async def on_startup() -> None:
     except Exception as e:
         logger.error("Database initialization failed", error=str(e))
         sys.exit(1)
+    timer.mark("database")
+
+    try:
+        await warm_up_pool()
+    except Exception as e:
+        # Not fatal: connections will be opened on demand
+        logger.warning("Database pool warm-up failed", error=str(e))
+    start_pool_monitor()
+    timer.mark("pool_warmup")
 
     logger.info("Bot started successfully")
 
 
+async def load_campaigns() -> list["CampaignSettings"]:
+    """Load the campaigns to serve; exits if there are none."""
+    from app.database import async_session_maker
+    from app.services.campaign_service import CampaignService
+
+    async with async_session_maker() as session:
+        campaigns = await CampaignService.load_campaign_settings(session)
+
+    if not campaigns:
+        logger.error(
+            "No campaigns to serve: set BOT_TOKEN or add an active campaign"
+        )
+        sys.exit(1)
+
+    logger.info(
+        "Campaigns loaded",
+        count=len(campaigns),
+        campaigns=[campaign.slug for campaign in campaigns],
+    )
+    return campaigns
+
+
 async def on_shutdown() -> None:
     """Execute on bot shutdown."""
+    from app.broadcaster import broadcaster
+    from app.database import close_db
+
     logger.info("Shutting down bot")
+    # Saves broadcast progress; unfinished broadcasts resume on next start
+    await broadcaster.stop()
     await close_db()
     logger.info("Bot stopped")
 
 
-async def main() -> None:
-    """Main function."""
-    # Create bot and dispatcher
-    bot = create_bot()
-    dp = create_dispatcher()
+async def main(started_at: float) -> None:
+    """
+    Main function.
+
+    Args:
+        started_at: ``time.perf_counter()`` value when the process began
+    """
+    timer = StartupTimer(started_at)
+
+    await on_startup(timer)
+    campaigns = await load_campaigns()
+    timer.mark("campaigns")
 
-    # Register startup and shutdown handlers
-    dp.startup.register(on_startup)
+    # aiogram and the broadcaster are needed only once there is a bot to run
+    from app.bot import create_bot, create_dispatcher
+    from app.broadcaster import broadcaster
+
+    # One bot per campaign, all polled by a single dispatcher and sharing
+    # the database engine
+    bots = [create_bot(campaign) for campaign in campaigns]
+    timer.mark("bot")
+    dp = create_dispatcher(
+        {bot.id: campaign for bot, campaign in zip(bots, campaigns)}
+    )
+    timer.mark("dispatcher")
+
+    await broadcaster.resume({bot.id: bot for bot in bots})
+
+    # Register shutdown handler
     dp.shutdown.register(on_shutdown)
 
     # Handle shutdown signals
@@ -63,20 +128,27 @@ async def main() -> None:
     for sig in (signal.SIGTERM, signal.SIGINT):
         signal.signal(sig, lambda s, f: signal_handler(s))
 
+    logger.info("Startup timing", total_ms=timer.total_ms, **timer.stages)
+
     try:
         # Start polling
         logger.info("Starting polling")
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        await dp.start_polling(*bots, allowed_updates=dp.resolve_used_update_types())
     except Exception as e:
         logger.error("Error during polling", error=str(e))
         raise
     finally:
-        await bot.session.close()
+        for bot in bots:
+            await bot.session.close()
 
 
 if __name__ == "__main__":
+    # Module-level imports are light (config, logging); SQLAlchemy, aiogram
+    # and the services are imported where first needed, so their cost shows
+    # up in the startup stage that needs them
+    _started_at = time.perf_counter()
     try:
-        asyncio.run(main())
+        asyncio.run(main(_started_at))
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
@@ -1,5 +1,6 @@
 """Middleware package."""
 
 from .db_session import DbSessionMiddleware
+from .campaign import CampaignMiddleware
 
-__all__ = ["DbSessionMiddleware"]
+__all__ = ["DbSessionMiddleware", "CampaignMiddleware"]
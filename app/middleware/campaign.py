@@ -0,0 +1,37 @@
+"""Campaign middleware for aiogram."""
+
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.services.campaign_service import CampaignSettings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class CampaignMiddleware(BaseMiddleware):
+    """Middleware to pass the campaign of the receiving bot to handlers."""
+
+    def __init__(self, campaigns: Dict[int, CampaignSettings]) -> None:
+        """
+        Args:
+            campaigns: Campaign settings by bot id
+        """
+        self.campaigns = campaigns
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Look up the campaign by the bot that received the update."""
+        bot = data["bot"]
+        campaign = self.campaigns.get(bot.id)
+        if campaign is None:
+            logger.error("Update for unknown bot, dropping", bot_id=bot.id)
+            return None
+        data["campaign"] = campaign
+        return await handler(event, data)
@@ -4,10 +4,15 @@ from .user_service import UserService
 from .promo_service import PromoService
 from .qr_service import QRService
 from .admin_service import AdminService
+from .campaign_service import CampaignService, CampaignSettings
+from .broadcast_service import BroadcastService
 
 __all__ = [
     "UserService",
     "PromoService",
     "QRService",
     "AdminService",
+    "CampaignService",
+    "CampaignSettings",
+    "BroadcastService",
 ]
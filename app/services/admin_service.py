@@ -141,23 +141,3 @@ class AdminService:
             select(Admin).order_by(Admin.created_at)
         )
         return list(result.scalars().all())
-
-    @staticmethod
-    async def get_unique_users_count(
-        session: AsyncSession,
-    ) -> int:
-        """
-        Get count of unique users who used the bot.
-
-        Args:
-            session: Database session
-
-        Returns:
-            Count of unique users
-        """
-        from app.database.models import User
-
-        result = await session.execute(
-            select(func.count(User.id))
-        )
-        return result.scalar_one()
@@ -0,0 +1,186 @@
+"""Broadcast service for admin mailings."""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import Broadcast, BroadcastStatus, User
+from app.services.user_service import campaign_user_filter
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class BroadcastService:
+    """Service for broadcast operations."""
+
+    @staticmethod
+    async def count_recipients(
+        session: AsyncSession,
+        campaign_id: Optional[int] = None,
+    ) -> int:
+        """Count the users a broadcast of the campaign would reach."""
+        result = await session.execute(
+            select(func.count(User.id)).where(campaign_user_filter(campaign_id))
+        )
+        return result.scalar_one()
+
+    @staticmethod
+    async def get_recipients(
+        session: AsyncSession,
+        campaign_id: Optional[int],
+        after_user_id: int,
+        limit: int,
+    ) -> list[tuple[int, int]]:
+        """
+        Get the next page of recipients.
+
+        Keyset pagination on users.id: each page is an index range scan
+        starting after the last processed user, however far the broadcast is.
+
+        Args:
+            session: Database session
+            campaign_id: Campaign id, None for the default campaign
+            after_user_id: users.id of the last processed recipient
+            limit: Page size
+
+        Returns:
+            List of (user id, telegram id) in users.id order
+        """
+        result = await session.execute(
+            select(User.id, User.telegram_id)
+            .where(User.id > after_user_id, campaign_user_filter(campaign_id))
+            .order_by(User.id)
+            .limit(limit)
+        )
+        return [(row.id, row.telegram_id) for row in result]
+
+    @staticmethod
+    async def create_broadcast(
+        session: AsyncSession,
+        bot_id: int,
+        campaign_id: Optional[int],
+        text: str,
+        admin_chat_id: int,
+        status_message_id: int,
+        total: int,
+    ) -> Broadcast:
+        """
+        Create a running broadcast.
+
+        Args:
+            session: Database session
+            bot_id: Bot that sends the broadcast
+            campaign_id: Campaign id, None for the default campaign
+            text: Message text (HTML)
+            admin_chat_id: Chat of the status message
+            status_message_id: Message edited with progress
+            total: Number of recipients at creation time
+
+        Returns:
+            Created Broadcast instance
+        """
+        broadcast = Broadcast(
+            bot_id=bot_id,
+            campaign_id=campaign_id,
+            text=text,
+            status=BroadcastStatus.RUNNING,
+            admin_chat_id=admin_chat_id,
+            status_message_id=status_message_id,
+            last_user_id=0,
+            total=total,
+            sent=0,
+            blocked=0,
+            failed=0,
+        )
+        session.add(broadcast)
+        await session.commit()
+        await session.refresh(broadcast)
+
+        logger.info(
+            "Broadcast created",
+            broadcast_id=broadcast.id,
+            bot_id=bot_id,
+            campaign_id=campaign_id,
+            total=total,
+        )
+        return broadcast
+
+    @staticmethod
+    async def get_broadcast(
+        session: AsyncSession,
+        broadcast_id: int,
+    ) -> Optional[Broadcast]:
+        """Find a broadcast by id."""
+        result = await session.execute(
+            select(Broadcast).where(Broadcast.id == broadcast_id)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_running_broadcasts(
+        session: AsyncSession,
+        bot_id: Optional[int] = None,
+    ) -> list[Broadcast]:
+        """Get broadcasts that have not finished, optionally for one bot."""
+        query = (
+            select(Broadcast)
+            .where(Broadcast.status == BroadcastStatus.RUNNING)
+            .order_by(Broadcast.id)
+        )
+        if bot_id is not None:
+            query = query.where(Broadcast.bot_id == bot_id)
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def save_progress(
+        session: AsyncSession,
+        broadcast: Broadcast,
+    ) -> None:
+        """
+        Persist the cursor, counters and status of a broadcast.
+
+        A single UPDATE by primary key, so a broadcast holds a pooled
+        connection only for a moment per page.
+        """
+        await session.execute(
+            update(Broadcast)
+            .where(Broadcast.id == broadcast.id)
+            .values(
+                status=broadcast.status,
+                last_user_id=broadcast.last_user_id,
+                sent=broadcast.sent,
+                blocked=broadcast.blocked,
+                failed=broadcast.failed,
+                finished_at=broadcast.finished_at,
+            )
+        )
+        await session.commit()
+
+    @staticmethod
+    async def cancel_broadcast(
+        session: AsyncSession,
+        broadcast_id: int,
+    ) -> bool:
+        """
+        Mark a running broadcast as cancelled.
+
+        Returns:
+            True if the broadcast was running
+        """
+        result = await session.execute(
+            update(Broadcast)
+            .where(
+                Broadcast.id == broadcast_id,
+                Broadcast.status == BroadcastStatus.RUNNING,
+            )
+            .values(
+                status=BroadcastStatus.CANCELLED,
+                finished_at=datetime.utcnow(),
+            )
+        )
+        await session.commit()
+        return result.rowcount > 0
@@ -0,0 +1,172 @@
+"""Campaign service: promo campaigns served by this process."""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import config
+from app.database.models import Campaign
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CAMPAIGN_SLUG = "default"
+
+
+def _as_utc(value: datetime) -> datetime:
+    """SQLite drops tzinfo on the way back; stored values are UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@dataclass(frozen=True)
+class CampaignSettings:
+    """
+    Per-bot campaign settings passed to handlers as ``campaign``.
+
+    ``id`` is None for the default campaign configured through
+    BOT_TOKEN / CHANNEL_USERNAME / PROMO_START / PROMO_END, whose codes
+    have no campaign_id.
+    """
+
+    id: Optional[int]
+    slug: str
+    bot_token: str
+    channel_username: str
+    promo_start: datetime
+    promo_end: datetime
+
+    @classmethod
+    def from_config(cls) -> "CampaignSettings":
+        return cls(
+            id=None,
+            slug=DEFAULT_CAMPAIGN_SLUG,
+            bot_token=config.BOT_TOKEN,
+            channel_username=config.CHANNEL_USERNAME,
+            promo_start=config.PROMO_START,
+            promo_end=config.PROMO_END,
+        )
+
+    @classmethod
+    def from_model(cls, campaign: Campaign) -> "CampaignSettings":
+        return cls(
+            id=campaign.id,
+            slug=campaign.slug,
+            bot_token=campaign.bot_token,
+            channel_username=campaign.channel_username,
+            promo_start=_as_utc(campaign.promo_start),
+            promo_end=_as_utc(campaign.promo_end),
+        )
+
+    def is_promo_active(self, now: Optional[datetime] = None) -> bool:
+        """Check if the promo window contains ``now``."""
+        now = now or datetime.now(timezone.utc)
+        return self.promo_start <= now <= self.promo_end
+
+
+class CampaignService:
+    """Service for campaign operations."""
+
+    @staticmethod
+    async def get_campaign_by_slug(
+        session: AsyncSession,
+        slug: str,
+    ) -> Optional[Campaign]:
+        """Find a campaign by its slug."""
+        result = await session.execute(
+            select(Campaign).where(Campaign.slug == slug)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_campaigns(
+        session: AsyncSession,
+        active_only: bool = False,
+    ) -> list[Campaign]:
+        """Get campaigns ordered by id."""
+        query = select(Campaign).order_by(Campaign.id)
+        if active_only:
+            query = query.where(Campaign.is_active.is_(True))
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def create_campaign(
+        session: AsyncSession,
+        slug: str,
+        bot_token: str,
+        channel_username: str,
+        promo_start: datetime,
+        promo_end: datetime,
+    ) -> Campaign:
+        """
+        Create a new campaign.
+
+        Args:
+            session: Database session
+            slug: Short unique name used by the CLI tools
+            bot_token: Telegram bot token serving the campaign
+            channel_username: Channel the user must be subscribed to
+            promo_start: Start of the promo window (UTC)
+            promo_end: End of the promo window (UTC)
+
+        Returns:
+            Created Campaign instance
+        """
+        if promo_start >= promo_end:
+            raise ValueError("promo_start must be before promo_end")
+
+        campaign = Campaign(
+            slug=slug,
+            bot_token=bot_token,
+            channel_username=channel_username,
+            promo_start=promo_start,
+            promo_end=promo_end,
+        )
+        session.add(campaign)
+        await session.commit()
+        await session.refresh(campaign)
+
+        logger.info("Campaign created", campaign_id=campaign.id, slug=slug)
+        return campaign
+
+    @staticmethod
+    async def set_campaign_active(
+        session: AsyncSession,
+        campaign: Campaign,
+        is_active: bool,
+    ) -> None:
+        """Enable or disable a campaign; takes effect on the next restart."""
+        campaign.is_active = is_active
+        await session.commit()
+        logger.info(
+            "Campaign status changed",
+            campaign_id=campaign.id,
+            slug=campaign.slug,
+            is_active=is_active,
+        )
+
+    @staticmethod
+    async def load_campaign_settings(
+        session: AsyncSession,
+    ) -> list[CampaignSettings]:
+        """
+        Get settings for every bot this process should run.
+
+        Active campaigns from the database, plus the default campaign when
+        BOT_TOKEN is set and not already used by one of them.
+        """
+        campaigns = [
+            CampaignSettings.from_model(campaign)
+            for campaign in await CampaignService.get_campaigns(
+                session, active_only=True
+            )
+        ]
+        tokens = {campaign.bot_token for campaign in campaigns}
+        if config.BOT_TOKEN and config.BOT_TOKEN not in tokens:
+            campaigns.insert(0, CampaignSettings.from_config())
+        return campaigns
@@ -3,105 +3,139 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import select, func
+from sqlalchemy import ColumnElement, Select, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.models import PromoCode, CodeStatus, User
+from app.database.session import claim_guard
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
 
+def in_campaign(campaign_id: Optional[int]) -> ColumnElement[bool]:
+    """Filter promo codes by campaign; None selects the default campaign."""
+    if campaign_id is None:
+        return PromoCode.campaign_id.is_(None)
+    return PromoCode.campaign_id == campaign_id
+
+
 class PromoService:
     """Service for promo code operations."""
 
+    @staticmethod
+    def next_available_code_query(campaign_id: Optional[int] = None) -> Select:
+        """
+        Build the query that locks the next available code of a campaign.
+
+        Codes are allocated in id order so that the scan walks the partial
+        index ix_promo_codes_campaign_available, which holds available codes
+        only, keyed by (campaign_id, id).
+        """
+        return (
+            select(PromoCode)
+            .where(
+                PromoCode.status == CodeStatus.AVAILABLE,
+                in_campaign(campaign_id),
+            )
+            .order_by(PromoCode.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+
     @staticmethod
     async def get_available_code(
         session: AsyncSession,
         user: User,
+        campaign_id: Optional[int] = None,
     ) -> Optional[PromoCode]:
         """
-        Get an available promo code and assign it to the user.
+        Get an available promo code of a campaign and assign it to the user.
 
-        Uses SELECT ... FOR UPDATE SKIP LOCKED to prevent race conditions.
+        Uses SELECT ... FOR UPDATE SKIP LOCKED to prevent race conditions
+        (on SQLite claims are serialized by claim_guard instead).
 
         Args:
             session: Database session
             user: User to assign the code to
+            campaign_id: Campaign id, None for the default campaign
 
         Returns:
             PromoCode instance or None if no codes available
         """
-        # First check if user already has a code
-        existing_code_result = await session.execute(
-            select(PromoCode).where(
-                PromoCode.assigned_to_user_id == user.id
+        async with claim_guard():
+            # First check if user already has a code
+            existing_code_result = await session.execute(
+                select(PromoCode).where(
+                    PromoCode.assigned_to_user_id == user.id,
+                    in_campaign(campaign_id),
+                ).limit(1)
             )
-        )
-        existing_code = existing_code_result.scalar_one_or_none()
-
-        if existing_code:
-            logger.warning(
-                "User already has a promo code",
-                user_id=user.id,
-                telegram_id=user.telegram_id,
-                code_id=existing_code.id,
+            existing_code = existing_code_result.scalar_one_or_none()
+
+            if existing_code:
+                logger.warning(
+                    "User already has a promo code",
+                    user_id=user.id,
+                    telegram_id=user.telegram_id,
+                    code_id=existing_code.id,
+                )
+                return None
+
+            # Find and lock an available code
+            result = await session.execute(
+                PromoService.next_available_code_query(campaign_id)
             )
-            return None
-
-        # Find and lock an available code
-        result = await session.execute(
-            select(PromoCode)
-            .where(PromoCode.status == CodeStatus.AVAILABLE)
-            .limit(1)
-            .with_for_update(skip_locked=True)
-        )
-        code = result.scalar_one_or_none()
-
-        if not code:
-            logger.error(
-                "No promo codes available",
+            code = result.scalar_one_or_none()
+
+            if not code:
+                logger.error(
+                    "No promo codes available",
+                    user_id=user.id,
+                    telegram_id=user.telegram_id,
+                    campaign_id=campaign_id,
+                )
+                return None
+
+            # Assign code to user
+            code.status = CodeStatus.ASSIGNED
+            code.assigned_to_user_id = user.id
+            code.assigned_at = datetime.utcnow()
+
+            await session.commit()
+            await session.refresh(code)
+
+            logger.info(
+                "Promo code assigned to user",
                 user_id=user.id,
                 telegram_id=user.telegram_id,
+                code_id=code.id,
+                raw_code=code.raw_code,
             )
-            return None
 
-        # Assign code to user
-        code.status = CodeStatus.ASSIGNED
-        code.assigned_to_user_id = user.id
-        code.assigned_at = datetime.utcnow()
-
-        await session.commit()
-        await session.refresh(code)
-
-        logger.info(
-            "Promo code assigned to user",
-            user_id=user.id,
-            telegram_id=user.telegram_id,
-            code_id=code.id,
-            raw_code=code.raw_code,
-        )
-
-        return code
+            return code
 
     @staticmethod
     async def user_has_code(
         session: AsyncSession,
         user: User,
+        campaign_id: Optional[int] = None,
     ) -> bool:
         """
-        Check if user already has an assigned code.
+        Check if user already has an assigned code in a campaign.
 
         Args:
             session: Database session
             user: User to check
+            campaign_id: Campaign id, None for the default campaign
 
         Returns:
             True if user has a code, False otherwise
         """
         result = await session.execute(
             select(func.count(PromoCode.id)).where(
-                PromoCode.assigned_to_user_id == user.id
+                PromoCode.assigned_to_user_id == user.id,
+                in_campaign(campaign_id),
             )
         )
         count = result.scalar_one()
@@ -111,6 +145,7 @@ class PromoService:
     async def get_extra_code(
         session: AsyncSession,
         user: User,
+        campaign_id: Optional[int] = None,
     ) -> Optional[PromoCode]:
         """
         Get an additional promo code for a user who already has one.
@@ -119,43 +154,43 @@ class PromoService:
         Args:
             session: Database session
             user: User to assign the extra code to
+            campaign_id: Campaign id, None for the default campaign
 
         Returns:
             PromoCode instance or None if no codes available
         """
-        result = await session.execute(
-            select(PromoCode)
-            .where(PromoCode.status == CodeStatus.AVAILABLE)
-            .limit(1)
-            .with_for_update(skip_locked=True)
-        )
-        code = result.scalar_one_or_none()
-
-        if not code:
-            logger.error(
-                "No promo codes available for extra gift",
+        async with claim_guard():
+            result = await session.execute(
+                PromoService.next_available_code_query(campaign_id)
+            )
+            code = result.scalar_one_or_none()
+
+            if not code:
+                logger.error(
+                    "No promo codes available for extra gift",
+                    user_id=user.id,
+                    telegram_id=user.telegram_id,
+                    campaign_id=campaign_id,
+                )
+                return None
+
+            code.status = CodeStatus.ASSIGNED
+            code.assigned_to_user_id = user.id
+            code.assigned_at = datetime.utcnow()
+            user.extra_gift_allowed = False
+
+            await session.commit()
+            await session.refresh(code)
+
+            logger.info(
+                "Extra promo code assigned to user",
                 user_id=user.id,
                 telegram_id=user.telegram_id,
+                code_id=code.id,
+                raw_code=code.raw_code,
             )
-            return None
-
-        code.status = CodeStatus.ASSIGNED
-        code.assigned_to_user_id = user.id
-        code.assigned_at = datetime.utcnow()
-        user.extra_gift_allowed = False
-
-        await session.commit()
-        await session.refresh(code)
-
-        logger.info(
-            "Extra promo code assigned to user",
-            user_id=user.id,
-            telegram_id=user.telegram_id,
-            code_id=code.id,
-            raw_code=code.raw_code,
-        )
 
-        return code
+            return code
 
     @staticmethod
     async def get_code_by_raw(
@@ -198,6 +233,7 @@ class PromoService:
     async def add_codes(
         session: AsyncSession,
         codes: list[str],
+        campaign_id: Optional[int] = None,
     ) -> tuple[int, int]:
         """
         Add multiple promo codes to the database.
@@ -205,6 +241,7 @@ class PromoService:
         Args:
             session: Database session
             codes: List of raw code strings
+            campaign_id: Campaign the codes belong to, None for the default one
 
         Returns:
             Tuple of (added_count, skipped_count)
@@ -229,7 +266,7 @@ class PromoService:
                 continue
 
             # Add new code
-            code = PromoCode(raw_code=raw_code)
+            code = PromoCode(raw_code=raw_code, campaign_id=campaign_id)
             session.add(code)
             added += 1
 
@@ -240,6 +277,7 @@ class PromoService:
             added=added,
             skipped=skipped,
             total=len(codes),
+            campaign_id=campaign_id,
         )
 
         return added, skipped
@@ -247,28 +285,31 @@ class PromoService:
     @staticmethod
     async def get_codes_stats(
         session: AsyncSession,
+        campaign_id: Optional[int] = None,
     ) -> dict[str, int]:
         """
-        Get statistics about promo codes.
+        Get statistics about promo codes of a campaign.
 
         Returns:
             Dictionary with available, assigned, and total counts
         """
         total_result = await session.execute(
-            select(func.count(PromoCode.id))
+            select(func.count(PromoCode.id)).where(in_campaign(campaign_id))
         )
         total = total_result.scalar_one()
 
         available_result = await session.execute(
             select(func.count(PromoCode.id)).where(
-                PromoCode.status == CodeStatus.AVAILABLE
+                PromoCode.status == CodeStatus.AVAILABLE,
+                in_campaign(campaign_id),
             )
         )
         available = available_result.scalar_one()
 
         assigned_result = await session.execute(
             select(func.count(PromoCode.id)).where(
-                PromoCode.status == CodeStatus.ASSIGNED
+                PromoCode.status == CodeStatus.ASSIGNED,
+                in_campaign(campaign_id),
             )
         )
         assigned = assigned_result.scalar_one()
@@ -1,19 +1,47 @@
 """QR code generation service."""
 
 import io
-from typing import BinaryIO
-
-import qrcode
-from qrcode.image.pil import PilImage
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import BinaryIO, Optional
 
+from app.config import config
 from app.utils.logging import get_logger
+from app.utils.qr_payload import PayloadSigner
 
 logger = get_logger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _signer(spec: str) -> Optional[PayloadSigner]:
+    return PayloadSigner(spec) if spec else None
+
+
 class QRService:
     """Service for QR code generation."""
 
+    @staticmethod
+    def qr_data(raw_code: str, promo_end: datetime) -> str:
+        """
+        Content to encode into the QR for a promo code.
+
+        With ``QR_SIGNING_KEY`` set this is a signed payload that tills can
+        verify offline, valid until ``QR_PAYLOAD_GRACE_DAYS`` after the
+        campaign end; otherwise the bare code.
+
+        Args:
+            raw_code: Promo code
+            promo_end: End of the campaign the code belongs to
+
+        Returns:
+            String to pass to ``generate_qr_code``
+        """
+        signer = _signer(config.QR_SIGNING_KEY)
+        if signer is None:
+            return raw_code
+        expires_at = promo_end + timedelta(days=config.QR_PAYLOAD_GRACE_DAYS)
+        return signer.sign(raw_code, int(expires_at.timestamp()))
+
     @staticmethod
     def generate_qr_code(data: str) -> BinaryIO:
         """
@@ -25,6 +53,9 @@ class QRService:
         Returns:
             Binary IO object containing PNG image
         """
+        # qrcode pulls in PIL; import on first use to keep bot startup fast
+        import qrcode
+
         logger.info("Generating QR code", data_length=len(data))
 
         # Create QR code
@@ -39,7 +70,7 @@ class QRService:
         qr.make(fit=True)
 
         # Create image
-        img: PilImage = qr.make_image(fill_color="black", back_color="white")
+        img = qr.make_image(fill_color="black", back_color="white")
 
         # Save to bytes buffer
         buffer = io.BytesIO()
@@ -3,7 +3,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import ColumnElement, exists, func, select, true
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.models import User, PromoCode
@@ -12,6 +12,21 @@ from app.utils.logging import get_logger
 logger = get_logger(__name__)
 
 
+def campaign_user_filter(campaign_id: Optional[int]) -> ColumnElement[bool]:
+    """
+    Users that belong to a campaign's bot.
+
+    The default campaign's bot sees every user; a campaign bot only users
+    who got a code in that campaign (others never started it).
+    """
+    if campaign_id is None:
+        return true()
+    return exists().where(
+        PromoCode.assigned_to_user_id == User.id,
+        PromoCode.campaign_id == campaign_id,
+    )
+
+
 class UserService:
     """Service for user operations."""
 
@@ -90,34 +105,59 @@ class UserService:
     @staticmethod
     async def get_all_users(
         session: AsyncSession,
+        campaign_id: Optional[int] = None,
     ) -> list[User]:
         """
-        Get all users ordered by creation date.
+        Get the campaign's users ordered by creation date.
 
         Args:
             session: Database session
+            campaign_id: Campaign id, None for the default campaign (all users)
 
         Returns:
             List of User instances
         """
         result = await session.execute(
-            select(User).order_by(User.created_at.desc())
+            select(User)
+            .where(campaign_user_filter(campaign_id))
+            .order_by(User.created_at.desc())
         )
         return list(result.scalars().all())
 
     @staticmethod
     async def get_users_with_codes(
         session: AsyncSession,
+        campaign_id: Optional[int] = None,
     ) -> list[User]:
-        """Get users who have already received at least one promo code."""
+        """Get the campaign's users who have already received a promo code."""
+        query = select(User).join(PromoCode, PromoCode.assigned_to_user_id == User.id)
+        if campaign_id is not None:
+            query = query.where(PromoCode.campaign_id == campaign_id)
         result = await session.execute(
-            select(User)
-            .join(PromoCode, PromoCode.assigned_to_user_id == User.id)
-            .distinct()
-            .order_by(User.created_at.desc())
+            query.distinct().order_by(User.created_at.desc())
         )
         return list(result.scalars().all())
 
+    @staticmethod
+    async def get_unique_users_count(
+        session: AsyncSession,
+        campaign_id: Optional[int] = None,
+    ) -> int:
+        """
+        Count the campaign's users.
+
+        Args:
+            session: Database session
+            campaign_id: Campaign id, None for the default campaign (all users)
+
+        Returns:
+            Count of unique users
+        """
+        result = await session.execute(
+            select(func.count(User.id)).where(campaign_user_filter(campaign_id))
+        )
+        return result.scalar_one()
+
     @staticmethod
     async def allow_extra_gift(
         session: AsyncSession,
@@ -0,0 +1,184 @@
+"""Подписанное содержимое QR: код, срок действия и подпись в одной строке.
+
+Касса проверяет такой QR без сети — по общему секрету (HMAC) или по
+открытому ключу (Ed25519: на кассе нет ничего, чем можно подделать код).
+
+Формат: UP1<алг>.<id ключа>.<код>.<истекает, unix base36>.<подпись base64url>
+где алг — H (HMAC-SHA256, 16 байт) или E (Ed25519). Подпись — над всем,
+что до последней точки. Пример: UP1H.k1.123456789012345.tpxk00.Gf3...
+
+Ключи задаются строками «алг:id:ключ»: hmac:k1:<секрет> или
+ed25519:k1:<base64url>, где для подписи — 32-байтный seed закрытого ключа,
+для проверки — открытый ключ. generate_key() выдаёт пару строк.
+
+Модуль без зависимостей от приложения: его можно отдать кассам как есть.
+Оригинал — landing/app/services/qr_payload.py; бот подписывает QR его
+точной копией app/utils/qr_payload.py. Правится только оригинал, копия
+обновляется из корня репозитория: python -m tools.check_qr_payload --fix.
+Ed25519 требует пакет cryptography.
+"""
+
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+from collections.abc import Iterable
+from typing import NamedTuple
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+        Ed25519PrivateKey,
+        Ed25519PublicKey,
+    )
+except ImportError:
+    Ed25519PrivateKey = None
+
+PREFIX = "UP1"
+HMAC_SIZE = 16  # байт подписи HMAC: 128 бит хватает, QR остаётся мелким
+
+_ALGORITHMS = {"hmac": "H", "ed25519": "E"}
+
+
+class InvalidPayload(ValueError):
+    pass
+
+
+class PayloadExpired(InvalidPayload):
+    pass
+
+
+class SignedCode(NamedTuple):
+    code: str
+    expires_at: int  # unix-время
+    key_id: str
+
+
+def is_signed_payload(data: str) -> bool:
+    return data.startswith(PREFIX)
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _parse_spec(spec: str) -> tuple[str, str, str]:
+    algorithm, _, rest = spec.strip().partition(":")
+    key_id, _, key = rest.partition(":")
+    if algorithm not in _ALGORITHMS or not key_id or not key or "." in key_id:
+        raise ValueError(f"bad key spec, expected hmac|ed25519:<id>:<key>: {spec[:16]}...")
+    if algorithm == "ed25519" and Ed25519PrivateKey is None:
+        raise RuntimeError("ed25519 keys need the cryptography package")
+    return algorithm, key_id, key
+
+
+class PayloadSigner:
+    def __init__(self, spec: str):
+        self.algorithm, self.key_id, key = _parse_spec(spec)
+        if self.algorithm == "hmac":
+            self._secret = key.encode()
+        else:
+            self._private = Ed25519PrivateKey.from_private_bytes(_b64decode(key))
+
+    def sign(self, code: str, expires_at: int) -> str:
+        if "." in code:
+            raise ValueError("code must not contain '.'")
+        message = (
+            f"{PREFIX}{_ALGORITHMS[self.algorithm]}.{self.key_id}.{code}."
+            f"{_to_base36(expires_at)}"
+        )
+        return f"{message}.{_b64encode(self._signature(message.encode()))}"
+
+    def _signature(self, message: bytes) -> bytes:
+        if self.algorithm == "hmac":
+            return hmac.new(self._secret, message, hashlib.sha256).digest()[:HMAC_SIZE]
+        return self._private.sign(message)
+
+    def verifier_spec(self) -> str:
+        """Ключ для касс: для Ed25519 — открытый, для HMAC — тот же секрет."""
+        if self.algorithm == "hmac":
+            return f"hmac:{self.key_id}:{self._secret.decode()}"
+        public = self._private.public_key().public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        )
+        return f"ed25519:{self.key_id}:{_b64encode(public)}"
+
+
+class PayloadVerifier:
+    """Проверка по нескольким ключам сразу: старые QR живут после смены ключа."""
+
+    def __init__(self, specs: Iterable[str]):
+        self._keys: dict[tuple[str, str], object] = {}
+        for spec in specs:
+            algorithm, key_id, key = _parse_spec(spec)
+            if algorithm == "hmac":
+                self._keys[("H", key_id)] = key.encode()
+            else:
+                self._keys[("E", key_id)] = Ed25519PublicKey.from_public_bytes(_b64decode(key))
+
+    def verify(self, payload: str, now: float | None = None) -> SignedCode:
+        message, _, signature = payload.strip().rpartition(".")
+        parts = message.split(".")
+        if len(parts) != 4 or not is_signed_payload(parts[0]) or len(parts[0]) != len(PREFIX) + 1:
+            raise InvalidPayload("not a signed payload")
+        alg, key_id, code, expires = parts[0][len(PREFIX):], parts[1], parts[2], parts[3]
+
+        key = self._keys.get((alg, key_id))
+        if key is None:
+            raise InvalidPayload(f"unknown key {key_id}")
+        try:
+            raw_signature = _b64decode(signature)
+            expires_at = int(expires, 36)
+        except ValueError:
+            raise InvalidPayload("malformed payload") from None
+        if _b64encode(raw_signature) != signature:
+            # Неиспользуемые биты последнего символа: у одной подписи одна запись
+            raise InvalidPayload("malformed payload")
+
+        if alg == "H":
+            expected = hmac.new(key, message.encode(), hashlib.sha256).digest()[:HMAC_SIZE]
+            valid = hmac.compare_digest(expected, raw_signature)
+        else:
+            try:
+                key.verify(raw_signature, message.encode())
+                valid = True
+            except InvalidSignature:
+                valid = False
+        if not valid:
+            raise InvalidPayload("bad signature")
+
+        if expires_at < (time.time() if now is None else now):
+            raise PayloadExpired("payload expired")
+        return SignedCode(code, expires_at, key_id)
+
+
+def generate_key(algorithm: str, key_id: str) -> tuple[str, str]:
+    """Новый ключ: (строка для подписи, строка для касс)."""
+    if algorithm == "hmac":
+        spec = f"hmac:{key_id}:{secrets.token_urlsafe(32)}"
+    elif Ed25519PrivateKey is None:
+        raise RuntimeError("ed25519 keys need the cryptography package")
+    else:
+        seed = Ed25519PrivateKey.generate().private_bytes(
+            serialization.Encoding.Raw,
+            serialization.PrivateFormat.Raw,
+            serialization.NoEncryption(),
+        )
+        spec = f"ed25519:{key_id}:{_b64encode(seed)}"
+    return spec, PayloadSigner(spec).verifier_spec()
+
+
+def _to_base36(number: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    text = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        text = digits[remainder] + text
+        if not number:
+            return text
@@ -0,0 +1,27 @@
+"""Timing helpers."""
+
+import time
+
+
+class StartupTimer:
+    """Collect durations of consecutive startup stages."""
+
+    def __init__(self, started_at: float):
+        """
+        Args:
+            started_at: ``time.perf_counter()`` value when startup began
+        """
+        self._started_at = started_at
+        self._last = started_at
+        self.stages: dict[str, float] = {}
+
+    def mark(self, stage: str) -> None:
+        """Record the time spent since the previous mark as ``stage``."""
+        now = time.perf_counter()
+        self.stages[f"{stage}_ms"] = round((now - self._last) * 1000, 1)
+        self._last = now
+
+    @property
+    def total_ms(self) -> float:
+        """Total time since startup began."""
+        return round((self._last - self._started_at) * 1000, 1)
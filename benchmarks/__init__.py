@@ -0,0 +1 @@
+"""Micro-benchmarks for hot code paths."""
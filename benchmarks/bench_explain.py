@@ -0,0 +1,166 @@
+"""
+Check the claim query plan on a large PostgreSQL table.
+
+Seeds ``--rows`` codes (default 10M) server-side with generate_series,
+marks ``--assigned`` of them as assigned, runs VACUUM ANALYZE and then
+EXPLAIN ANALYZE on:
+
+- the id probe ``SELECT id ... WHERE status = 'AVAILABLE' ORDER BY id``,
+  which must be an Index Only Scan on ix_promo_codes_available_id;
+- the claim query from ``PromoService.next_available_code_query`` for the
+  default campaign, which must read through one of the partial indexes
+  (an Index Scan: the claim locks and returns the whole row, so it cannot
+  be index-only).
+
+Exits with status 1 if either plan does not use a partial index.
+
+Usage:
+    python -m benchmarks.bench_explain --database-url postgresql+asyncpg://...
+
+The database must be dedicated to benchmarks: tables are recreated.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.base import Base
+from app.services import PromoService
+from app.utils.logging import setup_logging
+from benchmarks.common import parse_sizes, print_rows
+
+PARTIAL_INDEX = "ix_promo_codes_available_id"
+# Both hold available codes only and return them in id order
+CLAIM_INDEXES = (PARTIAL_INDEX, "ix_promo_codes_campaign_available")
+
+PROBE_SQL = (
+    "SELECT id FROM promo_codes WHERE status = 'AVAILABLE' "
+    "ORDER BY id LIMIT 1"
+)
+
+
+def plan_nodes(node: dict):
+    """Yield a plan node and all of its children."""
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def scan_of(plan: dict) -> dict:
+    """Find the scan node of a plan (the one reading promo_codes)."""
+    for node in plan_nodes(plan):
+        if node.get("Relation Name") == "promo_codes":
+            return node
+    return {}
+
+
+async def seed(conn, rows: int, assigned: int) -> None:
+    """Fill promo_codes server-side; the first ``assigned`` ids are taken."""
+    await conn.execute(text(
+        "INSERT INTO users (telegram_id) VALUES (1)"
+    ))
+    await conn.execute(text(
+        """
+        INSERT INTO promo_codes (raw_code, status, assigned_to_user_id, assigned_at)
+        SELECT
+            '98765' || lpad(g::text, 10, '0'),
+            CASE WHEN g <= :assigned THEN 'ASSIGNED' ELSE 'AVAILABLE' END::code_status,
+            CASE WHEN g <= :assigned THEN 1 END,
+            CASE WHEN g <= :assigned THEN now() END
+        FROM generate_series(1, :rows) AS g
+        """
+    ), {"rows": rows, "assigned": assigned})
+
+
+async def explain(conn, sql: str) -> dict:
+    """EXPLAIN ANALYZE a statement inside a rolled back transaction."""
+    result = await conn.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+    )
+    raw = result.scalar_one()
+    return (json.loads(raw) if isinstance(raw, str) else raw)[0]
+
+
+async def run(url: str, rows: int, assigned_fraction: float) -> bool:
+    engine = create_async_engine(url, echo=False)
+    assigned = int(rows * assigned_fraction)
+    claim_sql = str(
+        PromoService.next_available_code_query().compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True},
+        )
+    )
+
+    try:
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            await seed(conn, rows, assigned)
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM ANALYZE promo_codes"))
+        print(f"Seeded {rows} codes ({assigned} assigned) "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        results = []
+        ok = True
+        async with engine.connect() as conn:
+            for name, sql, expected, indexes in (
+                ("id probe", PROBE_SQL, "Index Only Scan", (PARTIAL_INDEX,)),
+                ("claim query", claim_sql, "Index Scan", CLAIM_INDEXES),
+            ):
+                trans = await conn.begin()
+                report = await explain(conn, sql)
+                await trans.rollback()
+
+                scan = scan_of(report["Plan"])
+                passed = (
+                    scan.get("Node Type") == expected
+                    and scan.get("Index Name") in indexes
+                )
+                ok = ok and passed
+                results.append({
+                    "query": name,
+                    "node": scan.get("Node Type", "?"),
+                    "index": scan.get("Index Name", "-"),
+                    "heap_fetches": scan.get("Heap Fetches", "-"),
+                    "shared_hit": scan.get("Shared Hit Blocks", 0),
+                    "shared_read": scan.get("Shared Read Blocks", 0),
+                    "exec_ms": report["Execution Time"],
+                    "ok": passed,
+                })
+
+        print_rows(f"Claim plans at {rows} rows", results)
+        return ok
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", default="10m")
+    parser.add_argument(
+        "--assigned", type=float, default=0.9,
+        help="Fraction of codes already assigned",
+    )
+    args = parser.parse_args()
+
+    if "postgresql" not in args.database_url:
+        parser.error("EXPLAIN check requires a PostgreSQL database")
+
+    setup_logging("WARNING")
+    rows = parse_sizes(args.rows)[0]
+    if not asyncio.run(run(args.database_url, rows, args.assigned)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
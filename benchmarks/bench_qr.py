@@ -0,0 +1,118 @@
+"""
+Benchmark QR rendering.
+
+Measures the bot's ``QRService.generate_qr_code`` and the landing's
+``generate_qr_bytes`` (PNG) and ``generate_qr_svg``: wall time, output
+size, peak traced memory of one call and memory still held after the
+calls (growth of caches or leaks).
+
+Usage:
+    python -m benchmarks.bench_qr [--runs 200]
+"""
+
+import argparse
+import importlib.util
+import tracemalloc
+from pathlib import Path
+from types import ModuleType
+from typing import Callable
+
+from app.services.qr_service import QRService
+from app.utils.logging import setup_logging
+from benchmarks.common import code_value, print_rows, summarize, time_sync
+
+LANDING_QR_PATH = Path(__file__).resolve().parents[1] / "landing" / "app" / "services" / "qr.py"
+
+
+def load_landing_qr() -> ModuleType:
+    """
+    Load landing's QR module by file path.
+
+    The landing is a separate application whose package is also called
+    ``app``, so it cannot be imported alongside the bot by name.
+    """
+    spec = importlib.util.spec_from_file_location("landing_qr", LANDING_QR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def allocation_stats(fn: Callable[[], object], runs: int) -> dict:
+    """
+    Memory use of ``fn`` under tracemalloc.
+
+    ``call_peak_kb`` is the largest traced memory a single call needed on top
+    of what was held before it, i.e. its working set. ``retained_*`` is what
+    the calls left behind, from a snapshot diff: near zero unless something
+    caches or leaks. Neither is the total bytes allocated per call, which
+    tracemalloc does not track.
+    """
+    tracemalloc.start()
+    try:
+        fn()  # warm caches so only steady-state memory is counted
+        before = tracemalloc.take_snapshot()
+        call_peak = 0
+        for _ in range(runs):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            call_peak = max(call_peak, peak - current)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    retained = 0
+    blocks = 0
+    for stat in after.compare_to(before, "filename"):
+        if stat.size_diff > 0:
+            retained += stat.size_diff
+        if stat.count_diff > 0:
+            blocks += stat.count_diff
+
+    return {
+        "call_peak_kb": call_peak / 1024,
+        "retained_kb_per_call": retained / runs / 1024,
+        "retained_blocks_per_call": blocks / runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    # Per-call INFO logging in QRService would dominate the measurement
+    setup_logging("WARNING")
+
+    data = code_value(123456)
+    landing = load_landing_qr()
+
+    def bot_qr() -> bytes:
+        return QRService.generate_qr_code(data).getvalue()
+
+    def landing_qr() -> bytes:
+        return landing.generate_qr_bytes(data)
+
+    def landing_svg() -> bytes:
+        return landing.generate_qr_svg(data).encode()
+
+    rows = []
+    for name, fn in (
+        ("QRService.generate_qr_code", bot_qr),
+        ("landing generate_qr_bytes", landing_qr),
+        ("landing generate_qr_svg", landing_svg),
+    ):
+        samples = time_sync(fn, args.runs)
+        rows.append(summarize(
+            name,
+            samples,
+            out_bytes=len(fn()),
+            **allocation_stats(fn, min(args.runs, 50)),
+        ))
+
+    print_rows("QR generation", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark promo/user service functions against seeded databases.
+
+Covers ``PromoService.get_available_code``, ``add_codes``,
+``get_codes_stats`` and ``UserService.get_or_create_user``.
+
+Usage:
+    python -m benchmarks.bench_services [--sizes 10k,1m] [--runs 200]
+    python -m benchmarks.bench_services --database-url postgresql+asyncpg://...
+
+An explicit --database-url must point to a dedicated benchmark database:
+its tables are dropped and recreated for every size.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import select
+
+from app.database.models import User
+from app.services import PromoService, UserService
+from app.utils.logging import setup_logging
+from benchmarks.common import (
+    SeededDatabase,
+    code_value,
+    parse_sizes,
+    print_rows,
+    summarize,
+    time_async,
+    user_telegram_id,
+)
+
+ADD_CODES_BATCH = 1_000
+
+
+async def bench_size(size: int, runs: int, url: str | None) -> list[dict]:
+    """Run every service benchmark against a database seeded with ``size`` codes."""
+    async with SeededDatabase(codes=size, users=runs, url=url) as db:
+        print(f"Seeded {size} codes and {runs} users in {db.seed_seconds:.1f}s")
+        rows = []
+
+        async with db.session_maker() as session:
+            result = await session.execute(select(User).order_by(User.id))
+            users = list(result.scalars().all())
+
+        async def claim(i: int) -> None:
+            async with db.session_maker() as session:
+                user = await session.merge(users[i], load=False)
+                code = await PromoService.get_available_code(session, user)
+                assert code is not None, "ran out of codes"
+
+        rows.append(summarize(
+            "PromoService.get_available_code",
+            await time_async(claim, runs),
+            codes=size,
+        ))
+
+        async def stats(_: int) -> None:
+            async with db.session_maker() as session:
+                await PromoService.get_codes_stats(session)
+
+        rows.append(summarize(
+            "PromoService.get_codes_stats",
+            await time_async(stats, runs),
+            codes=size,
+        ))
+
+        async def add(i: int) -> None:
+            # Half of every batch already exists to exercise duplicate skipping
+            start = size + i * ADD_CODES_BATCH // 2
+            batch = [code_value(n) for n in range(start, start + ADD_CODES_BATCH)]
+            async with db.session_maker() as session:
+                await PromoService.add_codes(session, batch)
+
+        add_runs = max(1, runs // 10)
+        rows.append(summarize(
+            f"PromoService.add_codes[{ADD_CODES_BATCH}]",
+            await time_async(add, add_runs),
+            codes=size,
+        ))
+
+        async def existing_user(i: int) -> None:
+            async with db.session_maker() as session:
+                await UserService.get_or_create_user(
+                    session, user_telegram_id(i), username=f"user{i}"
+                )
+
+        rows.append(summarize(
+            "UserService.get_or_create_user[existing]",
+            await time_async(existing_user, runs),
+            codes=size,
+        ))
+
+        async def new_user(i: int) -> None:
+            async with db.session_maker() as session:
+                await UserService.get_or_create_user(
+                    session, user_telegram_id(runs + i), username=f"user{runs + i}"
+                )
+
+        rows.append(summarize(
+            "UserService.get_or_create_user[new]",
+            await time_async(new_user, runs),
+            codes=size,
+        ))
+
+        return rows
+
+
+async def run(sizes: list[int], runs: int, url: str | None) -> None:
+    rows = []
+    for size in sizes:
+        rows.extend(await bench_size(size, runs, url))
+    print_rows("Service functions", rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10k,1m", help="Seeded code counts")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    # Service calls log every claim at INFO; keep the output to results
+    setup_logging("WARNING")
+    asyncio.run(run(parse_sizes(args.sizes), args.runs, args.database_url))
+
+
+if __name__ == "__main__":
+    main()
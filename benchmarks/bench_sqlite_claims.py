@@ -0,0 +1,129 @@
+"""
+Benchmark concurrent claims on SQLite.
+
+Runs ``PromoService.get_available_code`` from many concurrent tasks (as the
+bot does when updates arrive together), optionally with readers hammering
+``get_codes_stats``, and reports claims/s per journal mode. Every run is
+checked for correctness: each user gets exactly one code and no code is
+assigned twice.
+
+Usage:
+    python -m benchmarks.bench_sqlite_claims [--claims 2000] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import func, select
+
+from app.config import config
+from app.database.models import PromoCode, User
+from app.database.session import apply_sqlite_pragmas
+from app.services import PromoService
+from app.utils.logging import setup_logging
+from benchmarks.common import SeededDatabase, print_rows
+
+
+async def run_mode(
+    journal_mode: str,
+    claims: int,
+    concurrency: int,
+    readers: int,
+    read_interval: float,
+) -> dict:
+    """Run the claim workload with the given journal mode."""
+    config.SQLITE_JOURNAL_MODE = journal_mode
+
+    async with SeededDatabase(
+        codes=claims * 2,
+        users=claims,
+        configure=apply_sqlite_pragmas,
+    ) as db:
+        async with db.session_maker() as session:
+            result = await session.execute(select(User).order_by(User.id))
+            users = list(result.scalars().all())
+
+        queue: asyncio.Queue[User] = asyncio.Queue()
+        for user in users:
+            queue.put_nowait(user)
+
+        stop_readers = asyncio.Event()
+        reads = 0
+
+        async def claimer() -> None:
+            while not queue.empty():
+                user = queue.get_nowait()
+                async with db.session_maker() as session:
+                    user = await session.merge(user, load=False)
+                    code = await PromoService.get_available_code(session, user)
+                    assert code is not None, "ran out of codes"
+
+        async def reader() -> None:
+            nonlocal reads
+            while not stop_readers.is_set():
+                async with db.session_maker() as session:
+                    await PromoService.get_codes_stats(session)
+                reads += 1
+                await asyncio.sleep(read_interval)
+
+        reader_tasks = [asyncio.create_task(reader()) for _ in range(readers)]
+        started = time.perf_counter()
+        await asyncio.gather(*(claimer() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop_readers.set()
+        await asyncio.gather(*reader_tasks)
+
+        async with db.session_maker() as session:
+            assigned = await session.scalar(
+                select(func.count(PromoCode.id)).where(
+                    PromoCode.assigned_to_user_id.is_not(None)
+                )
+            )
+            users_with_codes = await session.scalar(
+                select(func.count(func.distinct(PromoCode.assigned_to_user_id)))
+            )
+
+        return {
+            "journal_mode": journal_mode,
+            "claims": claims,
+            "concurrency": concurrency,
+            "readers": readers,
+            "seconds": elapsed,
+            "claims_per_s": claims / elapsed,
+            "reads_per_s": reads / elapsed,
+            "correct": assigned == claims == users_with_codes,
+        }
+
+
+async def run(args: argparse.Namespace) -> None:
+    rows = []
+    for mode in args.modes.split(","):
+        rows.append(await run_mode(
+            mode.strip().upper(),
+            args.claims,
+            args.concurrency,
+            args.readers,
+            args.read_interval,
+        ))
+    print_rows("SQLite concurrent claims", rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--claims", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument(
+        "--read-interval", type=float, default=0.05,
+        help="Pause between stats reads of one reader, seconds",
+    )
+    parser.add_argument("--modes", default="DELETE,WAL", help="Journal modes to compare")
+    args = parser.parse_args()
+
+    setup_logging("WARNING")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
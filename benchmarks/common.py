@@ -0,0 +1,184 @@
+"""Shared helpers for benchmarks: timing, reporting and seeded databases."""
+
+import statistics
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.database.base import Base
+from app.database.models import PromoCode, User
+
+SEED_CHUNK = 50_000
+
+
+def summarize(name: str, samples: list[float], **extra) -> dict:
+    """Build a result row from a list of durations in seconds."""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(len(ordered) * 0.95))
+    row = {
+        "name": name,
+        "runs": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[p95_index] * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+    }
+    row.update(extra)
+    return row
+
+
+def print_rows(title: str, rows: list[dict]) -> None:
+    """Print result rows as an aligned table."""
+    print(f"\n== {title} ==")
+    if not rows:
+        return
+    columns = list(rows[0].keys())
+    for row in rows[1:]:
+        columns.extend(key for key in row if key not in columns)
+
+    def fmt(value) -> str:
+        if isinstance(value, float):
+            return f"{value:.3f}"
+        return str(value)
+
+    widths = {
+        col: max(len(col), *(len(fmt(row.get(col, ""))) for row in rows))
+        for col in columns
+    }
+    print("  ".join(col.ljust(widths[col]) for col in columns))
+    for row in rows:
+        print("  ".join(fmt(row.get(col, "")).ljust(widths[col]) for col in columns))
+
+
+def time_sync(fn: Callable[[], object], runs: int, warmup: int = 3) -> list[float]:
+    """Time a synchronous callable."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def time_async(
+    fn: Callable[[int], Awaitable[object]],
+    runs: int,
+) -> list[float]:
+    """Time an async callable; the run index is passed to ``fn``."""
+    samples = []
+    for i in range(runs):
+        started = time.perf_counter()
+        await fn(i)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+class SeededDatabase:
+    """
+    Database seeded with promo codes and users for a benchmark run.
+
+    Without an explicit URL a throwaway SQLite file is used. An explicit
+    URL must point to a dedicated benchmark database: all tables are
+    dropped and recreated. ``configure`` is called with the engine before
+    its first connection (e.g. to attach connect-time pragmas).
+    """
+
+    def __init__(
+        self,
+        codes: int,
+        users: int,
+        url: Optional[str] = None,
+        configure: Optional[Callable[[AsyncEngine], None]] = None,
+    ):
+        self.codes = codes
+        self.users = users
+        self._url = url
+        self._configure = configure
+        self._tmpdir: Optional[TemporaryDirectory] = None
+        self.engine: Optional[AsyncEngine] = None
+        self.session_maker: Optional[async_sessionmaker[AsyncSession]] = None
+        self.seed_seconds = 0.0
+
+    async def __aenter__(self) -> "SeededDatabase":
+        url = self._url
+        if url is None:
+            self._tmpdir = TemporaryDirectory(prefix="promo_bench_")
+            url = f"sqlite+aiosqlite:///{Path(self._tmpdir.name) / 'bench.db'}"
+
+        self.engine = create_async_engine(url, echo=False)
+        if self._configure is not None:
+            self._configure(self.engine)
+        self.session_maker = async_sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+
+        started = time.perf_counter()
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        await self._seed()
+        self.seed_seconds = time.perf_counter() - started
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self.engine is not None:
+            await self.engine.dispose()
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+
+    async def _seed(self) -> None:
+        async with self.session_maker() as session:
+            for start in range(0, self.codes, SEED_CHUNK):
+                stop = min(start + SEED_CHUNK, self.codes)
+                await session.execute(
+                    insert(PromoCode),
+                    [{"raw_code": code_value(i)} for i in range(start, stop)],
+                )
+                await session.commit()
+
+            for start in range(0, self.users, SEED_CHUNK):
+                stop = min(start + SEED_CHUNK, self.users)
+                await session.execute(
+                    insert(User),
+                    [{"telegram_id": user_telegram_id(i)} for i in range(start, stop)],
+                )
+                await session.commit()
+
+
+def code_value(i: int) -> str:
+    """Deterministic 15-digit promo code, same shape as production codes."""
+    return f"98765{i:010d}"
+
+
+def user_telegram_id(i: int) -> int:
+    """Deterministic Telegram ID for seeded users."""
+    return 1_000_000_000 + i
+
+
+def parse_sizes(raw: str) -> list[int]:
+    """Parse a comma separated list of sizes, accepting ``10k``/``1m`` suffixes."""
+    sizes = []
+    for part in raw.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        multiplier = 1
+        if part.endswith("k"):
+            multiplier, part = 1_000, part[:-1]
+        elif part.endswith("m"):
+            multiplier, part = 1_000_000, part[:-1]
+        sizes.append(int(float(part) * multiplier))
+    return sizes
@@ -0,0 +1,79 @@
+import json
+import mimetypes
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.services.page_cache import accepted_encodings
+
+STATIC_DIR = Path("static")
+MANIFEST_PATH = STATIC_DIR / "dist" / "manifest.json"
+
+# В static/dist имена с хешем содержимого — новый файл получит новое имя
+DIST_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_CACHE_CONTROL = "public, max-age=3600"
+
+
+def _load_manifest() -> dict:
+    """Манифест tools/build_assets.py; без сборки — пустой, шаблоны берут исходники."""
+    try:
+        return json.loads(MANIFEST_PATH.read_text())
+    except FileNotFoundError:
+        return {}
+
+
+_manifest = _load_manifest()
+
+
+def asset(path: str) -> str:
+    """URL файла из static/: собранная версия с хешем, если есть."""
+    hashed = _manifest.get("files", {}).get(path)
+    return f"/static/dist/{hashed}" if hashed else f"/static/{path}"
+
+
+def srcset(path: str, fmt: str) -> str:
+    """srcset картинки в формате jpeg или webp; пусто, если сборки нет."""
+    variants = _manifest.get("images", {}).get(path, {}).get(fmt, [])
+    return ", ".join(f"/static/dist/{name} {width}w" for width, name in variants)
+
+
+def register_template_globals(templates) -> None:
+    templates.env.globals.update(asset=asset, srcset=srcset)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles с заголовками кеша; из dist — готовые .br/.gz, если клиент их принимает."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if path.startswith("dist/"):
+            response = await self._precompressed_response(path, scope)
+            if response is None:
+                response = await super().get_response(path, scope)
+            cache_control = DIST_CACHE_CONTROL
+        else:
+            response = await super().get_response(path, scope)
+            cache_control = STATIC_CACHE_CONTROL
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = cache_control
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope) -> Response | None:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding not in accepted:
+                continue
+            _, stat_result = self.lookup_path(path + suffix)
+            if stat_result is None:
+                continue
+            response = await super().get_response(path + suffix, scope)
+            media_type, _ = mimetypes.guess_type(path)
+            if media_type:
+                charset = "; charset=utf-8" if media_type.startswith("text/") else ""
+                response.headers["Content-Type"] = media_type + charset
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+        return None
@@ -1,10 +1,24 @@
 from pydantic_settings import BaseSettings
 from datetime import date
+from typing import Literal
 import secrets
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///./vesnaidet.db"
+
+    # Пул соединений (только PostgreSQL)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1           # секунд; -1 — не пересоздавать
+    DB_POOL_PRE_PING: bool = False      # +1 round trip на каждый checkout
+    DB_STATEMENT_CACHE_SIZE: int = 100  # prepared statements asyncpg; 0 — выкл.
+    DB_POOL_WARMUP: int = 0             # соединений, открываемых при старте
+    DB_POOL_STATS_INTERVAL: float = 300  # секунд между «Database pool stats» в логе; 0 — выкл.
+    # Схему создаёт и обновляет python -m app.migrate; true — ещё и при старте
+    # процесса, только для разработки без отдельного шага миграции
+    DB_CREATE_SCHEMA: bool = False
     SECRET_KEY: str = secrets.token_hex(32)
     ADMIN_LOGIN: str = "admin"
     ADMIN_PASSWORD: str = "Uppetit01@"
@@ -12,12 +26,49 @@ class Settings(BaseSettings):
     SMSC_LOGIN: str = ""
     SMSC_PASSWORD: str = ""
     SMSC_SENDER: str = "UPPETIT"
+    SMS_BACKEND: Literal["smsc", "console"] = "smsc"  # console — SMS в лог, для разработки
+    SMS_QUEUE_SIZE: int = 10000   # SMS, ждущих отправки; сверх — отказ в форме
+    SMS_BATCH_SIZE: int = 50      # сообщений в одном запросе к шлюзу
+    SMS_BATCH_WAIT: float = 0.2   # секунд ожидания попутчиков для пачки
+    SMS_MAX_ATTEMPTS: int = 4
+    SMS_WORKERS: int = 2          # параллельных запросов к шлюзу
 
     PROMO_START: date = date(2026, 4, 1)
     PROMO_END: date = date(2026, 5, 30)
 
+    QR_CACHE_SIZE: int = 1024  # PNG и SVG в памяти процесса, ~1-2 КБ каждый
+    QR_FORMAT: Literal["svg", "png"] = "svg"  # QR на странице и по /qr без ?fmt=
+    # Подписанный QR проверяется на кассе без сети (app.services.qr_payload):
+    # «hmac:id:секрет» или «ed25519:id:seed»; пусто — в QR только код
+    QR_SIGNING_KEY: str = ""
+    QR_VERIFY_KEYS: str = ""        # прежние ключи через запятую: их QR ещё принимает POS
+    QR_PAYLOAD_GRACE_DAYS: int = 30  # подпись действует до PROMO_END + столько дней
+    CLAIM_CACHE_SIZE: int = 50000  # телефон → код для /success и /qr
+    CLAIM_CACHE_TTL: int = 3600    # секунд
+    STATS_CACHE_TTL: float = 5      # секунд; 0 — без кеша
+    STATS_PUSH_INTERVAL: float = 5  # опрос базы для живого дашборда
+
+    # Ограничение частоты: «запросов/секунд», пустая строка — выкл.
+    RATE_LIMIT_CLAIM_IP: str = "20/60"    # форма, ввод и повтор SMS-кода с одного IP
+    RATE_LIMIT_SMS_PHONE: str = "5/600"   # отправки SMS на один номер
+    RATE_LIMIT_QR_IP: str = "120/60"      # /success и QR с одного IP
+    RATE_LIMIT_BUCKETS: int = 100000      # ключей в памяти на каждое правило
+    RATE_LIMIT_TRUST_PROXY: bool = True   # IP клиента из X-Real-IP (nginx)
+
     OTP_EXPIRE_SECONDS: int = 300  # 5 минут
     OTP_MAX_ATTEMPTS: int = 3
+    OTP_RESEND_SECONDS: int = 60   # пауза перед повторной отправкой
+    OTP_LENGTH: int = 4            # до 8 цифр
+    OTP_STORE_SIZE: int = 100000   # телефонов с активным кодом, только при SHM_DIR
+
+    # Погашение на кассе (app.pos): «касса:ключ,касса:ключ»; пусто — API закрыт
+    POS_API_KEYS: str = ""
+    POS_BLOOM_ERROR_RATE: float = 0.001  # доля мусорных кодов, которые доходят до UPDATE
+    POS_FILTER_REFRESH: float = 30       # секунд между догрузками новых кодов в фильтр
+
+    # Каталог общей памяти (например /dev/shm/vesnaidet) для нескольких воркеров
+    # uvicorn: кеши, счётчики, OTP и лимиты становятся общими. Пусто — в процессе.
+    SHM_DIR: str = ""
 
     class Config:
         env_file = ".env"
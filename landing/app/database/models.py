@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 
 from sqlalchemy import (
     DateTime, Enum, ForeignKey,
-    Integer, String, Index
+    Integer, String, Index, text
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -19,6 +19,7 @@ class Base(DeclarativeBase):
 class CodeStatus(str, enum.Enum):
     AVAILABLE = "AVAILABLE"
     ASSIGNED = "ASSIGNED"
+    REDEEMED = "REDEEMED"  # погашен на кассе
 
 
 class User(Base):
@@ -47,10 +48,20 @@ class PromoCode(Base):
         Integer, ForeignKey("users.id"), nullable=True, index=True
     )
     assigned_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    redeemed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    redeemed_by: Mapped[str | None] = mapped_column(String(64), nullable=True)  # касса
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
 
     assigned_user: Mapped["User | None"] = relationship(back_populates="promo_codes")
 
     __table_args__ = (
         Index("ix_promo_codes_status_user", "status", "assigned_to_user_id"),
+        # Не больше одного кода на пользователя: гонку двух выдач решает база
+        Index(
+            "uq_promo_codes_assigned_user",
+            "assigned_to_user_id",
+            unique=True,
+            postgresql_where=text("assigned_to_user_id IS NOT NULL"),
+            sqlite_where=text("assigned_to_user_id IS NOT NULL"),
+        ),
     )
@@ -0,0 +1,87 @@
+"""Пул соединений со статистикой ожидания checkout."""
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+# QueuePool._do_get() при повторе вызывает сам себя; меряем только внешний
+# вызов, чтобы повторённый checkout считался один раз
+_in_checkout: ContextVar[bool] = ContextVar("_in_checkout", default=False)
+
+
+class PoolStats:
+    """Счётчики ожидания между двумя записями в лог."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.checkouts += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def snapshot(self) -> dict[str, float]:
+        """Счётчики в миллисекундах; после вызова — с нуля."""
+        data = {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(
+                self.total_wait / self.checkouts * 1000, 3
+            ) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+        self.reset()
+        return data
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool, который меряет ожидание свободного соединения."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        if _in_checkout.get():
+            return super()._do_get()
+
+        token = _in_checkout.set(True)
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record(time.perf_counter() - started)
+            _in_checkout.reset(token)
+
+
+async def log_pool_stats(engine: AsyncEngine, interval: float) -> None:
+    """Раз в interval секунд писать в лог занятость пула и ожидание checkout."""
+    while True:
+        await asyncio.sleep(interval)
+        pool = engine.pool
+        if not isinstance(pool, TimedAsyncQueuePool):
+            return
+        stats = pool.stats.snapshot()
+        logger.info(
+            "Database pool stats: size=%d checked_out=%d overflow=%d checkouts=%d"
+            " timeouts=%d avg_wait_ms=%.3f max_wait_ms=%.3f",
+            pool.size(), pool.checkedout(), pool.overflow(), stats["checkouts"],
+            stats["timeouts"], stats["avg_wait_ms"], stats["max_wait_ms"],
+        )
@@ -1,10 +1,145 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from sqlalchemy import Enum, func, inspect, select, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from app.config import settings
+from app.database.models import Base
+from app.database.pool import TimedAsyncQueuePool, log_pool_stats
+
+logger = logging.getLogger(__name__)
+
+engine_kwargs = {"echo": False}
+if "postgresql" in settings.DATABASE_URL:
+    engine_kwargs.update({
+        "poolclass": TimedAsyncQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    })
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+engine = create_async_engine(settings.DATABASE_URL, **engine_kwargs)
 async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
 
+_pool_monitor: asyncio.Task | None = None
+
 
 async def get_db() -> AsyncSession:
     async with async_session_factory() as session:
         yield session
+
+
+async def warm_up_pool() -> None:
+    """Открыть DB_POOL_WARMUP соединений заранее, до первых запросов."""
+    count = min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE)
+    if "postgresql" not in settings.DATABASE_URL or count <= 0:
+        return
+    connections = await asyncio.gather(*(engine.connect().start() for _ in range(count)))
+    for conn in connections:
+        await conn.close()
+
+
+def start_pool_monitor() -> None:
+    """Писать статистику пула в лог раз в DB_POOL_STATS_INTERVAL секунд."""
+    global _pool_monitor
+    if settings.DB_POOL_STATS_INTERVAL <= 0 or _pool_monitor is not None:
+        return
+    if isinstance(engine.pool, TimedAsyncQueuePool):
+        _pool_monitor = asyncio.create_task(log_pool_stats(engine, settings.DB_POOL_STATS_INTERVAL))
+
+
+async def stop_pool_monitor() -> None:
+    global _pool_monitor
+    if _pool_monitor is None:
+        return
+    _pool_monitor.cancel()
+    await asyncio.gather(_pool_monitor, return_exceptions=True)
+    _pool_monitor = None
+
+
+SCHEMA_LOCK_ID = 0x76736E64  # pg_advisory_lock: одна миграция схемы за раз
+
+
+async def ensure_schema() -> None:
+    """Создать недостающие таблицы, колонки, значения enum и индексы.
+
+    Запускается один раз перед стартом сервисов (python -m app.migrate), а не
+    в каждом воркере. create_all не меняет уже существующие таблицы. Новые
+    nullable-колонки и значения enum добавляются здесь же; индексы — по
+    одному, каждый в своей транзакции. Уникальный индекс, который не строится
+    (на данных с дублями), останавливает миграцию с ошибкой: на
+    uq_promo_codes_assigned_user держится «один код на пользователя», и
+    сервис без него стартовать не должен. Обычный индекс только пишет
+    предупреждение.
+    """
+    async with _schema_lock():
+        if engine.dialect.name == "postgresql":
+            await _add_enum_values()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_add_missing_columns)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    async with engine.begin() as conn:
+                        await conn.run_sync(index.create, checkfirst=True)
+                except DBAPIError as e:
+                    if index.unique:
+                        columns = ", ".join(column.name for column in index.columns)
+                        logger.error(
+                            "Unique index %s not created, remove duplicate %s(%s) and rerun: %s",
+                            index.name, table.name, columns, e.orig,
+                        )
+                        raise
+                    logger.warning("Index %s not created: %s", index.name, e.orig)
+
+
+@asynccontextmanager
+async def _schema_lock():
+    """Advisory lock PostgreSQL: вторая миграция ждёт первую, а не гонится с ней."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(select(func.pg_advisory_lock(SCHEMA_LOCK_ID)))
+        try:
+            yield
+        finally:
+            await conn.execute(select(func.pg_advisory_unlock(SCHEMA_LOCK_ID)))
+
+
+async def _add_enum_values() -> None:
+    # ALTER TYPE ... ADD VALUE до PostgreSQL 12 нельзя внутри транзакции
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        existing = set((await conn.execute(
+            text("SELECT typname FROM pg_type WHERE typtype = 'e'")
+        )).scalars())
+        for table in Base.metadata.sorted_tables:
+            for column in table.columns:
+                if not isinstance(column.type, Enum) or column.type.name not in existing:
+                    continue
+                for value in column.type.enums:
+                    await conn.execute(text(
+                        f"ALTER TYPE {column.type.name} ADD VALUE IF NOT EXISTS '{value}'"
+                    ))
+
+
+def _add_missing_columns(conn) -> None:
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            logger.info("Column %s.%s added", table.name, column.name)
@@ -1,23 +1,34 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 
-from app.database.models import Base
-from app.database.session import engine
+from app.assets import CachedStaticFiles
+from app.config import settings
+from app.database.session import ensure_schema, start_pool_monitor, stop_pool_monitor, warm_up_pool
 from app.routers import admin, public
+from app.services.ratelimit import RateLimited
+from app.services.sms import sms_dispatcher
+from app.services.stats import stats_hub
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if settings.DB_CREATE_SCHEMA:
+        await ensure_schema()
+    await warm_up_pool()
+    start_pool_monitor()
+    await sms_dispatcher.start()
     yield
+    await stop_pool_monitor()
+    await stats_hub.stop()
+    await sms_dispatcher.stop()
 
 
 app = FastAPI(title="Vesnaidet Landing", lifespan=lifespan)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
+
+app.add_exception_handler(RateLimited, public.rate_limited_handler)
 
 app.include_router(public.router)
 app.include_router(admin.router)
@@ -0,0 +1,24 @@
+"""Создать и обновить схему базы: python -m app.migrate.
+
+Запускается один раз перед стартом лендинга и сервиса касс, а не в lifespan
+каждого воркера: ALTER TYPE / ALTER TABLE из нескольких процессов сразу
+гонялись бы друг с другом. Повторный запуск безопасен.
+"""
+
+import asyncio
+import logging
+
+from app.database.session import engine, ensure_schema
+
+
+async def main() -> None:
+    try:
+        await ensure_schema()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("app.database.session").setLevel(logging.INFO)  # добавленные колонки
+    asyncio.run(main())
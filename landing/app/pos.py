@@ -0,0 +1,37 @@
+"""API погашения кодов для касс: uvicorn app.pos:app --port 8001.
+
+Отдельный процесс рядом с лендингом и с той же базой. Схему создаёт и
+обновляет python -m app.migrate — в docker-compose это сервис migrate,
+он отрабатывает до старта лендинга и касс.
+"""
+
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from app.config import settings
+from app.database.session import ensure_schema, start_pool_monitor, stop_pool_monitor, warm_up_pool
+from app.routers import pos
+from app.services.redeem import known_codes
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not settings.POS_API_KEYS:
+        logger.warning("POS_API_KEYS is empty: every request will be rejected")
+    if settings.DB_CREATE_SCHEMA:
+        await ensure_schema()
+    await warm_up_pool()
+    start_pool_monitor()
+    await known_codes.start(settings.POS_FILTER_REFRESH)
+    yield
+    await known_codes.stop()
+    await stop_pool_monitor()
+
+
+app = FastAPI(title="Vesnaidet POS", lifespan=lifespan)
+
+app.include_router(pos.router)
@@ -0,0 +1,201 @@
+"""Касса без сети: проверка подписанных QR и журнал погашений.
+
+QR с подписью (QR_SIGNING_KEY) касса проверяет сама, без запроса к
+серверу. Погашения пишутся в локальный журнал SQLite; когда сеть есть,
+sync() отправляет их пачками в POST /pos/redeem-batch. Повторная отправка
+безопасна. Конфликты — код погашен и в другой кассе, пока эта была без
+сети — остаются в журнале для разбора.
+
+    terminal = OfflineTerminal("journal.db", PayloadVerifier([key]), "https://vesnaidet.ru", api_key)
+    result = terminal.redeem(scanned)
+    report = terminal.sync()
+
+Кассе нужны только этот файл, app/services/qr_payload.py, httpx и, для
+Ed25519, cryptography. Из консоли:
+
+    python -m app.pos_offline keygen --algorithm ed25519 --key-id k1
+    python -m app.pos_offline redeem --journal journal.db --keys ed25519:k1:... <QR>
+    python -m app.pos_offline sync --journal journal.db --url https://vesnaidet.ru --api-key ...
+"""
+
+import argparse
+import enum
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+import httpx
+
+from app.services.qr_payload import (
+    InvalidPayload,
+    PayloadExpired,
+    PayloadVerifier,
+    generate_key,
+)
+
+SYNC_BATCH_SIZE = 200  # не больше REDEEM_BATCH_MAX сервера
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS redemptions (
+    code TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    redeemed_at TEXT NOT NULL,
+    sync_result TEXT,     -- NULL — ещё не отправлено
+    conflict_store TEXT,  -- касса, погасившая код раньше
+    conflict_at TEXT
+)
+"""
+
+
+class OfflineOutcome(str, enum.Enum):
+    REDEEMED = "redeemed"
+    ALREADY_REDEEMED = "already_redeemed"  # уже в журнале этой кассы
+    EXPIRED = "expired"
+    INVALID = "invalid"
+
+
+class OfflineResult(NamedTuple):
+    outcome: OfflineOutcome
+    code: str | None = None
+    redeemed_at: str | None = None
+
+
+class SyncReport(NamedTuple):
+    sent: int
+    conflicts: list[tuple[str, str, str]]  # код, касса, когда
+    rejected: int                           # сервер не принял подпись или код
+
+
+class OfflineTerminal:
+    def __init__(
+        self,
+        journal_path: str,
+        verifier: PayloadVerifier | None = None,
+        api_url: str = "",
+        api_key: str = "",
+        timeout: float = 10,
+    ):
+        self.verifier = verifier
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self._db = sqlite3.connect(journal_path)
+        self._db.execute(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def redeem(self, scanned: str, now: datetime | None = None) -> OfflineResult:
+        """Проверить QR и записать погашение; сеть не нужна."""
+        now = now or datetime.now(timezone.utc)
+        try:
+            signed = self.verifier.verify(scanned, now.timestamp())
+        except PayloadExpired:
+            return OfflineResult(OfflineOutcome.EXPIRED)
+        except InvalidPayload:
+            return OfflineResult(OfflineOutcome.INVALID)
+
+        redeemed_at = now.isoformat()
+        try:
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO redemptions (code, payload, redeemed_at) VALUES (?, ?, ?)",
+                    (signed.code, scanned.strip(), redeemed_at),
+                )
+        except sqlite3.IntegrityError:
+            (earlier,) = self._db.execute(
+                "SELECT redeemed_at FROM redemptions WHERE code = ?", (signed.code,)
+            ).fetchone()
+            return OfflineResult(OfflineOutcome.ALREADY_REDEEMED, signed.code, earlier)
+        return OfflineResult(OfflineOutcome.REDEEMED, signed.code, redeemed_at)
+
+    def pending(self) -> int:
+        return self._db.execute(
+            "SELECT count(*) FROM redemptions WHERE sync_result IS NULL"
+        ).fetchone()[0]
+
+    def sync(self, batch_size: int = SYNC_BATCH_SIZE) -> SyncReport:
+        """Отправить неотправленное пачками; ошибки сети пробрасываются, журнал цел."""
+        sent, rejected, conflicts = 0, 0, []
+        with httpx.Client(
+            base_url=self.api_url,
+            headers={"X-API-Key": self.api_key},
+            timeout=self.timeout,
+        ) as client:
+            while True:
+                rows = self._db.execute(
+                    "SELECT code, payload, redeemed_at FROM redemptions"
+                    " WHERE sync_result IS NULL ORDER BY redeemed_at LIMIT ?",
+                    (batch_size,),
+                ).fetchall()
+                if not rows:
+                    break
+                response = client.post("/pos/redeem-batch", json={"redemptions": [
+                    {"code": payload, "redeemed_at": redeemed_at}
+                    for _, payload, redeemed_at in rows
+                ]})
+                response.raise_for_status()
+                results = response.json()["results"]
+
+                with self._db:
+                    for (code, _, _), result in zip(rows, results):
+                        conflict = result["result"] == "already_redeemed"
+                        self._db.execute(
+                            "UPDATE redemptions SET sync_result = ?, conflict_store = ?,"
+                            " conflict_at = ? WHERE code = ?",
+                            (
+                                result["result"],
+                                result.get("store") if conflict else None,
+                                result.get("redeemed_at") if conflict else None,
+                                code,
+                            ),
+                        )
+                        if conflict:
+                            conflicts.append((code, result.get("store"), result.get("redeemed_at")))
+                        elif result["result"] != "redeemed":
+                            rejected += 1
+                sent += len(rows)
+        return SyncReport(sent, conflicts, rejected)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Касса без сети: подписанные QR и журнал")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    keygen = commands.add_parser("keygen", help="Новый ключ подписи QR")
+    keygen.add_argument("--algorithm", choices=["ed25519", "hmac"], default="ed25519")
+    keygen.add_argument("--key-id", default="k1")
+
+    redeem = commands.add_parser("redeem", help="Проверить и погасить QR без сети")
+    redeem.add_argument("payload")
+    redeem.add_argument("--journal", required=True)
+    redeem.add_argument("--keys", required=True, help="Ключи проверки через запятую")
+
+    sync = commands.add_parser("sync", help="Отправить журнал на сервер")
+    sync.add_argument("--journal", required=True)
+    sync.add_argument("--url", required=True)
+    sync.add_argument("--api-key", required=True)
+
+    args = parser.parse_args()
+    if args.command == "keygen":
+        signing, verifying = generate_key(args.algorithm, args.key_id)
+        print(f"QR_SIGNING_KEY={signing}")
+        print(f"Ключ для касс: {verifying}")
+        return
+
+    if args.command == "redeem":
+        terminal = OfflineTerminal(args.journal, PayloadVerifier(args.keys.split(",")))
+        result = terminal.redeem(args.payload)
+        print(result.outcome.value, result.code or "", result.redeemed_at or "")
+        sys.exit(0 if result.outcome is OfflineOutcome.REDEEMED else 1)
+
+    terminal = OfflineTerminal(args.journal, api_url=args.url, api_key=args.api_key)
+    report = terminal.sync()
+    print(f"Отправлено: {report.sent}, отклонено: {report.rejected}, конфликтов: {len(report.conflicts)}")
+    for code, store, redeemed_at in report.conflicts:
+        print(f"  {code}: уже погашен кассой {store} в {redeemed_at}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,33 @@
+import asyncio
+import codecs
 import csv
 import io
+import json
+import logging
+from uuid import uuid4
 
-from fastapi import APIRouter, Depends, Form, Request
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, Request, UploadFile
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from itsdangerous import BadSignature, URLSafeTimedSerializer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.assets import register_template_globals
 from app.config import settings
-from app.database.session import get_db
+from app.database.session import async_session_factory, get_db
 from app.services import promo as promo_svc
+from app.services.shm import ttl_cache
+from app.services.stats import get_stats, stats_events
 
 router = APIRouter(prefix="/admin")
 templates = Jinja2Templates(directory="app/templates")
+register_template_globals(templates)
 signer = URLSafeTimedSerializer(settings.SECRET_KEY)
 
 ADMIN_COOKIE = "admin_session"
 
+logger = logging.getLogger(__name__)
+
 
 def _check_admin(request: Request) -> bool:
     token = request.cookies.get(ADMIN_COOKIE, "")
@@ -63,16 +74,29 @@ async def logout():
 # ── Дашборд ───────────────────────────────────────────────────────────────────
 
 @router.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request, db: AsyncSession = Depends(get_db)):
+async def dashboard(request: Request, job: str = "", db: AsyncSession = Depends(get_db)):
     if not _check_admin(request):
         return RedirectResponse("/admin/login")
-    stats = await promo_svc.get_stats(db)
+    stats = await get_stats(db)
     return templates.TemplateResponse("admin/dashboard.html", {
         "request": request,
         "stats": stats,
+        "upload_job": job if job and _upload_jobs.get(job) is not None else "",
     })
 
 
+@router.get("/stats/stream")
+async def stats_stream(request: Request):
+    """Server-Sent Events: новые счётчики для открытого дашборда."""
+    if not _check_admin(request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    return StreamingResponse(
+        stats_events(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ── Загрузка кодов ────────────────────────────────────────────────────────────
 
 @router.post("/upload-codes")
@@ -86,7 +110,7 @@ async def upload_codes(
 
     lines = codes.splitlines()
     added, skipped = await promo_svc.import_codes(db, lines)
-    stats = await promo_svc.get_stats(db)
+    stats = await get_stats(db)
 
     return templates.TemplateResponse("admin/dashboard.html", {
         "request": request,
@@ -95,27 +119,110 @@ async def upload_codes(
     })
 
 
-# ── Выгрузка участников ───────────────────────────────────────────────────────
+# Импорт из файла идёт в фоне после ответа — nginx не ждёт вставки. Прогресс
+# пишется в кеш, общий для воркеров при SHM_DIR: опрос может попасть в любой.
+UPLOAD_READ_SIZE = 64 * 1024
+MAX_UPLOAD_JOBS = 20
+UPLOAD_JOB_TTL = 86400
+UPLOAD_ERROR_LENGTH = 200  # символов текста ошибки: снимок должен влезть в слот
+_upload_jobs = ttl_cache(
+    "upload_jobs",
+    MAX_UPLOAD_JOBS,
+    UPLOAD_JOB_TTL,
+    key_size=32,
+    value_size=640,
+    dumps=lambda job: json.dumps(job, ensure_ascii=False).encode(),
+    loads=json.loads,
+)
+
+
+async def _read_upload(file: UploadFile) -> promo_svc.UniqueCodes:
+    """Читать файл кусками, сразу отбрасывая дубли."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    codes = promo_svc.UniqueCodes()
+    tail = ""
+    while chunk := await file.read(UPLOAD_READ_SIZE):
+        *lines, tail = (tail + decoder.decode(chunk)).split("\n")
+        codes.add(lines)
+    codes.add([tail + decoder.decode(b"", final=True)])
+    return codes
+
+
+async def _run_upload_job(codes: promo_svc.UniqueCodes, progress: promo_svc.ImportProgress):
+    """Импорт не возобновляется: прерванный остаётся с ошибкой, файл грузят заново."""
+    try:
+        # Своя сессия: get_db уже закрыта, когда выполняются фоновые задачи
+        async with async_session_factory() as db:
+            await promo_svc.import_codes(db, codes, progress)
+    except asyncio.CancelledError:
+        # Остановка воркера посреди импорта
+        progress.error = f"импорт прерван после {progress.processed} из {progress.total} кодов"
+        logger.warning("Code import cancelled at %d of %d", progress.processed, progress.total)
+        raise
+    except Exception as e:
+        progress.error = str(e)[:UPLOAD_ERROR_LENGTH]
+        logger.exception("Code import failed at %d of %d", progress.processed, progress.total)
+    finally:
+        progress.done = True
+        progress.updated()
+
+
+@router.post("/upload-codes-file")
+async def upload_codes_file(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+):
+    if not _check_admin(request):
+        return RedirectResponse("/admin/login", status_code=303)
+
+    codes = await _read_upload(file)
+    job_id = uuid4().hex
+    progress = promo_svc.ImportProgress(
+        lines=codes.lines,
+        total=len(codes),
+        on_update=lambda job: _upload_jobs.set(job_id, job.as_dict()),
+    )
+    progress.updated()
 
-@router.get("/export-users")
-async def export_users(request: Request, db: AsyncSession = Depends(get_db)):
+    background_tasks.add_task(_run_upload_job, codes, progress)
+    return RedirectResponse(f"/admin/dashboard?job={job_id}", status_code=303)
+
+
+@router.get("/upload-jobs/{job_id}")
+async def upload_job_status(request: Request, job_id: str):
     if not _check_admin(request):
-        return RedirectResponse("/admin/login")
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    job = _upload_jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "not found"}, status_code=404)
+    return job
 
-    rows = await promo_svc.get_all_users_with_codes(db)
 
+# ── Выгрузка участников ───────────────────────────────────────────────────────
+
+async def _export_csv_chunks():
     buf = io.StringIO()
-    writer = csv.DictWriter(
-        buf,
-        fieldnames=["phone", "name", "email", "code", "issued_at", "registered_at"],
-        extrasaction="ignore",
-    )
+    writer = csv.DictWriter(buf, fieldnames=promo_svc.EXPORT_FIELDS, extrasaction="ignore")
     writer.writeheader()
-    writer.writerows(rows)
-    buf.seek(0)
+    yield codecs.BOM_UTF8 + buf.getvalue().encode("utf-8")  # BOM для Excel
+
+    # Своя сессия: зависимость get_db закрывается до отправки тела ответа
+    async with async_session_factory() as db:
+        async for rows in promo_svc.iter_users_with_codes(db):
+            buf.seek(0)
+            buf.truncate()
+            writer.writerows(rows)
+            yield buf.getvalue().encode("utf-8")
+
+
+@router.get("/export-users")
+async def export_users(request: Request):
+    if not _check_admin(request):
+        return RedirectResponse("/admin/login")
 
     return StreamingResponse(
-        iter([buf.getvalue().encode("utf-8-sig")]),  # utf-8-sig для Excel
+        _export_csv_chunks(),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=participants.csv"},
     )
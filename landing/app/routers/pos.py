@@ -0,0 +1,147 @@
+import hmac
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database.session import get_db
+from app.services.qr_payload import InvalidPayload, PayloadSigner, PayloadVerifier, is_signed_payload
+from app.services.redeem import RedeemOutcome, Redemption, known_codes, redeem_code
+
+router = APIRouter(prefix="/pos")
+
+REDEEM_BATCH_MAX = 500  # погашений в одной пачке от кассы без сети
+
+
+def _parse_api_keys(value: str) -> dict[str, str]:
+    """«касса:ключ,касса:ключ» → ключ → касса."""
+    keys = {}
+    for pair in value.split(","):
+        store, _, key = pair.strip().partition(":")
+        if store and key:
+            keys[key] = store
+    return keys
+
+
+_api_keys = _parse_api_keys(settings.POS_API_KEYS)
+
+
+def _make_payload_verifier() -> PayloadVerifier | None:
+    specs = [spec for spec in settings.QR_VERIFY_KEYS.split(",") if spec.strip()]
+    if settings.QR_SIGNING_KEY:
+        specs.append(PayloadSigner(settings.QR_SIGNING_KEY).verifier_spec())
+    return PayloadVerifier(specs) if specs else None
+
+
+_payload_verifier = _make_payload_verifier()
+
+
+def pos_store(x_api_key: str = Header("")) -> str:
+    """Зависимость: касса по заголовку X-API-Key."""
+    store = None
+    for key, key_store in _api_keys.items():
+        # Перебор всех ключей без раннего выхода — время ответа не подсказывает ключ
+        if hmac.compare_digest(key.encode(), x_api_key.encode()):
+            store = key_store
+    if store is None:
+        raise HTTPException(status_code=401, detail="invalid api key")
+    return store
+
+
+class RedeemRequest(BaseModel):
+    code: str  # код или подписанное содержимое QR
+
+
+class OfflineRedemption(BaseModel):
+    code: str
+    redeemed_at: datetime
+
+
+class RedeemBatchRequest(BaseModel):
+    redemptions: list[OfflineRedemption] = Field(max_length=REDEEM_BATCH_MAX)
+
+
+_STATUS = {
+    RedeemOutcome.REDEEMED: 200,
+    RedeemOutcome.UNKNOWN: 404,
+    RedeemOutcome.NOT_ISSUED: 409,
+    RedeemOutcome.ALREADY_REDEEMED: 409,
+}
+
+
+def _scanned_code(scanned: str, redeemed_at: datetime | None) -> str:
+    """Код из отсканированного: как есть или из подписанного QR.
+
+    Срок подписи проверяется на момент погашения: касса без сети могла
+    принять QR в последний день и прислать журнал позже.
+    """
+    scanned = scanned.strip()
+    if not is_signed_payload(scanned):
+        return scanned
+    if _payload_verifier is None:
+        raise InvalidPayload("signed payloads are not configured")
+    now = redeemed_at.timestamp() if redeemed_at else None
+    return _payload_verifier.verify(scanned, now).code
+
+
+async def _redeem(
+    db: AsyncSession, scanned: str, store: str, redeemed_at: datetime | None = None
+) -> Redemption:
+    raw_code = _scanned_code(scanned, redeemed_at)
+    # Мусор со сканера и чужие QR не доходят до UPDATE; промах фильтра
+    # проверяется в базе — фильтр может не знать свежий код
+    if raw_code not in known_codes and not await known_codes.lookup(db, raw_code):
+        return Redemption(RedeemOutcome.UNKNOWN)
+    return await redeem_code(db, raw_code, store, redeemed_at)
+
+
+def _result(redemption: Redemption) -> dict:
+    content = {"result": redemption.outcome.value}
+    if redemption.redeemed_at is not None:
+        content["redeemed_at"] = redemption.redeemed_at.isoformat()
+        content["store"] = redemption.store
+    return content
+
+
+@router.post("/redeem")
+async def redeem(
+    body: RedeemRequest,
+    store: str = Depends(pos_store),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        redemption = await _redeem(db, body.code, store)
+    except InvalidPayload as e:
+        return JSONResponse({"result": "invalid", "reason": str(e)}, status_code=400)
+    return JSONResponse(_result(redemption), status_code=_STATUS[redemption.outcome])
+
+
+@router.post("/redeem-batch")
+async def redeem_batch(
+    body: RedeemBatchRequest,
+    store: str = Depends(pos_store),
+    db: AsyncSession = Depends(get_db),
+):
+    """Журнал кассы, гасившей коды без сети; результаты — в том же порядке.
+
+    Пачку можно прислать повторно (ответ потерялся): код, уже погашенный
+    этой же кассой, снова отвечает redeemed. already_redeemed с другой
+    кассой — код успели погасить дважды, пока касса была без сети.
+    """
+    results = []
+    for item in body.redemptions:
+        redeemed_at = item.redeemed_at
+        if redeemed_at.tzinfo is None:
+            redeemed_at = redeemed_at.replace(tzinfo=timezone.utc)
+        try:
+            redemption = await _redeem(db, item.code, store, redeemed_at)
+        except InvalidPayload as e:
+            results.append({"result": "invalid", "reason": str(e)})
+            continue
+        if redemption.outcome is RedeemOutcome.ALREADY_REDEEMED and redemption.store == store:
+            redemption = redemption._replace(outcome=RedeemOutcome.REDEEMED)
+        results.append(_result(redemption))
+    return {"results": results}
@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
+import hmac
 import re
-from datetime import date
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Literal, NamedTuple
+from functools import lru_cache
 
 from fastapi import APIRouter, Depends, Form, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
@@ -7,18 +12,67 @@ from fastapi.templating import Jinja2Templates
 from itsdangerous import BadSignature, URLSafeTimedSerializer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.assets import register_template_globals
 from app.config import settings
 from app.database.session import get_db
 from app.services import promo as promo_svc
-from app.services.qr import generate_qr_bytes
+from app.services.otp import OTPCheck, otp_store
+from app.services.page_cache import PageCache
+from app.services.qr import QR_STYLE_VERSION, generate_qr_bytes, generate_qr_svg
+from app.services.qr_payload import PayloadSigner
+from app.services.ratelimit import RateLimited, limiter_from_setting
+from app.services.shm import ttl_cache
+from app.services.singleflight import SingleFlight
+from app.services.sms import queue_otp_sms
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
+register_template_globals(templates)
 signer = URLSafeTimedSerializer(settings.SECRET_KEY)
 
+TOKEN_MAX_AGE = 86400 * 30
+
+# Токен с данными формы до ввода SMS-кода; соль не даёт выдать его за токен /success
+OTP_SALT = "otp"
+PENDING_MAX_AGE = 3600
+
+# Код выданного QR не меняется — готовые PNG и SVG держим в памяти
+get_qr_bytes = lru_cache(maxsize=settings.QR_CACHE_SIZE)(generate_qr_bytes)
+get_qr_svg = lru_cache(maxsize=settings.QR_CACHE_SIZE)(generate_qr_svg)
+
+QRFormat = Literal["svg", "png"]
+
+# Подписанный QR: код, срок и подпись — касса проверяет его без сети.
+# Срок — от конца акции, а не от выдачи: содержимое QR по коду неизменно,
+# так что кеши картинок и ETag остаются верными.
+qr_signer = PayloadSigner(settings.QR_SIGNING_KEY) if settings.QR_SIGNING_KEY else None
+QR_PAYLOAD_EXPIRES_AT = int(datetime.combine(
+    settings.PROMO_END + timedelta(days=settings.QR_PAYLOAD_GRACE_DAYS), time.max, timezone.utc
+).timestamp())
+QR_DATA_VERSION = f"{qr_signer.key_id}:{QR_PAYLOAD_EXPIRES_AT}" if qr_signer else "plain"
+
+# Картинка по токену неизменна: браузер может хранить её весь срок токена
+QR_CACHE_CONTROL = f"private, max-age={TOKEN_MAX_AGE}, immutable"
+
+claim_ip_limiter = limiter_from_setting(
+    settings.RATE_LIMIT_CLAIM_IP, settings.RATE_LIMIT_BUCKETS, "claim-ip"
+)
+sms_phone_limiter = limiter_from_setting(
+    settings.RATE_LIMIT_SMS_PHONE, settings.RATE_LIMIT_BUCKETS, "sms-phone"
+)
+qr_ip_limiter = limiter_from_setting(
+    settings.RATE_LIMIT_QR_IP, settings.RATE_LIMIT_BUCKETS, "qr-ip"
+)
+
 PHONE_RE = re.compile(r"^(\+7|7|8)[\s\-]?\(?\d{3}\)?[\s\-]?\d{3}[\s\-]?\d{2}[\s\-]?\d{2}$")
 
 
+def _qr_data(raw_code: str) -> str:
+    if qr_signer is None:
+        return raw_code
+    return qr_signer.sign(raw_code, QR_PAYLOAD_EXPIRES_AT)
+
+
 def _normalize_phone(raw: str) -> str:
     digits = re.sub(r"\D", "", raw)
     if digits.startswith("8"):
@@ -31,131 +85,350 @@ def _is_promo_active() -> bool:
     return settings.PROMO_START <= today <= settings.PROMO_END
 
 
-# ── Главная ───────────────────────────────────────────────────────────────────
+# ── Ограничение частоты ───────────────────────────────────────────────────────
 
-@router.get("/", response_class=HTMLResponse)
-async def index(request: Request):
+def _client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_PROXY and (real_ip := request.headers.get("x-real-ip")):
+        return real_ip
+    return request.client.host if request.client else ""
+
+
+def limit_by_ip(limiter):
+    """Зависимость: списать токен с IP клиента до работы обработчика."""
+    async def dependency(request: Request):
+        if limiter is not None:
+            limiter.check(_client_ip(request))
+    return dependency
+
+
+def _limit_phone(phone: str) -> None:
+    if sms_phone_limiter is not None:
+        sms_phone_limiter.check(phone)
+
+
+async def rate_limited_handler(request: Request, exc: RateLimited) -> Response:
+    headers = {"Retry-After": str(exc.retry_after_seconds)}
+    if "text/html" in request.headers.get("accept", ""):
+        return templates.TemplateResponse(
+            "too_many_requests.html",
+            {"request": request, "retry_after": exc.retry_after_seconds},
+            status_code=429,
+            headers=headers,
+        )
+    return Response("Too Many Requests", status_code=429, headers=headers)
+
+
+def _render_index(request: Request, **context):
     return templates.TemplateResponse("index.html", {
         "request": request,
         "promo_active": _is_promo_active(),
         "promo_end": settings.PROMO_END.strftime("%d.%m.%Y"),
+        **context,
     })
 
 
-# ── Форма → QR ────────────────────────────────────────────────────────────────
+# ── Главная ───────────────────────────────────────────────────────────────────
+
+# Главная без ошибок формы зависит только от состояния акции: рендерим и
+# сжимаем её один раз на состояние. Ключ — само состояние, так что на границе
+# акции страница сменится сама, без явного сброса.
+INDEX_CACHE_CONTROL = "public, max-age=60"
+index_cache = PageCache()
+
+
+def _render_index_html(promo_active: bool) -> str:
+    return templates.get_template("index.html").render(
+        promo_active=promo_active,
+        promo_end=settings.PROMO_END.strftime("%d.%m.%Y"),
+    )
+
+
+@router.get("/", response_class=HTMLResponse)
+async def index(request: Request):
+    promo_active = _is_promo_active()
+    page = index_cache.get(promo_active, lambda: _render_index_html(promo_active))
+    body, encoding, etag = page.encoded(request.headers.get("accept-encoding", ""))
+
+    headers = {"ETag": etag, "Cache-Control": INDEX_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if any(_etag_matches(request.headers.get("if-none-match"), tag) for tag in page.etags):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="text/html; charset=utf-8", headers=headers)
+
+
+# ── Форма → SMS-код → QR ──────────────────────────────────────────────────────
 
-@router.post("/claim")
+def _mask_phone(phone: str) -> str:
+    return f"{phone[:2]} *** ***-{phone[-4:-2]}-{phone[-2:]}"
+
+
+def _load_pending(pt: str) -> dict | None:
+    """Данные формы, ждущие подтверждения телефона."""
+    try:
+        return signer.loads(pt, salt=OTP_SALT, max_age=PENDING_MAX_AGE)
+    except BadSignature:
+        return None
+
+
+def _render_verify(request: Request, pt: str, phone: str, error: str = "", notice: str = ""):
+    return templates.TemplateResponse("verify.html", {
+        "request": request,
+        "pt": pt,
+        "masked_phone": _mask_phone(phone),
+        "code_length": settings.OTP_LENGTH,
+        "error": error,
+        "notice": notice,
+    })
+
+
+async def _send_otp(request: Request, pt: str, phone: str):
+    """Отправить новый код, если пауза после прошлого прошла, и показать форму ввода."""
+    # Лимит SMS тратится только на отправку: повторы в паузе его не съедают
+    code = None
+    if otp_store.resend_wait(phone) == 0:
+        _limit_phone(phone)
+        code = otp_store.issue(phone)
+    if code is None:
+        wait = otp_store.resend_wait(phone)
+        return _render_verify(
+            request, pt, phone,
+            notice=f"Код уже отправлен. Новый можно запросить через {wait} с.",
+        )
+    if not queue_otp_sms(phone, code):
+        otp_store.discard(phone)
+        return _render_verify(
+            request, pt, phone, error="Сейчас много запросов. Попробуйте через минуту.",
+        )
+    return _render_verify(request, pt, phone)
+
+
+@router.post("/claim", dependencies=[Depends(limit_by_ip(claim_ip_limiter))])
 async def claim(
     request: Request,
     name: str = Form(...),
     phone: str = Form(...),
     email: str = Form(...),
-    db: AsyncSession = Depends(get_db),
 ):
-    def render_error(error: str):
-        return templates.TemplateResponse("index.html", {
-            "request": request,
-            "promo_active": True,
-            "promo_end": settings.PROMO_END.strftime("%d.%m.%Y"),
-            "error": error,
-            "name_value": name,
-            "phone_value": phone,
-            "email_value": email,
-        })
-
     if not _is_promo_active():
-        return templates.TemplateResponse("index.html", {
-            "request": request,
-            "promo_active": False,
-            "promo_end": settings.PROMO_END.strftime("%d.%m.%Y"),
-        })
+        return _render_index(request)
 
     if not PHONE_RE.match(phone.strip()):
-        return render_error("Введите корректный номер телефона.")
+        return _render_index(
+            request,
+            error="Введите корректный номер телефона.",
+            name_value=name,
+            phone_value=phone,
+            email_value=email,
+        )
 
     norm_phone = _normalize_phone(phone)
-
-    # Уже получал код?
-    existing_user = await promo_svc.get_user_by_phone(db, norm_phone)
-    if existing_user:
-        existing_code = await promo_svc.user_has_code(db, existing_user)
-        if existing_code:
-            token = signer.dumps(norm_phone)
-            return RedirectResponse(f"/success?t={token}", status_code=303)
-
-    user = await promo_svc.get_or_create_user(
-        db, norm_phone, name.strip() or None, email.strip() or None
+    # Форма едет в подписанном токене — до подтверждения ничего не пишем в БД
+    pt = signer.dumps(
+        {"phone": norm_phone, "name": name.strip(), "email": email.strip()},
+        salt=OTP_SALT,
     )
-    promo_code = await promo_svc.assign_code(db, user)
-
-    if promo_code is None:
-        return render_error("К сожалению, все подарки уже разобрали. Следите за нашими акциями!")
-
-    token = signer.dumps(norm_phone)
-    return RedirectResponse(f"/success?t={token}", status_code=303)
+    return await _send_otp(request, pt, norm_phone)
+
+
+@router.post("/resend-otp", dependencies=[Depends(limit_by_ip(claim_ip_limiter))])
+async def resend_otp(request: Request, pt: str = Form(...)):
+    pending = _load_pending(pt)
+    if pending is None:
+        return RedirectResponse("/", status_code=303)
+    return await _send_otp(request, pt, pending["phone"])
+
+
+class _Verified(NamedTuple):
+    token: str | None = None  # токен /success; None — коды закончились
+    error: str = ""           # ошибка формы ввода кода
+
+
+_verify_flight: SingleFlight[_Verified] = SingleFlight()
+
+# Итог погашенного кода, общий для воркеров: повтор того же (телефон, код)
+# из другого процесса получает тот же редирект. Значение — токен /success,
+# "" — коды закончились, VERIFY_IN_PROGRESS — первый запрос ещё выдаёт код
+VERIFY_IN_PROGRESS = "-"
+VERIFY_WAIT_SECONDS = 5.0
+_verified_codes = ttl_cache(
+    "otp-verified",
+    settings.OTP_STORE_SIZE,
+    settings.OTP_EXPIRE_SECONDS,
+    key_size=24,
+    value_size=128,
+    dumps=str.encode,
+    loads=bytes.decode,
+)
+
+
+async def _wait_verified(key: str) -> _Verified | None:
+    """Итог первого запроса с этим кодом; None — такого запроса не было."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + VERIFY_WAIT_SECONDS
+    while (done := _verified_codes.get(key)) == VERIFY_IN_PROGRESS:
+        if loop.time() >= deadline:
+            return None
+        await asyncio.sleep(0.05)
+    if done is None:
+        return None
+    return _Verified(token=done or None)
+
+
+async def _verify_and_claim(db: AsyncSession, pending: dict, code: str) -> _Verified:
+    phone = pending["phone"]
+    key = f"{phone}:{code}"
+    result = otp_store.check(phone, code)
+    if result is OTPCheck.EXPIRED and (verified := await _wait_verified(key)):
+        return verified
+    if result is OTPCheck.WRONG:
+        return _Verified(
+            error=f"Неверный код. Осталось попыток: {otp_store.attempts_left(phone)}."
+        )
+    if result is OTPCheck.LOCKED:
+        return _Verified(error="Попытки закончились. Запросите новый код.")
+    if result is OTPCheck.EXPIRED:
+        return _Verified(error="Код истёк. Запросите новый код.")
+
+    _verified_codes.set(key, VERIFY_IN_PROGRESS)
+    try:
+        # Уже получал код — вернётся он же, иначе выдаётся свободный
+        claimed = await promo_svc.claim_code(
+            db, phone, pending["name"] or None, pending["email"] or None
+        )
+    except BaseException:
+        _verified_codes.pop(key)
+        raise
+    verified = _Verified(token=signer.dumps(phone) if claimed.raw_code else None)
+    _verified_codes.set(key, verified.token or "")
+    return verified
+
+
+@router.post("/verify-otp", dependencies=[Depends(limit_by_ip(claim_ip_limiter))])
+async def verify_otp(
+    request: Request,
+    pt: str = Form(...),
+    code: str = Form(...),
+    db: AsyncSession = Depends(get_db),
+):
+    pending = _load_pending(pt)
+    if pending is None:
+        return RedirectResponse("/", status_code=303)
+    if not _is_promo_active():
+        return _render_index(request)
+
+    phone, code = pending["phone"], code.strip()
+    # Двойной клик и повторы браузера приходят параллельно. Одноразовый код
+    # погашает только первый запрос; дубли в этом воркере ждут его через
+    # SingleFlight, в других — через _verified_codes, и получают тот же ответ,
+    # а не «код истёк» или вторую выдачу
+    verified = await _verify_flight.do(
+        (phone, code), lambda: _verify_and_claim(db, pending, code)
+    )
+    if verified.error:
+        return _render_verify(request, pt, phone, error=verified.error)
+    if verified.token is None:
+        return _render_index(
+            request, error="К сожалению, все подарки уже разобрали. Следите за нашими акциями!"
+        )
+    return RedirectResponse(f"/success?t={verified.token}", status_code=303)
 
 
 # ── Страница с QR ─────────────────────────────────────────────────────────────
 
-@router.get("/success", response_class=HTMLResponse)
+@router.get(
+    "/success",
+    response_class=HTMLResponse,
+    dependencies=[Depends(limit_by_ip(qr_ip_limiter))],
+)
 async def success_page(
     request: Request,
     t: str = "",
     db: AsyncSession = Depends(get_db),
 ):
     try:
-        phone = signer.loads(t, max_age=86400 * 30)
+        phone = signer.loads(t, max_age=TOKEN_MAX_AGE)
     except BadSignature:
         return RedirectResponse("/")
 
-    user = await promo_svc.get_user_by_phone(db, phone)
-    if not user:
-        return RedirectResponse("/")
-    code = await promo_svc.user_has_code(db, user)
-    if not code:
+    claimed = await promo_svc.resolve_claim(db, phone)
+    if not claimed:
         return RedirectResponse("/")
 
     return templates.TemplateResponse("success.html", {
         "request": request,
-        "code": code.raw_code,
-        "user_name": user.name or "",
+        "code": claimed.raw_code,
+        "user_name": claimed.user_name or "",
         "token": t,
+        # SVG встраивается в страницу — без отдельного запроса за картинкой
+        "qr_svg": get_qr_svg(_qr_data(claimed.raw_code)) if settings.QR_FORMAT == "svg" else None,
     })
 
 
-@router.get("/qr/{token}")
-async def qr_image(token: str, db: AsyncSession = Depends(get_db)):
-    try:
-        phone = signer.loads(token, max_age=86400 * 30)
-    except BadSignature:
-        return Response(status_code=404)
+def _qr_etag(phone: str, fmt: QRFormat) -> str:
+    """Сильный ETag QR по телефону: известен до запроса в БД, телефон не раскрывает."""
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(),
+        f"qr:{QR_STYLE_VERSION}:{QR_DATA_VERSION}:{fmt}:{phone}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return f'"{digest[:32]}"'
 
-    user = await promo_svc.get_user_by_phone(db, phone)
-    if not user:
-        return Response(status_code=404)
-    code = await promo_svc.user_has_code(db, user)
-    if not code:
-        return Response(status_code=404)
 
-    return Response(content=generate_qr_bytes(code.raw_code), media_type="image/png")
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
 
 
-@router.get("/qr-download/{token}")
-async def qr_download(token: str, db: AsyncSession = Depends(get_db)):
+async def _qr_response(
+    request: Request,
+    token: str,
+    db: AsyncSession,
+    fmt: QRFormat,
+    headers: dict | None = None,
+) -> Response:
     try:
-        phone = signer.loads(token, max_age=86400 * 30)
+        phone = signer.loads(token, max_age=TOKEN_MAX_AGE)
     except BadSignature:
         return Response(status_code=404)
 
-    user = await promo_svc.get_user_by_phone(db, phone)
-    if not user:
-        return Response(status_code=404)
-    code = await promo_svc.user_has_code(db, user)
-    if not code:
+    cache_headers = {"ETag": _qr_etag(phone, fmt), "Cache-Control": QR_CACHE_CONTROL}
+    # Повторный показ: ни БД, ни генерации
+    if _etag_matches(request.headers.get("if-none-match"), cache_headers["ETag"]):
+        return Response(status_code=304, headers=cache_headers)
+
+    claimed = await promo_svc.resolve_claim(db, phone)
+    if not claimed:
         return Response(status_code=404)
 
+    data = _qr_data(claimed.raw_code)
+    if fmt == "svg":
+        content, media_type = get_qr_svg(data), "image/svg+xml"
+    else:
+        content, media_type = get_qr_bytes(data), "image/png"
     return Response(
-        content=generate_qr_bytes(code.raw_code),
-        media_type="image/png",
+        content=content,
+        media_type=media_type,
+        headers={**cache_headers, **(headers or {})},
+    )
+
+
+@router.get("/qr/{token}", dependencies=[Depends(limit_by_ip(qr_ip_limiter))])
+async def qr_image(
+    request: Request,
+    token: str,
+    fmt: QRFormat | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    return await _qr_response(request, token, db, fmt or settings.QR_FORMAT)
+
+
+@router.get("/qr-download/{token}", dependencies=[Depends(limit_by_ip(qr_ip_limiter))])
+async def qr_download(request: Request, token: str, db: AsyncSession = Depends(get_db)):
+    # Скачивается PNG: его понимает любая галерея
+    return await _qr_response(
+        request, token, db, "png",
         headers={"Content-Disposition": "attachment; filename=uppetit_qr.png"},
     )
@@ -0,0 +1,218 @@
+import enum
+import hmac
+import secrets
+import struct
+import time
+from collections.abc import Callable
+
+from app.config import settings
+from app.services.shm import SharedTable, open_shared_table
+
+
+class OTPCheck(enum.Enum):
+    OK = "ok"
+    WRONG = "wrong"      # неверный код, попытки ещё есть
+    LOCKED = "locked"    # попытки кончились — нужен новый код
+    EXPIRED = "expired"  # кода нет или истёк
+
+
+def _new_code(length: int) -> str:
+    return f"{secrets.randbelow(10 ** length):0{length}d}"
+
+
+class _Entry:
+    __slots__ = ("code", "attempts_left", "sent_at", "expires_at", "slot")
+
+    def __init__(self, code: str, attempts: int, sent_at: float, expires_at: float, slot: int):
+        self.code = code
+        self.attempts_left = attempts
+        self.sent_at = sent_at
+        self.expires_at = expires_at
+        self.slot = slot
+
+
+class OTPStore:
+    """OTP, счётчики попыток и паузы повторной отправки в памяти процесса.
+
+    Записи истекают по колесу таймеров: корзина на каждые resolution секунд,
+    запись лежит в корзине своего срока. Очистка при каждом обращении
+    просматривает только корзины, время которых прошло, — без обхода всех
+    телефонов и без записей в БД.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        resend_after: float,
+        max_attempts: int,
+        length: int = 4,
+        resolution: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.resend_after = resend_after
+        self.max_attempts = max_attempts
+        self.length = length
+        self.resolution = resolution
+        self._clock = clock
+        # Колесо длиннее ttl: корзина не переиспользуется, пока её записи живы
+        self._wheel: list[set[str]] = [set() for _ in range(int(ttl / resolution) + 3)]
+        self._entries: dict[str, _Entry] = {}
+        self._swept = self._tick_of(clock()) - 1  # последняя очищенная корзина
+
+    def issue(self, phone: str) -> str | None:
+        """Новый код для телефона; None — пауза после прошлой отправки ещё идёт."""
+        now = self._advance()
+        if self.resend_wait(phone) > 0:
+            return None
+        self.discard(phone)
+
+        code = _new_code(self.length)
+        expires_at = now + self.ttl
+        slot = self._tick_of(expires_at) % len(self._wheel)
+        self._entries[phone] = _Entry(code, self.max_attempts, now, expires_at, slot)
+        self._wheel[slot].add(phone)
+        return code
+
+    def check(self, phone: str, code: str) -> OTPCheck:
+        """Проверить код; верный код удаляется — он одноразовый."""
+        entry = self._get(phone)
+        if entry is None:
+            return OTPCheck.EXPIRED
+        if entry.attempts_left <= 0:
+            return OTPCheck.LOCKED
+        if hmac.compare_digest(entry.code, code):
+            self.discard(phone)
+            return OTPCheck.OK
+        entry.attempts_left -= 1
+        return OTPCheck.WRONG if entry.attempts_left > 0 else OTPCheck.LOCKED
+
+    def attempts_left(self, phone: str) -> int:
+        entry = self._get(phone)
+        return entry.attempts_left if entry else 0
+
+    def resend_wait(self, phone: str) -> int:
+        """Сколько секунд ждать до повторной отправки."""
+        entry = self._get(phone)
+        if entry is None:
+            return 0
+        return max(0, int(entry.sent_at + self.resend_after - self._clock() + 0.999))
+
+    def discard(self, phone: str) -> None:
+        entry = self._entries.pop(phone, None)
+        if entry is not None:
+            self._wheel[entry.slot].discard(phone)
+
+    def __len__(self) -> int:
+        self._advance()
+        return len(self._entries)
+
+    def _get(self, phone: str) -> _Entry | None:
+        now = self._advance()
+        entry = self._entries.get(phone)
+        if entry is None or entry.expires_at <= now:
+            return None
+        return entry
+
+    def _tick_of(self, moment: float) -> int:
+        return int(moment // self.resolution)
+
+    def _advance(self) -> float:
+        """Повернуть колесо до текущего момента, удаляя истёкшие записи."""
+        now = self._clock()
+        last = self._tick_of(now) - 1  # корзины целиком в прошлом
+        steps = min(last - self._swept, len(self._wheel))
+        for offset in range(1, steps + 1):
+            bucket = self._wheel[(self._swept + offset) % len(self._wheel)]
+            for phone in [p for p in bucket if self._entries[p].expires_at <= now]:
+                bucket.discard(phone)
+                del self._entries[phone]
+        self._swept = max(self._swept, last)
+        return now
+
+
+_SHARED_ENTRY = struct.Struct("<8sBd")  # код, попыток осталось, отправлен в (time.time())
+
+
+class SharedOTPStore:
+    """То же, что OTPStore, но в SharedTable — код, выданный одним воркером,
+    проверяется любым. Срок записи — срок слота таблицы.
+    """
+
+    def __init__(
+        self,
+        table: SharedTable,
+        ttl: float,
+        resend_after: float,
+        max_attempts: int,
+        length: int = 4,
+    ):
+        self.table = table
+        self.ttl = ttl
+        self.resend_after = resend_after
+        self.max_attempts = max_attempts
+        self.length = length
+
+    def issue(self, phone: str) -> str | None:
+        with self.table.lock():
+            if self.resend_wait(phone) > 0:
+                return None
+            code = _new_code(self.length)
+            self._put(phone, code, self.max_attempts, time.time())
+            return code
+
+    def check(self, phone: str, code: str) -> OTPCheck:
+        with self.table.lock():
+            entry = self._get(phone)
+            if entry is None:
+                return OTPCheck.EXPIRED
+            stored, attempts_left, sent_at = entry
+            if attempts_left <= 0:
+                return OTPCheck.LOCKED
+            if hmac.compare_digest(stored, code):
+                self.table.pop(phone)
+                return OTPCheck.OK
+            attempts_left -= 1
+            self._put(phone, stored, attempts_left, sent_at)
+            return OTPCheck.WRONG if attempts_left > 0 else OTPCheck.LOCKED
+
+    def attempts_left(self, phone: str) -> int:
+        entry = self._get(phone)
+        return entry[1] if entry else 0
+
+    def resend_wait(self, phone: str) -> int:
+        entry = self._get(phone)
+        if entry is None:
+            return 0
+        return max(0, int(entry[2] + self.resend_after - time.time() + 0.999))
+
+    def discard(self, phone: str) -> None:
+        self.table.pop(phone)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _get(self, phone: str) -> tuple[str, int, float] | None:
+        raw = self.table.get(phone)
+        if raw is None:
+            return None
+        code, attempts_left, sent_at = _SHARED_ENTRY.unpack(raw)
+        return code.rstrip(b"\0").decode(), attempts_left, sent_at
+
+    def _put(self, phone: str, code: str, attempts_left: int, sent_at: float) -> None:
+        raw = _SHARED_ENTRY.pack(code.encode(), attempts_left, sent_at)
+        self.table.set(phone, raw, sent_at + self.ttl)
+
+
+def _make_otp_store() -> OTPStore | SharedOTPStore:
+    options = dict(
+        ttl=settings.OTP_EXPIRE_SECONDS,
+        resend_after=settings.OTP_RESEND_SECONDS,
+        max_attempts=settings.OTP_MAX_ATTEMPTS,
+        length=settings.OTP_LENGTH,
+    )
+    table = open_shared_table("otp", settings.OTP_STORE_SIZE, key_size=16, value_size=_SHARED_ENTRY.size)
+    return SharedOTPStore(table, **options) if table is not None else OTPStore(**options)
+
+
+otp_store = _make_otp_store()
@@ -0,0 +1,67 @@
+import gzip
+import hashlib
+from collections.abc import Callable, Hashable
+from typing import NamedTuple
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен — тогда отдаём gzip
+    brotli = None
+
+
+class CachedPage(NamedTuple):
+    """Готовая страница: тело как есть и заранее сжатые варианты."""
+
+    body: bytes
+    gzip: bytes
+    br: bytes | None
+    digest: str
+
+    @classmethod
+    def build(cls, html: str) -> "CachedPage":
+        body = html.encode("utf-8")
+        return cls(
+            body=body,
+            gzip=gzip.compress(body, compresslevel=9, mtime=0),
+            br=brotli.compress(body, quality=11) if brotli is not None else None,
+            digest=hashlib.sha256(body).hexdigest()[:32],
+        )
+
+    @property
+    def etags(self) -> set[str]:
+        return {f'"{self.digest}"', f'"{self.digest}-gzip"', f'"{self.digest}-br"'}
+
+    def encoded(self, accept_encoding: str) -> tuple[bytes, str | None, str]:
+        """Лучший вариант для Accept-Encoding: (тело, Content-Encoding, ETag)."""
+        accepted = accepted_encodings(accept_encoding)
+        if self.br is not None and "br" in accepted:
+            return self.br, "br", f'"{self.digest}-br"'
+        if "gzip" in accepted:
+            return self.gzip, "gzip", f'"{self.digest}-gzip"'
+        return self.body, None, f'"{self.digest}"'
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class PageCache:
+    """Отрендеренные страницы по ключу; ключей немного — без вытеснения."""
+
+    def __init__(self):
+        self._pages: dict[Hashable, CachedPage] = {}
+
+    def get(self, key: Hashable, render: Callable[[], str]) -> CachedPage:
+        page = self._pages.get(key)
+        if page is None:
+            page = self._pages[key] = CachedPage.build(render())
+        return page
+
+    def clear(self) -> None:
+        self._pages.clear()
@@ -1,9 +1,18 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator, Callable, Iterable
 from datetime import datetime, timezone
+from typing import NamedTuple
 
-from sqlalchemy import select, func
+from sqlalchemy import Insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database.models import CodeStatus, PromoCode, User
+from app.services.shm import ttl_cache
+from app.services.stats import invalidate_stats
 
 
 # ── Users ─────────────────────────────────────────────────────────────────────
@@ -13,19 +22,6 @@ async def get_user_by_phone(db: AsyncSession, phone: str) -> User | None:
     return result.scalar_one_or_none()
 
 
-async def get_or_create_user(
-    db: AsyncSession, phone: str, name: str | None, email: str | None
-) -> User:
-    result = await db.execute(select(User).where(User.phone == phone))
-    user = result.scalar_one_or_none()
-    if user is None:
-        user = User(phone=phone, name=name, email=email)
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-    return user
-
-
 async def user_has_code(db: AsyncSession, user: User) -> PromoCode | None:
     result = await db.execute(
         select(PromoCode).where(PromoCode.assigned_to_user_id == user.id)
@@ -33,73 +29,294 @@ async def user_has_code(db: AsyncSession, user: User) -> PromoCode | None:
     return result.scalar_one_or_none()
 
 
-async def assign_code(db: AsyncSession, user: User) -> PromoCode | None:
-    """Выдать пользователю свободный код (защита от race condition)."""
-    result = await db.execute(
+# ── Выдача кода ───────────────────────────────────────────────────────────────
+
+class Claim(NamedTuple):
+    user_name: str | None
+    raw_code: str | None  # None — коды закончились
+    created: bool         # код выдан этим запросом, а не раньше
+
+
+class ClaimedCode(NamedTuple):
+    user_name: str | None
+    raw_code: str
+
+
+# Выданный код за телефоном не меняется — кешируем только найденные
+_claimed_codes = ttl_cache(
+    "claims",
+    settings.CLAIM_CACHE_SIZE,
+    settings.CLAIM_CACHE_TTL,
+    key_size=16,
+    value_size=160,
+    dumps=lambda claimed: json.dumps(claimed, ensure_ascii=False).encode(),
+    loads=lambda raw: ClaimedCode(*json.loads(raw)),
+)
+
+
+async def resolve_claim(db: AsyncSession, phone: str) -> ClaimedCode | None:
+    """Код пользователя для страниц по токену: кеш, иначе один запрос."""
+    claimed = _claimed_codes.get(phone)
+    if claimed is not None:
+        return claimed
+
+    row = (await db.execute(
+        select(User.name, PromoCode.raw_code)
+        .join(PromoCode, PromoCode.assigned_to_user_id == User.id)
+        .where(User.phone == phone)
+        .limit(1)
+    )).first()
+    if row is None:
+        return None
+    claimed = ClaimedCode(row.name, row.raw_code)
+    _claimed_codes.set(phone, claimed)
+    return claimed
+
+
+# Весь claim одним выражением: upsert пользователя, его прежний код, либо
+# захват свободного (SKIP LOCKED) и UPDATE ... RETURNING.
+# ON CONFLICT DO UPDATE нужен, чтобы RETURNING вернул и существующую строку;
+# имя и email существующего пользователя не меняются.
+_CLAIM_SQL = text("""
+WITH u AS (
+    INSERT INTO users (phone, name, email, created_at)
+    VALUES (:phone, :name, :email, now())
+    ON CONFLICT (phone) DO UPDATE SET phone = EXCLUDED.phone
+    RETURNING id, name
+),
+existing AS (
+    SELECT pc.raw_code
+    FROM promo_codes pc JOIN u ON pc.assigned_to_user_id = u.id
+    LIMIT 1
+),
+picked AS (
+    SELECT id FROM promo_codes
+    WHERE status = 'AVAILABLE' AND NOT EXISTS (SELECT 1 FROM existing)
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+),
+assigned AS (
+    UPDATE promo_codes pc
+    SET status = 'ASSIGNED', assigned_to_user_id = u.id, assigned_at = now()
+    FROM picked, u
+    WHERE pc.id = picked.id
+    RETURNING pc.raw_code
+)
+SELECT
+    u.name AS user_name,
+    COALESCE((SELECT raw_code FROM existing), (SELECT raw_code FROM assigned)) AS raw_code,
+    EXISTS (SELECT 1 FROM assigned) AS created
+FROM u
+""")
+
+
+async def claim_code(
+    db: AsyncSession, phone: str, name: str | None, email: str | None
+) -> Claim:
+    """Найти или создать пользователя и вернуть его код, выдав свободный при необходимости.
+
+    Повтор безопасен: уникальные индексы на телефон и на владельца кода не
+    дают параллельной выдаче создать второго пользователя или второй код.
+    Проигравший получает IntegrityError и повторяет — уже с кодом победителя.
+    """
+    try:
+        claim = await _claim_code(db, phone, name, email)
+    except IntegrityError:
+        await db.rollback()
+        claim = await _claim_code(db, phone, name, email)
+    if claim.created:
+        invalidate_stats()
+    if claim.raw_code is not None:
+        # Следующий запрос — /success и /qr по этому телефону
+        _claimed_codes.set(phone, ClaimedCode(claim.user_name, claim.raw_code))
+    return claim
+
+
+async def _claim_code(
+    db: AsyncSession, phone: str, name: str | None, email: str | None
+) -> Claim:
+    if db.get_bind().dialect.name == "postgresql":
+        # Одно выражение атомарно само по себе: без BEGIN/COMMIT это
+        # ровно один round trip до Postgres
+        await db.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+        row = (await db.execute(
+            _CLAIM_SQL, {"phone": phone, "name": name, "email": email}
+        )).one()
+        return Claim(row.user_name, row.raw_code, row.created)
+    return await _claim_code_generic(db, phone, name, email)
+
+
+# SQLite не умеет SKIP LOCKED — выдачи внутри процесса идут по очереди
+_sqlite_claim_lock = asyncio.Lock()
+
+
+async def _claim_code_generic(
+    db: AsyncSession, phone: str, name: str | None, email: str | None
+) -> Claim:
+    """То же для SQLite (разработка): несколько запросов в одной транзакции."""
+    async with _sqlite_claim_lock:
+        return await _claim_code_locked(db, phone, name, email)
+
+
+async def _claim_code_locked(
+    db: AsyncSession, phone: str, name: str | None, email: str | None
+) -> Claim:
+    user = await get_user_by_phone(db, phone)
+    if user is None:
+        user = User(phone=phone, name=name, email=email)
+        db.add(user)
+        await db.flush()
+    else:
+        code = await user_has_code(db, user)
+        if code is not None:
+            await db.commit()
+            return Claim(user.name, code.raw_code, False)
+
+    code = await db.scalar(
         select(PromoCode)
         .where(PromoCode.status == CodeStatus.AVAILABLE)
         .limit(1)
         .with_for_update(skip_locked=True)
     )
-    code = result.scalar_one_or_none()
-    if code is None:
-        return None
-
-    code.status = CodeStatus.ASSIGNED
-    code.assigned_to_user_id = user.id
-    code.assigned_at = datetime.now(timezone.utc)
+    if code is not None:
+        code.status = CodeStatus.ASSIGNED
+        code.assigned_to_user_id = user.id
+        code.assigned_at = datetime.now(timezone.utc)
     await db.commit()
-    await db.refresh(code)
-    return code
+    return Claim(user.name, code.raw_code if code else None, code is not None)
+
+
+# ── Импорт кодов ──────────────────────────────────────────────────────────────
+
+IMPORT_CHUNK_SIZE = 5000  # строк в одном INSERT; 4 параметра на строку
+
+
+class ImportProgress:
+    """Прогресс импорта для опроса из дашборда."""
+
+    def __init__(
+        self,
+        lines: int = 0,
+        total: int = 0,
+        on_update: Callable[["ImportProgress"], None] | None = None,
+    ):
+        self.lines = lines  # непустых строк во входе
+        self.total = total  # уникальных кодов
+        self.processed = 0
+        self.added = 0
+        self.done = False
+        self.error: str | None = None
+        self.on_update = on_update  # после каждой пачки и в конце
 
+    def updated(self) -> None:
+        if self.on_update is not None:
+            self.on_update(self)
 
-# ── Stats & Export ────────────────────────────────────────────────────────────
+    @property
+    def skipped(self) -> int:
+        return self.lines - self.added if self.done else self.processed - self.added
 
-async def get_stats(db: AsyncSession) -> dict:
-    total = await db.scalar(select(func.count()).select_from(PromoCode))
-    assigned = await db.scalar(
-        select(func.count()).select_from(PromoCode).where(PromoCode.status == CodeStatus.ASSIGNED)
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "processed": self.processed,
+            "added": self.added,
+            "skipped": self.skipped,
+            "done": self.done,
+            "error": self.error,
+        }
+
+
+class UniqueCodes:
+    """Непустые коды без дублей в исходном порядке; строки можно добавлять частями."""
+
+    def __init__(self, lines: Iterable[str] = ()):
+        self._codes: dict[str, None] = {}
+        self.lines = 0  # непустых строк, включая дубли
+        self.add(lines)
+
+    def add(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            raw = line.strip()
+            if raw:
+                self._codes[raw] = None
+                self.lines += 1
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def as_list(self) -> list[str]:
+        return list(self._codes)
+
+
+def _insert_ignoring_duplicates(db: AsyncSession) -> Insert:
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return (
+        dialect.insert(PromoCode)
+        .on_conflict_do_nothing(index_elements=[PromoCode.raw_code])
+        .returning(PromoCode.id)
     )
-    users = await db.scalar(select(func.count()).select_from(User))
-    return {
-        "total": total or 0,
-        "assigned": assigned or 0,
-        "available": (total or 0) - (assigned or 0),
-        "users": users or 0,
-    }
-
-
-async def import_codes(db: AsyncSession, lines: list[str]) -> tuple[int, int]:
-    added = skipped = 0
-    for line in lines:
-        raw = line.strip()
-        if not raw:
-            continue
-        exists = await db.scalar(select(PromoCode).where(PromoCode.raw_code == raw))
-        if exists:
-            skipped += 1
-            continue
-        db.add(PromoCode(raw_code=raw))
-        added += 1
-    if added:
+
+
+async def import_codes(
+    db: AsyncSession,
+    lines: Iterable[str] | UniqueCodes,
+    progress: ImportProgress | None = None,
+) -> tuple[int, int]:
+    """Добавить коды пачками; уже существующие пропускаются базой (ON CONFLICT)."""
+    unique = lines if isinstance(lines, UniqueCodes) else UniqueCodes(lines)
+    codes = unique.as_list()
+    progress = progress or ImportProgress()
+    progress.lines, progress.total = unique.lines, len(codes)
+
+    now = datetime.now(timezone.utc)
+    for start in range(0, len(codes), IMPORT_CHUNK_SIZE):
+        chunk = codes[start:start + IMPORT_CHUNK_SIZE]
+        result = await db.execute(
+            _insert_ignoring_duplicates(db).values([
+                {"raw_code": raw, "status": CodeStatus.AVAILABLE, "created_at": now}
+                for raw in chunk
+            ])
+        )
+        progress.added += len(result.all())
         await db.commit()
-    return added, skipped
+        progress.processed += len(chunk)
+        progress.updated()
+        invalidate_stats()
 
+    progress.done = True
+    progress.updated()
+    return progress.added, progress.skipped
 
-async def get_all_users_with_codes(db: AsyncSession) -> list[dict]:
-    result = await db.execute(
-        select(User, PromoCode)
+
+# ── Выгрузка ──────────────────────────────────────────────────────────────────
+
+EXPORT_FIELDS = ["phone", "name", "email", "code", "issued_at", "redeemed_at", "registered_at"]
+
+
+async def iter_users_with_codes(
+    db: AsyncSession, batch_size: int = 1000
+) -> AsyncIterator[list[dict]]:
+    """Участники с кодами пачками по batch_size — серверный курсор, память не растёт."""
+    result = await db.stream(
+        select(
+            User.phone, User.name, User.email, User.created_at,
+            PromoCode.raw_code, PromoCode.assigned_at, PromoCode.redeemed_at,
+        )
         .outerjoin(PromoCode, PromoCode.assigned_to_user_id == User.id)
         .order_by(User.created_at.desc())
+        .execution_options(yield_per=batch_size)
     )
-    rows = []
-    for user, code in result.all():
-        rows.append({
-            "phone": user.phone,
-            "name": user.name or "",
-            "email": user.email or "",
-            "code": code.raw_code if code else "",
-            "issued_at": code.assigned_at.strftime("%d.%m.%Y %H:%M") if code and code.assigned_at else "",
-            "registered_at": user.created_at.strftime("%d.%m.%Y %H:%M"),
-        })
-    return rows
+    async for partition in result.partitions():
+        yield [
+            {
+                "phone": row.phone,
+                "name": row.name or "",
+                "email": row.email or "",
+                "code": row.raw_code or "",
+                "issued_at": row.assigned_at.strftime("%d.%m.%Y %H:%M") if row.assigned_at else "",
+                "redeemed_at": row.redeemed_at.strftime("%d.%m.%Y %H:%M") if row.redeemed_at else "",
+                "registered_at": row.created_at.strftime("%d.%m.%Y %H:%M"),
+            }
+            for row in partition
+        ]
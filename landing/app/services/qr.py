@@ -1,10 +1,13 @@
 import io
+
 import qrcode
 from qrcode.image.styledpil import StyledPilImage
 
+# Меняется вместе с видом картинки: старые ETag у клиентов перестают совпадать
+QR_STYLE_VERSION = "1"
 
-def generate_qr_bytes(code: str) -> bytes:
-    """Генерировать QR-код и вернуть PNG как bytes."""
+
+def _make_qr(code: str) -> qrcode.QRCode:
     qr = qrcode.QRCode(
         version=None,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -13,7 +16,38 @@ def generate_qr_bytes(code: str) -> bytes:
     )
     qr.add_data(code)
     qr.make(fit=True)
-    img = qr.make_image(image_factory=StyledPilImage)
+    return qr
+
+
+def generate_qr_bytes(code: str) -> bytes:
+    """Генерировать QR-код и вернуть PNG как bytes."""
+    img = _make_qr(code).make_image(image_factory=StyledPilImage)
     buf = io.BytesIO()
     img.save(buf, format="PNG")
     return buf.getvalue()
+
+
+def generate_qr_svg(code: str) -> str:
+    """Генерировать QR-код как SVG: все модули — один path, по прямоугольнику на серию в строке.
+
+    Без растра; масштабируется без потерь, размер задаёт CSS.
+    """
+    matrix = _make_qr(code).get_matrix()  # уже с рамкой border
+    size = len(matrix)
+    parts = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            parts.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+        f'shape-rendering="crispEdges" role="img" aria-label="QR-код">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{"".join(parts)}"/></svg>'
+    )
@@ -0,0 +1,108 @@
+import math
+import struct
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from app.services.shm import SharedTable, open_shared_table
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_seconds(self) -> int:
+        return max(1, math.ceil(self.retry_after))
+
+
+class TokenBucketLimiter:
+    """Token bucket на ключ: limit запросов подряд, дальше limit за period секунд.
+
+    Вёдра лежат в LRU ограниченного размера: вытесняется самое давнее —
+    оно же почти наверняка уже полное, так что забыть его безопасно.
+    Без блокировок: вызывается только из event loop.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        period: float,
+        maxsize: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limit = limit
+        self.rate = limit / period  # токенов в секунду
+        self.maxsize = maxsize
+        self._clock = clock
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()  # ключ → [токены, время]
+
+    def hit(self, key: str) -> float:
+        """Списать токен; 0 — можно, иначе сколько секунд ждать."""
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.limit), now]
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        bucket[0], wait = self._take(bucket[0], bucket[1], now)
+        bucket[1] = now
+        return wait
+
+    def _take(self, tokens: float, updated_at: float, now: float) -> tuple[float, float]:
+        """Пополнить ведро за прошедшее время и списать токен: (токены, ожидание)."""
+        tokens = min(self.limit, tokens + (now - updated_at) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        return tokens, (1 - tokens) / self.rate
+
+    def check(self, key: str) -> None:
+        """Как hit, но бросает RateLimited."""
+        wait = self.hit(key)
+        if wait:
+            raise RateLimited(wait)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+_SHARED_BUCKET = struct.Struct("<dd")  # токены, обновлено в (time.time())
+
+
+class SharedTokenBucketLimiter(TokenBucketLimiter):
+    """Вёдра в SharedTable: лимит общий для всех воркеров узла."""
+
+    def __init__(self, limit: int, period: float, table: SharedTable):
+        super().__init__(limit, period, maxsize=table.capacity, clock=time.time)
+        self.table = table
+
+    def hit(self, key: str) -> float:
+        with self.table.lock():
+            now = self._clock()
+            raw = self.table.get(key)
+            tokens, updated_at = _SHARED_BUCKET.unpack(raw) if raw else (float(self.limit), now)
+            tokens, wait = self._take(tokens, updated_at, now)
+            # Полное ведро не отличается от отсутствующего: храним, пока не наполнится
+            full_at = now + (self.limit - tokens) / self.rate
+            self.table.set(key, _SHARED_BUCKET.pack(tokens, now), full_at)
+            return wait
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+
+def limiter_from_setting(value: str, maxsize: int, name: str) -> TokenBucketLimiter | None:
+    """«20/60» — 20 запросов за 60 секунд; пустая строка — без ограничения.
+
+    При заданном SHM_DIR вёдра общие для воркеров (таблица name).
+    """
+    if not value:
+        return None
+    limit, period = value.split("/")
+    table = open_shared_table(f"ratelimit-{name}", maxsize, key_size=48, value_size=_SHARED_BUCKET.size)
+    if table is not None:
+        return SharedTokenBucketLimiter(int(limit), float(period), table)
+    return TokenBucketLimiter(int(limit), float(period), maxsize)
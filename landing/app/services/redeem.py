@@ -0,0 +1,164 @@
+import asyncio
+import enum
+import logging
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database.models import CodeStatus, PromoCode
+from app.database.session import async_session_factory
+from app.services.bloom import BloomFilter
+from app.services.stats import invalidate_stats
+
+logger = logging.getLogger(__name__)
+
+
+# ── Погашение ─────────────────────────────────────────────────────────────────
+
+class RedeemOutcome(str, enum.Enum):
+    REDEEMED = "redeemed"
+    UNKNOWN = "unknown"                    # такого кода нет
+    NOT_ISSUED = "not_issued"              # код есть, но никому не выдан
+    ALREADY_REDEEMED = "already_redeemed"
+
+
+class Redemption(NamedTuple):
+    outcome: RedeemOutcome
+    redeemed_at: datetime | None = None
+    store: str | None = None
+
+
+async def redeem_code(
+    db: AsyncSession, raw_code: str, store: str, redeemed_at: datetime | None = None
+) -> Redemption:
+    """Погасить выданный код на кассе store.
+
+    Проверка и погашение — один условный UPDATE: из двух касс, сканирующих
+    один скриншот одновременно, код погасит ровно одна. Причину отказа
+    выясняет отдельный SELECT — он нужен только на неуспешном пути.
+    redeemed_at — время погашения на кассе без сети; по умолчанию сейчас.
+    """
+    if db.get_bind().dialect.name == "postgresql" and not db.in_transaction():
+        # Выражения без BEGIN/COMMIT — один round trip на успешном пути
+        await db.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+
+    redeemed_at = redeemed_at or datetime.now(timezone.utc)
+    redeemed = await db.scalar(
+        update(PromoCode)
+        .where(PromoCode.raw_code == raw_code, PromoCode.status == CodeStatus.ASSIGNED)
+        .values(status=CodeStatus.REDEEMED, redeemed_at=redeemed_at, redeemed_by=store)
+        .returning(PromoCode.id)
+        .execution_options(synchronize_session=False)
+    )
+    row = None
+    if redeemed is None:
+        row = (await db.execute(
+            select(PromoCode.status, PromoCode.redeemed_at, PromoCode.redeemed_by)
+            .where(PromoCode.raw_code == raw_code)
+        )).first()
+    await db.commit()
+
+    if redeemed is not None:
+        invalidate_stats()
+        return Redemption(RedeemOutcome.REDEEMED, redeemed_at, store)
+    if row is None:
+        return Redemption(RedeemOutcome.UNKNOWN)
+    if row.status == CodeStatus.REDEEMED:
+        return Redemption(RedeemOutcome.ALREADY_REDEEMED, row.redeemed_at, row.redeemed_by)
+    return Redemption(RedeemOutcome.NOT_ISSUED)
+
+
+# ── Фильтр известных кодов ────────────────────────────────────────────────────
+
+MIN_FILTER_CAPACITY = 100_000
+_LOAD_BATCH = 10_000
+
+
+class KnownCodes:
+    """Bloom-фильтр всех кодов базы: опечатки и чужие QR не доходят до UPDATE.
+
+    Коды не удаляются, поэтому обновление догружает строки с id больше
+    последнего загруженного. Когда кодов становится больше ёмкости, фильтр
+    строится заново вдвое крупнее, а старый отвечает, пока новый не готов.
+    До первой загрузки все коды считаются известными — ответ даёт база.
+
+    Фильтр отстаёт от базы: код, загруженный после последнего обновления
+    или закоммиченный позже строки с большим id, в нём не найдётся. Поэтому
+    промах — не отказ: его проверяет lookup() одним SELECT по индексу.
+    """
+
+    def __init__(self, error_rate: float):
+        self.error_rate = error_rate
+        self._bloom = BloomFilter(MIN_FILTER_CAPACITY, error_rate)
+        self._last_id = 0
+        self._loaded = False
+        self._task: asyncio.Task | None = None
+
+    def __contains__(self, raw_code: str) -> bool:
+        return not self._loaded or raw_code in self._bloom
+
+    def __len__(self) -> int:
+        return len(self._bloom)
+
+    async def lookup(self, db: AsyncSession, raw_code: str) -> bool:
+        """Проверить промах фильтра по базе; найденный код добавить в фильтр."""
+        found = await db.scalar(
+            select(PromoCode.id).where(PromoCode.raw_code == raw_code)
+        )
+        if found is None:
+            return False
+        self._bloom.add(raw_code)
+        return True
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """Догрузить новые коды; вернуть, сколько добавлено."""
+        pending = await db.scalar(
+            select(func.count(PromoCode.id)).where(PromoCode.id > self._last_id)
+        )
+        bloom, last_id = self._bloom, self._last_id
+        if len(bloom) + pending > bloom.capacity:
+            # Переполненный фильтр ошибается чаще заданного — строим заново
+            capacity = max(MIN_FILTER_CAPACITY, 2 * (len(bloom) + pending))
+            bloom, last_id = BloomFilter(capacity, self.error_rate), 0
+
+        added = 0
+        result = await db.stream(
+            select(PromoCode.id, PromoCode.raw_code)
+            .where(PromoCode.id > last_id)
+            .order_by(PromoCode.id)
+            .execution_options(yield_per=_LOAD_BATCH)
+        )
+        async for partition in result.partitions():
+            for row in partition:
+                bloom.add(row.raw_code)
+            last_id = partition[-1].id
+            added += len(partition)
+
+        self._bloom, self._last_id, self._loaded = bloom, last_id, True
+        return added
+
+    async def start(self, interval: float) -> None:
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            try:
+                async with async_session_factory() as db:
+                    added = await self.refresh(db)
+                if added:
+                    logger.info("Known codes: %d added, %d total", added, len(self))
+            except Exception:
+                logger.exception("Known codes refresh failed")
+            await asyncio.sleep(interval)
+
+
+known_codes = KnownCodes(settings.POS_BLOOM_ERROR_RATE)
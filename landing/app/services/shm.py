@@ -0,0 +1,241 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Generic, TypeVar
+
+from app.config import settings
+from app.services.cache import TTLCache
+
+V = TypeVar("V")
+
+_MAGIC = b"VSNSHM01"
+_HEADER = struct.Struct("<8sIII")  # magic, ёмкость, размер ключа, размер значения
+_SLOT = struct.Struct("<IBBHd")    # seq, состояние, длина ключа, длина значения, истекает в
+_SEQ = struct.Struct("<I")
+
+_EMPTY, _USED, _DELETED = 0, 1, 2
+
+PROBE_LIMIT = 32    # слотов, просматриваемых от позиции хеша
+_SPIN_LIMIT = 1000  # попыток прочитать слот, который сейчас пишут
+
+
+class SharedTable:
+    """Хеш-таблица фиксированного размера в mmap-файле, общая для воркеров узла.
+
+    Открытая адресация с ограниченным окном проб: когда в окне нет места,
+    вытесняется запись, истекающая раньше других, так что память не растёт.
+
+    Чтение без блокировок: у каждого слота seqlock-счётчик. Писатель делает
+    его нечётным на время записи и снова чётным после; читатель копирует слот
+    и повторяет, если счётчик был нечётным или изменился. Писатели
+    сериализуются через flock на файл; lock() можно вкладывать, чтобы
+    прочитать и записать атомарно.
+
+    Сроки — time.time(): монотонные часы не обязаны совпадать у процессов.
+    """
+
+    def __init__(self, path: Path, capacity: int, key_size: int, value_size: int):
+        self.capacity = capacity
+        self.key_size = key_size
+        self.value_size = value_size
+        self.slot_size = _SLOT.size + key_size + value_size
+        size = _HEADER.size + capacity * self.slot_size
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock_depth = 0
+        with self.lock():
+            header = os.pread(self._fd, _HEADER.size, 0)
+            if os.fstat(self._fd).st_size != size or header[:len(_MAGIC)] != _MAGIC:
+                # Новый файл: нули — это пустые слоты
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, capacity, key_size, value_size), 0)
+        self._mm = mmap.mmap(self._fd, size)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Исключительная запись для всех процессов; повторный вход разрешён."""
+        if self._lock_depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def get(self, key: str) -> bytes | None:
+        raw_key = key.encode()
+        if len(raw_key) > self.key_size:
+            return None
+        now = time.time()
+        for index in self._probe(raw_key):
+            slot = self._read(index)
+            if slot is None:
+                continue  # слот завис в записи (писатель упал) — считаем промахом
+            state, slot_key, value, expires_at = slot
+            if state == _EMPTY:
+                return None
+            if state == _USED and slot_key == raw_key:
+                return value if expires_at > now else None
+        return None
+
+    def set(self, key: str, value: bytes, expires_at: float) -> bool:
+        """Записать значение; False — ключ или значение не помещаются в слот."""
+        raw_key = key.encode()
+        if len(raw_key) > self.key_size or len(value) > self.value_size:
+            return False
+        with self.lock():
+            self._write(self._slot_for(raw_key), _USED, raw_key, value, expires_at)
+        return True
+
+    def pop(self, key: str) -> None:
+        raw_key = key.encode()
+        with self.lock():
+            index = self._find(raw_key)
+            if index is not None:
+                self._write(index, _DELETED, b"", b"", 0.0)
+
+    def clear(self) -> None:
+        with self.lock():
+            for index in range(self.capacity):
+                self._write(index, _EMPTY, b"", b"", 0.0)
+
+    def __len__(self) -> int:
+        now = time.time()
+        return sum(
+            1 for index in range(self.capacity)
+            if (slot := self._read(index)) and slot[0] == _USED and slot[3] > now
+        )
+
+    def _probe(self, raw_key: bytes) -> Iterator[int]:
+        # hash() у процессов разный — нужен стабильный хеш
+        start = int.from_bytes(hashlib.blake2b(raw_key, digest_size=8).digest(), "little")
+        for step in range(min(PROBE_LIMIT, self.capacity)):
+            yield (start + step) % self.capacity
+
+    def _offset(self, index: int) -> int:
+        return _HEADER.size + index * self.slot_size
+
+    def _read(self, index: int) -> tuple[int, bytes, bytes, float] | None:
+        offset = self._offset(index)
+        for _ in range(_SPIN_LIMIT):
+            raw = self._mm[offset:offset + self.slot_size]
+            seq, state, key_len, value_len, expires_at = _SLOT.unpack_from(raw)
+            if seq & 1 or _SEQ.unpack_from(self._mm, offset)[0] != seq:
+                continue
+            key_start = _SLOT.size
+            value_start = key_start + self.key_size
+            return (
+                state,
+                raw[key_start:key_start + key_len],
+                raw[value_start:value_start + value_len],
+                expires_at,
+            )
+        return None
+
+    def _write(self, index: int, state: int, key: bytes, value: bytes, expires_at: float) -> None:
+        offset = self._offset(index)
+        seq = _SEQ.unpack_from(self._mm, offset)[0]
+        # Нечётный — запись идёт; нечётным он остаётся, только если писатель упал
+        seq = (seq + 2 if seq & 1 else seq + 1) & 0xFFFFFFFF
+        _SEQ.pack_into(self._mm, offset, seq)
+        _SLOT.pack_into(self._mm, offset, seq, state, len(key), len(value), expires_at)
+        key_start = offset + _SLOT.size
+        self._mm[key_start:key_start + len(key)] = key
+        value_start = key_start + self.key_size
+        self._mm[value_start:value_start + len(value)] = value
+        _SEQ.pack_into(self._mm, offset, (seq + 1) & 0xFFFFFFFF)  # снова чётный
+
+    def _find(self, raw_key: bytes) -> int | None:
+        for index in self._probe(raw_key):
+            state, slot_key, _, _ = self._read(index) or (_USED, b"", b"", 0.0)
+            if state == _EMPTY:
+                return None
+            if state == _USED and slot_key == raw_key:
+                return index
+        return None
+
+    def _slot_for(self, raw_key: bytes) -> int:
+        """Слот для записи (под блокировкой): свой, свободный или вытесняемый."""
+        now = time.time()
+        reusable = None
+        oldest, oldest_expires = None, float("inf")
+        for index in self._probe(raw_key):
+            state, slot_key, _, expires_at = self._read(index) or (_DELETED, b"", b"", 0.0)
+            if state == _USED and slot_key == raw_key:
+                return index
+            if state == _EMPTY:
+                return reusable if reusable is not None else index
+            if reusable is None and (state == _DELETED or expires_at <= now):
+                reusable = index
+            if expires_at < oldest_expires:
+                oldest, oldest_expires = index, expires_at
+        return reusable if reusable is not None else oldest
+
+
+def open_shared_table(name: str, capacity: int, key_size: int, value_size: int) -> SharedTable | None:
+    """Общая таблица в SHM_DIR; None — SHM_DIR не задан, кеши остаются в процессе."""
+    if not settings.SHM_DIR or capacity <= 0:
+        return None
+    directory = Path(settings.SHM_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Раскладка в имени: после смены размеров старый файл не переиспользуется
+    path = directory / f"{name}.{capacity}x{key_size}x{value_size}.tbl"
+    return SharedTable(path, capacity, key_size, value_size)
+
+
+class SharedTTLCache(Generic[V]):
+    """TTLCache поверх SharedTable: тот же интерфейс, значения через dumps/loads."""
+
+    def __init__(
+        self,
+        table: SharedTable,
+        ttl: float,
+        dumps: Callable[[V], bytes],
+        loads: Callable[[bytes], V],
+    ):
+        self.table = table
+        self.ttl = ttl
+        self._dumps = dumps
+        self._loads = loads
+
+    def get(self, key: str) -> V | None:
+        raw = self.table.get(key)
+        return self._loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: V) -> None:
+        # Не влезло в слот — просто не кешируем
+        self.table.set(key, self._dumps(value), time.time() + self.ttl)
+
+    def pop(self, key: str) -> None:
+        self.table.pop(key)
+
+    def clear(self) -> None:
+        self.table.clear()
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+
+def ttl_cache(
+    name: str,
+    maxsize: int,
+    ttl: float,
+    key_size: int,
+    value_size: int,
+    dumps: Callable[[V], bytes],
+    loads: Callable[[bytes], V],
+) -> TTLCache[str, V] | SharedTTLCache[V]:
+    """Кеш, общий для воркеров при заданном SHM_DIR, иначе обычный TTLCache."""
+    table = open_shared_table(name, maxsize, key_size, value_size)
+    if table is None:
+        return TTLCache(maxsize, ttl)
+    return SharedTTLCache(table, ttl, dumps, loads)
@@ -0,0 +1,42 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Одновременные вызовы с одним ключом выполняются один раз.
+
+    Первый вызов работает, остальные ждут его результат (или исключение).
+    Ключ забывается сразу по завершении — это не кеш. Только один процесс.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future[T]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is not None:
+            # shield: отмена ожидающего не отменяет работу первого
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # ожидающих может не быть — не ругаться в лог
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
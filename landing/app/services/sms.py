@@ -1,22 +1,198 @@
+import asyncio
+import logging
+
 import httpx
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+Message = tuple[str, str]  # (телефон, текст)
+
+
+class SmsTemporaryError(Exception):
+    """Шлюз не принял пачку, но повтор может пройти."""
+
+
+class SmscBackend:
+    """Отправка через SMSC.ru одним keep-alive клиентом на процесс."""
 
-async def send_otp_sms(phone: str, code: str) -> bool:
-    """Отправить OTP-код через SMSC.ru. Возвращает True при успехе."""
     url = "https://smsc.ru/sys/send.php"
-    params = {
-        "login": settings.SMSC_LOGIN,
-        "psw": settings.SMSC_PASSWORD,
-        "phones": phone,
-        "mes": f"Ваш код подтверждения UPPETIT: {code}",
-        "fmt": 3,         # JSON-ответ
-        "charset": "utf-8",
-    }
-    try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.get(url, params=params)
+    RETRY_ERROR_CODES = {4, 9}  # IP временно заблокирован, слишком частые запросы
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+
+    async def open(self) -> None:
+        self._client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=settings.SMS_WORKERS),
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def send_batch(self, messages: list[Message]) -> bool:
+        """Одна пачка — один запрос: общий текст через phones, разные — через list."""
+        params = {
+            "login": settings.SMSC_LOGIN,
+            "psw": settings.SMSC_PASSWORD,
+            "sender": settings.SMSC_SENDER,
+            "fmt": 3,         # JSON-ответ
+            "charset": "utf-8",
+        }
+        texts = {text for _, text in messages}
+        if len(texts) == 1:
+            params["phones"] = ",".join(phone for phone, _ in messages)
+            params["mes"] = texts.pop()
+        else:
+            # Перевод строки внутри текста SMSC ждёт как \n
+            params["list"] = "\n".join(
+                phone + ":" + text.replace("\n", "\\n") for phone, text in messages
+            )
+
+        try:
+            response = await self._client.post(self.url, data=params)
+        except httpx.TransportError as e:
+            raise SmsTemporaryError(str(e)) from e
+        if response.status_code >= 500:
+            raise SmsTemporaryError(f"HTTP {response.status_code}")
+        try:
             data = response.json()
-            return "error" not in data
-    except Exception:
+        except ValueError:
+            return False
+        if "error" not in data:
+            return True
+        if data.get("error_code") in self.RETRY_ERROR_CODES:
+            raise SmsTemporaryError(data["error"])
+        logger.warning("SMSC rejected %d messages: %s", len(messages), data["error"])
         return False
+
+
+class ConsoleBackend:
+    """Заглушка для разработки и тестов: пишет SMS в лог и хранит их в outbox."""
+
+    def __init__(self):
+        self.outbox: list[Message] = []
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def send_batch(self, messages: list[Message]) -> bool:
+        self.outbox.extend(messages)
+        for phone, text in messages:
+            logger.warning("SMS to %s: %s", phone, text)
+        return True
+
+
+SMS_BACKENDS = {
+    "smsc": SmscBackend,
+    "console": ConsoleBackend,
+}
+
+
+class SmsDispatcher:
+    """Очередь SMS с фоновыми отправщиками.
+
+    Обработчик запроса только кладёт сообщение в ограниченную очередь.
+    Отправщики забирают до batch_size сообщений, подождав попутчиков не
+    дольше batch_wait секунд, и отправляют их одним запросом; временные
+    ошибки шлюза повторяются с растущей паузой.
+    """
+
+    def __init__(
+        self,
+        backend,
+        queue_size: int,
+        batch_size: int,
+        batch_wait: float,
+        max_attempts: int,
+        workers: int,
+    ):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_attempts = max_attempts
+        self.workers = workers
+        self._queue: asyncio.Queue[Message] = asyncio.Queue(maxsize=queue_size)
+        self._tasks: list[asyncio.Task] = []
+
+    def submit(self, phone: str, text: str) -> bool:
+        """Поставить SMS в очередь; False — очередь переполнена."""
+        try:
+            self._queue.put_nowait((phone, text))
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def start(self) -> None:
+        await self.backend.open()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 5) -> None:
+        """Дослать очередь (не дольше timeout секунд) и закрыть соединения."""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("SMS queue not drained, dropping %d messages", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.backend.close()
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._send(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _next_batch(self) -> list[Message]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _send(self, batch: list[Message]) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self.backend.send_batch(batch)
+                return
+            except SmsTemporaryError as e:
+                if attempt == self.max_attempts:
+                    logger.error("SMS batch of %d dropped: %s", len(batch), e)
+                    return
+                await asyncio.sleep(min(2 ** (attempt - 1), 30))
+            except Exception:
+                logger.exception("SMS batch of %d failed", len(batch))
+                return
+
+
+sms_dispatcher = SmsDispatcher(
+    SMS_BACKENDS[settings.SMS_BACKEND](),
+    queue_size=settings.SMS_QUEUE_SIZE,
+    batch_size=settings.SMS_BATCH_SIZE,
+    batch_wait=settings.SMS_BATCH_WAIT,
+    max_attempts=settings.SMS_MAX_ATTEMPTS,
+    workers=settings.SMS_WORKERS,
+)
+
+
+def queue_otp_sms(phone: str, code: str) -> bool:
+    """Поставить SMS с OTP-кодом в очередь отправки. False — очередь переполнена."""
+    return sms_dispatcher.submit(phone, f"Ваш код подтверждения UPPETIT: {code}")
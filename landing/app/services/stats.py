@@ -0,0 +1,145 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database.models import CodeStatus, PromoCode, User
+from app.database.session import async_session_factory
+from app.services.shm import ttl_cache
+
+
+# ── Счётчики ──────────────────────────────────────────────────────────────────
+
+# Один проход по promo_codes и подзапрос по users — один round trip
+_STATS_QUERY = select(
+    func.count(PromoCode.id).label("total"),
+    func.count(PromoCode.id).filter(PromoCode.status != CodeStatus.AVAILABLE).label("assigned"),
+    func.count(PromoCode.id).filter(PromoCode.status == CodeStatus.REDEEMED).label("redeemed"),
+    select(func.count(User.id)).scalar_subquery().label("users"),
+)
+
+_stats_cache = ttl_cache(
+    "stats",
+    1,
+    settings.STATS_CACHE_TTL,
+    key_size=8,
+    value_size=256,
+    dumps=lambda stats: json.dumps(stats).encode(),
+    loads=json.loads,
+)
+_refresh_lock = asyncio.Lock()
+
+
+async def get_stats(db: AsyncSession) -> dict:
+    """Счётчики дашборда; не старше STATS_CACHE_TTL секунд."""
+    stats = _stats_cache.get("stats")
+    if stats is not None:
+        return stats
+    # Несколько вкладок после истечения кеша — один запрос на всех
+    async with _refresh_lock:
+        stats = _stats_cache.get("stats")
+        if stats is None:
+            stats = await _query_stats(db)
+            _stats_cache.set("stats", stats)
+        return stats
+
+
+def invalidate_stats() -> None:
+    """Сбросить кеш после импорта или выдачи кода и разбудить живые дашборды."""
+    _stats_cache.pop("stats")
+    stats_hub.notify()
+
+
+async def _query_stats(db: AsyncSession) -> dict:
+    row = (await db.execute(_STATS_QUERY)).one()
+    return {
+        "total": row.total,
+        "assigned": row.assigned,
+        "available": row.total - row.assigned,
+        "redeemed": row.redeemed,
+        "users": row.users,
+    }
+
+
+# ── Живой дашборд (SSE) ───────────────────────────────────────────────────────
+
+class StatsHub:
+    """Раздаёт счётчики всем открытым дашбордам.
+
+    Базу опрашивает одна задача на процесс и только пока есть подписчики;
+    клиент получает новое значение, лишь когда оно изменилось.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._subscribers: set[asyncio.Queue[dict]] = set()
+        self._last: dict | None = None
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue[dict]]:
+        queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=1)
+        if self._last is not None:
+            queue.put_nowait(self._last)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def notify(self) -> None:
+        """Обновить подписчиков сейчас, не дожидаясь интервала."""
+        self._wake.set()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            self._wake.clear()
+            try:
+                async with async_session_factory() as db:
+                    stats = await get_stats(db)
+            except Exception:
+                stats = None  # база недоступна — попробуем на следующем шаге
+            if stats is not None and stats != self._last:
+                self._last = stats
+                for queue in self._subscribers:
+                    _put_latest(queue, stats)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+        self._last = None  # без подписчиков значение устаревает
+
+
+def _put_latest(queue: asyncio.Queue[dict], stats: dict) -> None:
+    """Медленному клиенту нужны последние цифры, а не очередь старых."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(stats)
+
+
+stats_hub = StatsHub(settings.STATS_PUSH_INTERVAL)
+
+
+async def stats_events(is_disconnected, keepalive: float = 15) -> AsyncIterator[bytes]:
+    """Поток text/event-stream: событие на каждое изменение и keepalive-комментарии."""
+    async with stats_hub.subscribe() as queue:
+        while not await is_disconnected():
+            try:
+                stats = await asyncio.wait_for(queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield f"data: {json.dumps(stats)}\n\n".encode()
@@ -0,0 +1,291 @@
+"""
+Correctness check for the shared-memory table behind SHM_DIR.
+
+``app.services.shm.SharedTable`` holds OTP codes, rate-limit buckets, the
+claim cache and upload-job progress for every uvicorn worker on the node.
+This script exercises it directly and exits with code 1 if any check fails:
+
+- oversized keys and values are refused with ``False``
+- ``pop`` followed by ``set`` does not leave a stale duplicate behind a
+  tombstone
+- a full probe window reuses expired slots first, then evicts the entry
+  that expires soonest
+- nested ``lock()`` does not deadlock
+- writes from one process are visible in another, and read-modify-write
+  under ``lock()`` is atomic across processes
+- a slot caught mid-write (odd seqlock counter) reads as a miss, and a
+  slot left odd by a dead writer is recovered by the next write
+- concurrent readers never see a torn slot while writers rewrite it,
+  reporting operations per second; this needs several CPUs to actually
+  interleave readers and writers
+
+Each process opens the table file itself, as uvicorn workers do: flock
+locks belong to the open file, so a table inherited through fork would
+share its lock with the parent.
+
+Usage (from landing/):
+    python -m benchmarks.check_shm [--processes 4] [--ops 40000]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from app.services.shm import _SEQ, _SLOT, PROBE_LIMIT, SharedTable
+
+KEY_SIZE = 16
+VALUE_SIZE = 64
+STRESS_KEYS = 4  # few hot keys: readers and writers meet on the same slots
+
+_failures: list[str] = []
+
+
+def check(condition: bool, message: str) -> None:
+    print(f"  {'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        _failures.append(message)
+
+
+def open_table(path: Path, capacity: int) -> SharedTable:
+    return SharedTable(path, capacity, KEY_SIZE, VALUE_SIZE)
+
+
+# ── Single process ────────────────────────────────────────────────────────────
+
+def check_limits(directory: Path) -> None:
+    print("size limits")
+    table = open_table(directory / "limits.tbl", 16)
+    later = time.time() + 60
+    check(table.set("k" * KEY_SIZE, b"v" * VALUE_SIZE, later), "key and value of exactly the slot size fit")
+    check(not table.set("k" * (KEY_SIZE + 1), b"v", later), "too long key returns False")
+    check(not table.set("k", b"v" * (VALUE_SIZE + 1), later), "too long value returns False")
+    check(not table.set("ключ-в-юникоде", b"v", later), "key length is counted in UTF-8 bytes")
+    check(table.get("k" * (KEY_SIZE + 1)) is None, "too long key reads as a miss")
+    check(len(table) == 1, "refused writes leave nothing behind")
+
+
+def check_pop_and_reset(directory: Path) -> None:
+    print("pop and re-set")
+    # Four slots: every key probes the whole table, so all keys collide
+    table = open_table(directory / "pop.tbl", 4)
+    later = time.time() + 60
+    table.set("a", b"1", later)
+    table.set("b", b"2", later)
+    table.pop("a")
+    check(table.get("a") is None, "popped key is gone")
+    check(table.get("b") == b"2", "neighbour survives the tombstone")
+
+    table.set("b", b"3", later)
+    check(len(table) == 1, "re-setting a key past a tombstone updates it in place")
+    table.pop("b")
+    check(table.get("b") is None, "no stale copy of the key is left after pop")
+
+    table.set("a", b"4", later)
+    check(table.get("a") == b"4", "key set again after pop reads the new value")
+    table.set("a", b"5", later)
+    check(table.get("a") == b"5" and len(table) == 1, "and is updated in place afterwards")
+
+    table.clear()
+    check(len(table) == 0 and table.get("a") is None, "clear empties the table")
+
+
+def check_eviction(directory: Path) -> None:
+    print("probe-window eviction")
+    capacity = 8  # smaller than PROBE_LIMIT: the window is the whole table
+    assert capacity < PROBE_LIMIT
+    table = open_table(directory / "evict.tbl", capacity)
+    now = time.time()
+
+    for i in range(capacity):
+        table.set(f"k{i}", b"x", now + 100 + i)
+    table.set("new", b"x", now + 1000)
+    check(table.get("new") == b"x", "a full window still accepts a new key")
+    check(table.get("k0") is None, "the entry that expires first is evicted")
+    check(all(table.get(f"k{i}") == b"x" for i in range(1, capacity)), "all other entries are kept")
+
+    table.clear()
+    for i in range(capacity):
+        table.set(f"k{i}", b"x", now + 100 + i)
+    table.set("k5", b"x", now - 1)  # expired in place
+    table.set("new", b"x", now + 1000)
+    check(table.get("new") == b"x", "new key is stored")
+    check(
+        all(table.get(f"k{i}") == b"x" for i in range(capacity) if i != 5),
+        "the expired slot is reused and no live entry is evicted",
+    )
+    check(len(table) == capacity, "the table stays at capacity")
+
+    table.clear()
+    for i in range(capacity * 4):
+        table.set(f"k{i}", b"x", now + 100 + i)
+    check(len(table) == capacity, "memory does not grow past capacity")
+    check(
+        all(table.get(f"k{i}") == b"x" for i in range(capacity * 3, capacity * 4)),
+        "the latest-expiring entries win",
+    )
+
+
+def check_nested_lock(directory: Path) -> None:
+    print("nested lock")
+    table = open_table(directory / "nested.tbl", 16)
+    with table.lock():
+        with table.lock():
+            table.set("k", b"v", time.time() + 60)
+        check(table.get("k") == b"v", "set inside a nested lock()")
+    # A second handle on the same file must be able to take the lock now
+    other = open_table(directory / "nested.tbl", 16)
+    with other.lock():
+        check(other.get("k") == b"v", "lock is released after the outer block")
+
+
+def check_interrupted_write(directory: Path) -> None:
+    print("slot caught mid-write")
+    # The state a reader sees while a writer is between its two seq updates,
+    # or forever if the writer died there: odd seq, new header, old bytes
+    table = open_table(directory / "torn.tbl", 1)
+    table.set("k", b"a" * 8, time.time() + 60)
+    offset = table._offset(0)
+    seq = _SEQ.unpack_from(table._mm, offset)[0]
+    _SLOT.pack_into(table._mm, offset, seq + 1, 1, 1, 16, time.time() + 60)
+    check(table.get("k") is None, "a slot with an odd seq reads as a miss, not as torn data")
+
+    _SEQ.pack_into(table._mm, offset, seq + 2)
+    check(table.get("k") == b"a" * 8 + bytes(8), "an even seq is read as is")
+
+    _SEQ.pack_into(table._mm, offset, seq + 3)
+    table.set("k", b"b" * 8, time.time() + 60)
+    check(table.get("k") == b"b" * 8, "the next write recovers a slot left odd by a dead writer")
+
+
+# ── Several processes ─────────────────────────────────────────────────────────
+
+def _writer(path: str, capacity: int, keys: list[str]) -> None:
+    table = open_table(Path(path), capacity)
+    for key in keys:
+        table.set(key, key.encode(), time.time() + 60)
+
+
+def _expect(path: str, capacity: int, key: str, value: bytes) -> None:
+    table = open_table(Path(path), capacity)
+    sys.exit(0 if table.get(key) == value else 1)
+
+
+def _counter(path: str, capacity: int, increments: int) -> None:
+    table = open_table(Path(path), capacity)
+    for _ in range(increments):
+        with table.lock():
+            value = int(table.get("counter") or b"0")
+            table.set("counter", str(value + 1).encode(), time.time() + 60)
+
+
+def _value_for(key: int, version: int) -> bytes:
+    # Length and every byte depend on the version: a torn copy mixes them up
+    length = 8 + version % (VALUE_SIZE - 8)
+    return bytes([version % 251]) * length
+
+
+def _stress(path: str, capacity: int, worker: int, ops: int, results) -> None:
+    table = open_table(Path(path), capacity)
+    torn = 0
+    for i in range(ops):
+        key = (i * 7 + worker) % STRESS_KEYS
+        if i % 4 == worker % 4:
+            table.set(f"s{key}", _value_for(key, i), time.time() + 60)
+            continue
+        value = table.get(f"s{key}")
+        if value is None:
+            continue
+        length = len(value)
+        if length < 8 or value.count(value[:1]) != length:
+            torn += 1
+    results.put(torn)
+
+
+def check_processes(directory: Path, processes: int, ops: int) -> None:
+    context = multiprocessing.get_context("spawn")  # own file handle per process
+    print("cross-process")
+
+    path = directory / "cross.tbl"
+    table = open_table(path, 256)
+    children = [
+        context.Process(target=_writer, args=(str(path), 256, [f"p{n}-{i}" for i in range(20)]))
+        for n in range(processes)
+    ]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+    check(
+        all(table.get(f"p{n}-{i}") == f"p{n}-{i}".encode() for n in range(processes) for i in range(20)),
+        "writes from other processes are visible here",
+    )
+    table.set("from-parent", b"1", time.time() + 60)
+    reader = context.Process(target=_expect, args=(str(path), 256, "from-parent", b"1"))
+    reader.start()
+    reader.join()
+    check(reader.exitcode == 0, "writes from here are visible in a process opened later")
+
+    path = directory / "counter.tbl"
+    open_table(path, 16)
+    increments = 500
+    children = [
+        context.Process(target=_counter, args=(str(path), 16, increments))
+        for _ in range(processes)
+    ]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+    total = int(open_table(path, 16).get("counter"))
+    check(
+        total == processes * increments,
+        f"read-modify-write under lock() is atomic ({total} of {processes * increments})",
+    )
+
+    print("seqlock under load")
+    path = directory / "stress.tbl"
+    open_table(path, STRESS_KEYS * 2)
+    results = context.Queue()
+    children = [
+        context.Process(target=_stress, args=(str(path), STRESS_KEYS * 2, n, ops, results))
+        for n in range(processes)
+    ]
+    started = time.perf_counter()
+    for child in children:
+        child.start()
+    torn = sum(results.get() for _ in children)
+    for child in children:
+        child.join()
+    elapsed = time.perf_counter() - started
+    total_ops = processes * ops
+    check(torn == 0, f"no torn reads in {total_ops} mixed operations ({torn} torn)")
+    print(f"  {total_ops / elapsed:,.0f} ops/s across {processes} processes on {os.cpu_count()} CPU(s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=40000, help="Operations per process under load")
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmpdir:
+        directory = Path(tmpdir)
+        check_limits(directory)
+        check_pop_and_reset(directory)
+        check_eviction(directory)
+        check_nested_lock(directory)
+        check_interrupted_write(directory)
+        check_processes(directory, args.processes, args.ops)
+
+    if _failures:
+        print(f"{len(_failures)} check(s) failed")
+        sys.exit(1)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ set -e
 SERVER="root@94.198.218.56"
 REMOTE_DIR="/opt/vesnaidet"
 
+echo "==> Собираем статику..."
+python3 tools/build_assets.py
+
 echo "==> Копируем файлы на сервер..."
 rsync -avz --exclude='.git' --exclude='__pycache__' --exclude='*.pyc' \
   --exclude='vesnaidet.db' \
@@ -23,7 +26,10 @@ ssh "$SERVER" << 'ENDSSH'
 
   # Docker
   docker compose pull || true
-  docker compose up -d --build
+  docker compose build
+  # Схема обновляется до перезапуска сервисов; ошибка миграции останавливает деплой
+  docker compose run --rm migrate
+  docker compose up -d
 
   echo "==> Готово! Сайт доступен на http://vesnaidet.ru"
 ENDSSH
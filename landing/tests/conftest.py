@@ -0,0 +1,47 @@
+"""Окружение тестов: настройки читаются при импорте app, поэтому задаются до него."""
+
+import os
+import tempfile
+from datetime import date, timedelta
+
+import pytest
+
+_today = date.today()
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='landing_tests_')}/test.db",
+    "SECRET_KEY": "test-secret",
+    "SMS_BACKEND": "console",
+    "PROMO_START": (_today - timedelta(days=1)).isoformat(),
+    "PROMO_END": (_today + timedelta(days=30)).isoformat(),
+    "SHM_DIR": "",
+    "DB_CREATE_SCHEMA": "false",
+})
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def schema():
+    """Схема создаётся один раз. Пока фикстура жива, тесты с базой идут в одном
+    event loop, как в воркере: модульные asyncio.Lock привязаны к loop."""
+    from app.database.session import engine, ensure_schema
+
+    await ensure_schema()
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db(schema):
+    """Сессия SQLite; после теста таблицы снова пустые."""
+    from app.database.models import Base
+    from app.database.session import async_session_factory, engine
+
+    async with async_session_factory() as session:
+        yield session
+    async with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
@@ -0,0 +1,24 @@
+from app.services.bloom import BloomFilter
+
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter(1000, 0.01)
+    codes = [f"CODE{i:05d}" for i in range(1000)]
+    for code in codes:
+        bloom.add(code)
+    assert all(code in bloom for code in codes)
+    assert len(bloom) == 1000
+
+
+def test_false_positive_rate_is_near_target():
+    bloom = BloomFilter(10_000, 0.01)
+    for i in range(10_000):
+        bloom.add(f"IN{i}")
+    false_positives = sum(f"OUT{i}" in bloom for i in range(10_000))
+    assert false_positives < 10_000 * 0.01 * 2
+
+
+def test_empty_filter_knows_nothing():
+    bloom = BloomFilter(100, 0.001)
+    assert "anything" not in bloom
+    assert bloom.size >= 8 and bloom.hashes >= 1
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database.models import CodeStatus, PromoCode, User
+from app.database.session import async_session_factory
+from app.routers import public
+from app.services import promo as promo_svc
+from app.services.otp import otp_store
+from app.services.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_codes(db, *codes: str) -> None:
+    db.add_all(PromoCode(raw_code=code) for code in codes)
+    await db.commit()
+
+
+async def claim(phone: str) -> promo_svc.Claim:
+    async with async_session_factory() as session:
+        return await promo_svc.claim_code(session, phone, "Имя", None)
+
+
+async def test_claim_is_idempotent(db):
+    await add_codes(db, "A1", "A2")
+    first = await claim("+79990000001")
+    assert first.raw_code in ("A1", "A2") and first.created
+    again = await claim("+79990000001")
+    assert again == first._replace(created=False)
+
+
+async def test_parallel_claims_get_distinct_codes(db):
+    await add_codes(db, "B1", "B2", "B3")
+    claims = await asyncio.gather(*(claim(f"+7999000010{i}") for i in range(4)))
+    issued = [c.raw_code for c in claims if c.raw_code is not None]
+    assert sorted(issued) == ["B1", "B2", "B3"]
+    assert sum(c.raw_code is None for c in claims) == 1
+
+
+async def test_parallel_claims_for_one_phone_get_one_code(db):
+    await add_codes(db, "C1", "C2")
+    claims = await asyncio.gather(*(claim("+79990000201") for _ in range(3)))
+    assert len({c.raw_code for c in claims}) == 1
+    assert sum(c.created for c in claims) == 1
+    assert await db.scalar(select(func.count(User.id))) == 1
+    assigned = await db.scalar(
+        select(func.count(PromoCode.id)).where(PromoCode.status == CodeStatus.ASSIGNED)
+    )
+    assert assigned == 1
+
+
+async def test_single_flight_runs_once():
+    flight: SingleFlight[int] = SingleFlight()
+    calls = 0
+
+    async def work() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+    assert results == [42] * 5 and calls == 1
+    assert len(flight) == 0
+
+
+async def test_repeated_verify_returns_same_redirect(db):
+    await add_codes(db, "D1")
+    phone = "+79990000301"
+    code = otp_store.issue(phone)
+    pending = {"phone": phone, "name": "Имя", "email": ""}
+
+    async def verify():
+        # Без SingleFlight — как два воркера: общий только _verified_codes
+        async with async_session_factory() as session:
+            return await public._verify_and_claim(session, pending, code)
+
+    first, second = await asyncio.gather(verify(), verify())
+    assert first.token is not None and first == second
+    assert await verify() == first
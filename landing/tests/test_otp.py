@@ -0,0 +1,72 @@
+import pytest
+
+from app.services.otp import OTPCheck, OTPStore
+
+PHONE = "+79990000000"
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def store(clock):
+    return OTPStore(ttl=300, resend_after=60, max_attempts=3, length=4, clock=clock)
+
+
+def test_code_is_single_use(store):
+    code = store.issue(PHONE)
+    assert len(code) == 4 and code.isdigit()
+    assert store.check(PHONE, code) is OTPCheck.OK
+    assert store.check(PHONE, code) is OTPCheck.EXPIRED
+
+
+def test_wrong_codes_use_up_attempts(store):
+    code = store.issue(PHONE)
+    wrong = "0000" if code != "0000" else "1111"
+    assert store.check(PHONE, wrong) is OTPCheck.WRONG
+    assert store.attempts_left(PHONE) == 2
+    assert store.check(PHONE, wrong) is OTPCheck.WRONG
+    assert store.check(PHONE, wrong) is OTPCheck.LOCKED
+    # Верный код после блокировки уже не принимается
+    assert store.check(PHONE, code) is OTPCheck.LOCKED
+
+
+def test_resend_waits_for_pause(store, clock):
+    first = store.issue(PHONE)
+    assert store.issue(PHONE) is None
+    clock.now += 30
+    assert store.resend_wait(PHONE) == 30
+
+    clock.now += 30
+    second = store.issue(PHONE)
+    assert second is not None
+    assert store.attempts_left(PHONE) == 3
+    if second != first:
+        assert store.check(PHONE, first) is OTPCheck.WRONG
+
+
+def test_expired_codes_are_swept(store, clock):
+    code = store.issue(PHONE)
+    store.issue("+79990000001")
+    assert len(store) == 2
+
+    clock.now += 301
+    assert store.check(PHONE, code) is OTPCheck.EXPIRED
+    assert len(store) == 0
+    assert store.resend_wait(PHONE) == 0
+
+
+def test_discard(store):
+    code = store.issue(PHONE)
+    store.discard(PHONE)
+    assert store.check(PHONE, code) is OTPCheck.EXPIRED
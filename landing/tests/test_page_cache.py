@@ -0,0 +1,51 @@
+import gzip
+
+from app.services import page_cache
+from app.services.page_cache import CachedPage, PageCache, accepted_encodings
+
+HTML = "<html><body>Весна идёт</body></html>"
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+    assert accepted_encodings("") == {""}
+
+
+def test_encoded_picks_best_variant():
+    page = CachedPage.build(HTML)
+    assert gzip.decompress(page.gzip) == HTML.encode()
+
+    body, encoding, etag = page.encoded("gzip")
+    assert (body, encoding, etag) == (page.gzip, "gzip", f'"{page.digest}-gzip"')
+
+    body, encoding, etag = page.encoded("identity")
+    assert (body, encoding, etag) == (page.body, None, f'"{page.digest}"')
+
+    if page_cache.brotli is not None:
+        assert page.encoded("gzip, br")[1] == "br"
+    else:
+        assert page.br is None and page.encoded("gzip, br")[1] == "gzip"
+    assert etag in page.etags
+
+
+def test_build_is_deterministic():
+    # gzip без mtime: одна страница — одни байты и один ETag на всех воркерах
+    assert CachedPage.build(HTML) == CachedPage.build(HTML)
+
+
+def test_cache_renders_once_per_key():
+    calls = []
+
+    def render():
+        calls.append(1)
+        return HTML
+
+    cache = PageCache()
+    first = cache.get("index", render)
+    assert cache.get("index", render) is first
+    assert len(calls) == 1
+
+    cache.clear()
+    cache.get("index", render)
+    assert len(calls) == 2
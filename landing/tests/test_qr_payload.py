@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import pytest
+
+from app.services import qr_payload
+from app.services.qr_payload import (
+    InvalidPayload,
+    PayloadExpired,
+    PayloadSigner,
+    PayloadVerifier,
+    generate_key,
+    is_signed_payload,
+)
+
+EXPIRES_AT = 1_900_000_000
+NOW = EXPIRES_AT - 3600
+
+ALGORITHMS = ["hmac", "ed25519"]
+
+
+@pytest.fixture(params=ALGORITHMS)
+def keys(request):
+    return generate_key(request.param, "k1")
+
+
+def test_round_trip(keys):
+    spec, verifier_spec = keys
+    payload = PayloadSigner(spec).sign("ABC123", EXPIRES_AT)
+    assert is_signed_payload(payload)
+    signed = PayloadVerifier([verifier_spec]).verify(payload, NOW)
+    assert signed == ("ABC123", EXPIRES_AT, "k1")
+
+
+def test_ed25519_verifier_key_cannot_sign():
+    spec, verifier_spec = generate_key("ed25519", "k1")
+    assert verifier_spec != spec
+    payload = PayloadSigner(spec).sign("ABC123", EXPIRES_AT)
+    forged = PayloadSigner(generate_key("ed25519", "k1")[0]).sign("ABC123", EXPIRES_AT)
+    verifier = PayloadVerifier([verifier_spec])
+    verifier.verify(payload, NOW)
+    with pytest.raises(InvalidPayload):
+        verifier.verify(forged, NOW)
+
+
+def test_tampered_payload_is_rejected(keys):
+    spec, verifier_spec = keys
+    payload = PayloadSigner(spec).sign("ABC123", EXPIRES_AT)
+    verifier = PayloadVerifier([verifier_spec])
+    with pytest.raises(InvalidPayload):
+        verifier.verify(payload.replace("ABC123", "ABC124"), NOW)
+    with pytest.raises(InvalidPayload):
+        verifier.verify(payload[:-2], NOW)
+
+
+def test_expired_payload(keys):
+    spec, verifier_spec = keys
+    payload = PayloadSigner(spec).sign("ABC123", EXPIRES_AT)
+    with pytest.raises(PayloadExpired):
+        PayloadVerifier([verifier_spec]).verify(payload, EXPIRES_AT + 1)
+
+
+def test_rotation_keeps_old_keys():
+    old_spec, old_verifier = generate_key("hmac", "k1")
+    new_spec, new_verifier = generate_key("ed25519", "k2")
+    verifier = PayloadVerifier([old_verifier, new_verifier])
+    for spec in (old_spec, new_spec):
+        verifier.verify(PayloadSigner(spec).sign("ABC123", EXPIRES_AT), NOW)
+
+    with pytest.raises(InvalidPayload, match="unknown key"):
+        PayloadVerifier([new_verifier]).verify(PayloadSigner(old_spec).sign("ABC123", EXPIRES_AT), NOW)
+
+
+def test_signature_has_one_encoding():
+    spec, verifier_spec = generate_key("hmac", "k1")
+    payload = PayloadSigner(spec).sign("ABC123", EXPIRES_AT)
+    # 16 байт HMAC — 22 символа base64url: у последнего есть неиспользуемые биты
+    last = payload[-1]
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    twin = alphabet[alphabet.index(last) ^ 1]
+    with pytest.raises(InvalidPayload):
+        PayloadVerifier([verifier_spec]).verify(payload[:-1] + twin, NOW)
+
+
+def test_bad_input():
+    with pytest.raises(ValueError):
+        PayloadSigner("rsa:k1:secret")
+    with pytest.raises(ValueError):
+        PayloadSigner("hmac:k.1:secret")
+    with pytest.raises(ValueError):
+        PayloadSigner(generate_key("hmac", "k1")[0]).sign("AB.C", EXPIRES_AT)
+    with pytest.raises(InvalidPayload):
+        PayloadVerifier([]).verify("ABC123", NOW)
+
+
+def test_bot_copy_matches():
+    # Бот подписывает QR копией модуля: python -m tools.check_qr_payload --fix
+    copy = Path(__file__).resolve().parents[2] / "app" / "utils" / "qr_payload.py"
+    if not copy.exists():
+        pytest.skip("landing/ без бота рядом")
+    assert copy.read_text() == Path(qr_payload.__file__).read_text()
@@ -0,0 +1,54 @@
+import pytest
+
+from app.services.ratelimit import RateLimited, TokenBucketLimiter, limiter_from_setting
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_then_refill():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(limit=3, period=60, maxsize=10, clock=clock)
+    assert [limiter.hit("ip") for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit("ip") == pytest.approx(20)
+
+    clock.now += 20  # один токен за period / limit секунд
+    assert limiter.hit("ip") == 0
+    assert limiter.hit("ip") > 0
+
+
+def test_keys_are_independent():
+    limiter = TokenBucketLimiter(limit=1, period=60, maxsize=10, clock=FakeClock())
+    assert limiter.hit("a") == 0
+    assert limiter.hit("b") == 0
+    assert limiter.hit("a") > 0
+
+
+def test_oldest_bucket_is_evicted():
+    limiter = TokenBucketLimiter(limit=1, period=60, maxsize=2, clock=FakeClock())
+    for key in ("a", "b", "c"):
+        limiter.hit(key)
+    assert len(limiter) == 2
+    # «a» вытеснен — его ведро снова полное
+    assert limiter.hit("a") == 0
+
+
+def test_check_raises_with_retry_after():
+    limiter = TokenBucketLimiter(limit=1, period=10, maxsize=10, clock=FakeClock())
+    limiter.check("ip")
+    with pytest.raises(RateLimited) as exc_info:
+        limiter.check("ip")
+    assert exc_info.value.retry_after == pytest.approx(10)
+    assert exc_info.value.retry_after_seconds == 10
+
+
+def test_limiter_from_setting():
+    assert limiter_from_setting("", 10, "test") is None
+    limiter = limiter_from_setting("20/60", 10, "test")
+    assert isinstance(limiter, TokenBucketLimiter)
+    assert limiter.limit == 20 and limiter.rate == pytest.approx(20 / 60)
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.database.models import CodeStatus, PromoCode, User
+from app.routers import pos
+from app.services import redeem
+from app.services.redeem import KnownCodes, RedeemOutcome, redeem_code
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_assigned(db, *codes: str) -> None:
+    for code in codes:
+        user = User(phone=f"+7-{code}")
+        db.add(user)
+        await db.flush()
+        db.add(PromoCode(raw_code=code, status=CodeStatus.ASSIGNED, assigned_to_user_id=user.id))
+    await db.commit()
+
+
+async def test_redeem_outcomes(db):
+    await add_assigned(db, "R1")
+    db.add(PromoCode(raw_code="FREE1"))
+    await db.commit()
+
+    redeemed_at = datetime(2026, 4, 10, 12, 0, tzinfo=timezone.utc)
+    first = await redeem_code(db, "R1", "store1", redeemed_at)
+    assert first == (RedeemOutcome.REDEEMED, redeemed_at, "store1")
+
+    again = await redeem_code(db, "R1", "store2")
+    assert again.outcome is RedeemOutcome.ALREADY_REDEEMED
+    assert again.store == "store1"
+
+    assert (await redeem_code(db, "FREE1", "store1")).outcome is RedeemOutcome.NOT_ISSUED
+    assert (await redeem_code(db, "NOPE", "store1")).outcome is RedeemOutcome.UNKNOWN
+
+
+async def test_known_codes_refresh_is_incremental(db):
+    await add_assigned(db, "K1", "K2")
+    known = KnownCodes(0.001)
+    assert "anything" in known  # до первой загрузки решает база
+
+    assert await known.refresh(db) == 2
+    assert "K1" in known and "junk" not in known
+    await add_assigned(db, "K3")
+    assert await known.refresh(db) == 1
+    assert "K3" in known and len(known) == 3
+
+
+async def test_known_codes_rebuild_when_full(db, monkeypatch):
+    monkeypatch.setattr(redeem, "MIN_FILTER_CAPACITY", 2)
+    known = KnownCodes(0.01)
+    await add_assigned(db, "F1", "F2", "F3")
+    await known.refresh(db)
+    assert all(code in known for code in ("F1", "F2", "F3"))
+    assert known._bloom.capacity >= 3
+
+
+async def test_filter_miss_falls_back_to_database(db, monkeypatch):
+    known = KnownCodes(0.001)
+    await known.refresh(db)
+    monkeypatch.setattr(pos, "known_codes", known)
+
+    # Код добавлен после обновления фильтра — фильтр о нём ещё не знает
+    await add_assigned(db, "LATE1")
+    assert "LATE1" not in known
+    assert (await pos._redeem(db, "LATE1", "store1")).outcome is RedeemOutcome.REDEEMED
+    assert "LATE1" in known
+    assert (await pos._redeem(db, "LATE1", "store1")).outcome is RedeemOutcome.ALREADY_REDEEMED
+    assert (await pos._redeem(db, "JUNK", "store1")).outcome is RedeemOutcome.UNKNOWN
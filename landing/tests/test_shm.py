@@ -0,0 +1,138 @@
+import multiprocessing
+import time
+
+import pytest
+
+from app.services.cache import TTLCache
+from app.services.otp import _SHARED_ENTRY, OTPCheck, SharedOTPStore
+from app.services.ratelimit import SharedTokenBucketLimiter
+from app.services.shm import SharedTable, SharedTTLCache, ttl_cache
+
+KEY_SIZE = 16
+VALUE_SIZE = 64
+
+
+def open_table(path, capacity=64):
+    return SharedTable(path, capacity, KEY_SIZE, VALUE_SIZE)
+
+
+@pytest.fixture
+def table(tmp_path):
+    return open_table(tmp_path / "test.tbl")
+
+
+def later(seconds: float = 60) -> float:
+    return time.time() + seconds
+
+
+def test_set_get_pop(table):
+    assert table.set("k", b"v", later())
+    assert table.get("k") == b"v"
+    assert table.set("k", b"v2", later())
+    assert table.get("k") == b"v2" and len(table) == 1
+    table.pop("k")
+    assert table.get("k") is None and len(table) == 0
+
+
+def test_expired_entry_is_a_miss(table):
+    table.set("k", b"v", time.time() - 1)
+    assert table.get("k") is None
+
+
+def test_oversized_writes_are_refused(table):
+    assert not table.set("k" * (KEY_SIZE + 1), b"v", later())
+    assert not table.set("k", b"v" * (VALUE_SIZE + 1), later())
+    assert not table.set("ключ-в-юникоде", b"v", later())
+    assert len(table) == 0
+
+
+def test_reset_after_pop_leaves_no_stale_copy(tmp_path):
+    # Четыре слота: все ключи в одном окне проб
+    table = open_table(tmp_path / "small.tbl", 4)
+    table.set("a", b"1", later())
+    table.set("b", b"2", later())
+    table.pop("a")
+    table.set("b", b"3", later())
+    table.pop("b")
+    assert table.get("b") is None
+    assert len(table) == 0
+
+
+def test_full_window_evicts_soonest_expiring(tmp_path):
+    table = open_table(tmp_path / "evict.tbl", 8)
+    now = time.time()
+    for i in range(8):
+        table.set(f"k{i}", b"x", now + 100 + i)
+    table.set("new", b"x", now + 1000)
+    assert table.get("new") == b"x"
+    assert table.get("k0") is None
+    assert len(table) == 8
+
+
+def test_handles_share_data_and_lock(tmp_path):
+    first = open_table(tmp_path / "shared.tbl")
+    second = open_table(tmp_path / "shared.tbl")
+    first.set("k", b"v", later())
+    assert second.get("k") == b"v"
+    with first.lock():
+        with first.lock():
+            first.set("k", b"v2", later())
+    with second.lock():
+        assert second.get("k") == b"v2"
+
+
+def _increment(path: str, times: int) -> None:
+    table = open_table(path)
+    for _ in range(times):
+        with table.lock():
+            value = int(table.get("counter") or b"0")
+            table.set("counter", str(value + 1).encode(), time.time() + 60)
+
+
+def test_lock_is_atomic_across_processes(tmp_path):
+    path = tmp_path / "counter.tbl"
+    open_table(path)
+    context = multiprocessing.get_context("spawn")  # свой дескриптор файла в каждом процессе
+    children = [context.Process(target=_increment, args=(str(path), 200)) for _ in range(2)]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+    assert int(open_table(path).get("counter")) == 400
+
+
+def test_shared_ttl_cache(table):
+    cache = SharedTTLCache(table, ttl=60, dumps=str.encode, loads=bytes.decode)
+    cache.set("k", "value")
+    assert cache.get("k") == "value"
+    cache.pop("k")
+    assert cache.get("k") is None
+
+
+def test_ttl_cache_without_shm_dir_is_in_process():
+    cache = ttl_cache("test", 10, 60, KEY_SIZE, VALUE_SIZE, str.encode, bytes.decode)
+    assert isinstance(cache, TTLCache)
+
+
+def test_shared_otp_store(tmp_path):
+    options = dict(ttl=300, resend_after=60, max_attempts=2)
+    issuer, checker = (
+        SharedOTPStore(SharedTable(tmp_path / "otp.tbl", 16, 16, _SHARED_ENTRY.size), **options)
+        for _ in range(2)
+    )
+
+    code = issuer.issue("+79990000000")
+    assert issuer.issue("+79990000000") is None
+    wrong = "0000" if code != "0000" else "1111"
+    assert checker.check("+79990000000", wrong) is OTPCheck.WRONG
+    assert issuer.attempts_left("+79990000000") == 1
+    assert checker.check("+79990000000", code) is OTPCheck.OK
+    assert issuer.check("+79990000000", code) is OTPCheck.EXPIRED
+
+
+def test_shared_rate_limit(tmp_path):
+    first = SharedTokenBucketLimiter(2, 60, SharedTable(tmp_path / "rl.tbl", 16, 48, 16))
+    second = SharedTokenBucketLimiter(2, 60, SharedTable(tmp_path / "rl.tbl", 16, 48, 16))
+    assert first.hit("ip") == 0
+    assert second.hit("ip") == 0
+    assert first.hit("ip") > 0
@@ -0,0 +1,108 @@
+"""Сборка статики лендинга в static/dist.
+
+Картинки — варианты по ширине в JPEG и WebP, CSS — с готовыми .gz (и .br,
+если установлен brotli). У каждого файла в имени хеш содержимого, так что
+его можно кешировать в браузере навсегда. Соответствие исходных имён
+собранным пишется в static/dist/manifest.json — его читают шаблоны.
+
+Запуск из каталога landing: python tools/build_assets.py
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import shutil
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+DIST_DIR = STATIC_DIR / "dist"
+
+# Баннер на странице не шире 480 CSS-пикселей: 1x, 2x и 3x экраны
+IMAGE_WIDTHS = (480, 960, 1440)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 78
+
+
+def _write_hashed(relative: str, data: bytes) -> str:
+    """Записать файл в dist с хешем в имени; вернуть путь относительно dist."""
+    path = Path(relative)
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    hashed = path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix()
+    target = DIST_DIR / hashed
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(data)
+    return hashed
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "jpeg":
+        image.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buf, "WEBP", quality=WEBP_QUALITY, method=6)
+    return buf.getvalue()
+
+
+def build_image(source: Path, manifest: dict) -> None:
+    relative = source.relative_to(STATIC_DIR).as_posix()
+    image = Image.open(source).convert("RGB")
+    widths = sorted({min(width, image.width) for width in IMAGE_WIDTHS})
+
+    variants: dict[str, list] = {"jpeg": [], "webp": []}
+    for width in widths:
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt, ext in (("jpeg", "jpeg"), ("webp", "webp")):
+            data = _encode(resized, fmt)
+            if fmt == "jpeg" and width == image.width:
+                # Пересжатие оригинала бывает крупнее его самого
+                data = min(data, source.read_bytes(), key=len)
+            name = f"{Path(relative).with_suffix('').as_posix()}-{width}w.{ext}"
+            variants[fmt].append([width, _write_hashed(name, data)])
+
+    manifest["images"][relative] = variants
+    # Без srcset отдаём самый крупный JPEG
+    manifest["files"][relative] = variants["jpeg"][-1][1]
+
+
+def build_css(source: Path, manifest: dict) -> None:
+    relative = source.relative_to(STATIC_DIR).as_posix()
+    data = source.read_bytes()
+    hashed = _write_hashed(relative, data)
+    # Рядом с файлом — сжатые копии, их отдаёт CachedStaticFiles
+    (DIST_DIR / f"{hashed}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        (DIST_DIR / f"{hashed}.br").write_bytes(brotli.compress(data, quality=11))
+    manifest["files"][relative] = hashed
+
+
+def main() -> None:
+    if DIST_DIR.exists():
+        shutil.rmtree(DIST_DIR)
+    DIST_DIR.mkdir(parents=True)
+
+    manifest: dict = {"files": {}, "images": {}}
+    for source in sorted((STATIC_DIR / "images").glob("*.jp*g")):
+        build_image(source, manifest)
+    for source in sorted((STATIC_DIR / "css").glob("*.css")):
+        build_css(source, manifest)
+
+    (DIST_DIR / "manifest.json").write_text(json.dumps(manifest, indent=2, ensure_ascii=False))
+
+    count = sum(1 for path in DIST_DIR.rglob("*") if path.is_file())
+    print(f"Готово: {count} файлов в {DIST_DIR}")
+    if brotli is None:
+        print("brotli не установлен — только .gz", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
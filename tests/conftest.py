@@ -0,0 +1,46 @@
+"""Test environment: configuration is read on import, so it is set up first."""
+
+import os
+import tempfile
+
+import pytest
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bot_tests_')}/test.db",
+    "DATABASE_READ_URL": "",
+    "DB_INIT_MODE": "create_all",
+    "BOT_TOKEN": "",
+})
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def database():
+    """
+    Create the tables once.
+
+    While this fixture is alive, database tests share one event loop, as
+    in the bot process: the SQLite claim lock is bound to its loop.
+    """
+    from app.database import close_db, init_db
+
+    await init_db()
+    yield
+    await close_db()
+
+
+@pytest.fixture
+async def session(database):
+    """Session on a SQLite database that is emptied after the test."""
+    from app.database import Base, async_session_maker
+    from app.database.session import engine
+
+    async with async_session_maker() as session:
+        yield session
+    async with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
@@ -0,0 +1,104 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.methods import SendMessage
+
+from app.broadcaster import Broadcaster
+from app.config import config
+from app.database import BroadcastStatus, async_session_maker
+from app.services import BroadcastService, UserService
+
+pytestmark = pytest.mark.anyio
+
+BLOCKED_ID = 4001
+MISSING_ID = 4002
+
+
+@pytest.fixture(autouse=True)
+def fast_broadcasts(monkeypatch):
+    monkeypatch.setattr(config, "BROADCAST_RATE", 10_000)
+    monkeypatch.setattr(config, "BROADCAST_BATCH_SIZE", 2)
+
+
+def make_bot():
+    async def send_message(chat_id, text):
+        method = SendMessage(chat_id=chat_id, text=text)
+        if chat_id == BLOCKED_ID:
+            raise TelegramForbiddenError(method, "bot was blocked by the user")
+        if chat_id == MISSING_ID:
+            raise TelegramBadRequest(method, "chat not found")
+
+    bot = mock.AsyncMock()
+    bot.send_message.side_effect = send_message
+    return bot
+
+
+async def create_broadcast(session, users: int):
+    for i in range(users):
+        await UserService.get_or_create_user(session, telegram_id=4000 + i)
+    total = await BroadcastService.count_recipients(session)
+    return await BroadcastService.create_broadcast(
+        session, bot_id=1, campaign_id=None, text="Привет",
+        admin_chat_id=1, status_message_id=10, total=total,
+    )
+
+
+async def run(broadcaster: Broadcaster, bot, broadcast_id: int):
+    broadcaster.start(bot, broadcast_id)
+    await asyncio.gather(*broadcaster._tasks.values(), return_exceptions=True)
+    async with async_session_maker() as session:
+        return await BroadcastService.get_broadcast(session, broadcast_id)
+
+
+async def test_broadcast_reaches_everyone(session):
+    broadcast = await create_broadcast(session, 5)
+    bot = make_bot()
+    done = await run(Broadcaster(), bot, broadcast.id)
+
+    assert done.status == BroadcastStatus.COMPLETED and done.finished_at is not None
+    assert (done.sent, done.blocked, done.failed) == (3, 1, 1)
+    assert bot.send_message.await_count == 5
+    # The status message is left without the stop button
+    assert bot.edit_message_text.await_args.kwargs["reply_markup"] is None
+
+
+async def test_unexpected_error_finishes_broadcast(session):
+    broadcast = await create_broadcast(session, 2)
+    with mock.patch.object(BroadcastService, "get_recipients", side_effect=RuntimeError("boom")):
+        done = await run(Broadcaster(), make_bot(), broadcast.id)
+
+    assert done.status == BroadcastStatus.FAILED and done.finished_at is not None
+    # A failed broadcast no longer blocks the next one of the bot
+    assert await BroadcastService.get_running_broadcasts(session, bot_id=1) == []
+
+
+async def test_cancel_and_resume(session):
+    broadcast = await create_broadcast(session, 3)
+    broadcaster = Broadcaster()
+    bot = make_bot()
+    sent = asyncio.Event()
+    original = bot.send_message.side_effect
+
+    async def send_and_stall(chat_id, text):
+        await original(chat_id, text)
+        sent.set()
+        await asyncio.sleep(3600)
+
+    bot.send_message.side_effect = send_and_stall
+    broadcaster.start(bot, broadcast.id)
+    await sent.wait()
+
+    # Shutdown interrupts the broadcast, which stays RUNNING to be resumed
+    await broadcaster.stop()
+    async with async_session_maker() as check:
+        assert [b.id for b in await BroadcastService.get_running_broadcasts(check, 1)] == [broadcast.id]
+
+    broadcaster.start(bot, broadcast.id)
+    await sent.wait()
+    assert await broadcaster.cancel(broadcast.id)
+    async with async_session_maker() as check:
+        done = await BroadcastService.get_broadcast(check, broadcast.id)
+    assert done.status == BroadcastStatus.CANCELLED
+    assert not await broadcaster.cancel(broadcast.id)
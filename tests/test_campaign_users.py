@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.database import Campaign, async_session_maker
+from app.services import BroadcastService, PromoService, UserService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def campaign(session):
+    now = datetime.now(timezone.utc)
+    campaign = Campaign(
+        slug="spring",
+        bot_token="123:spring",
+        channel_username="@spring",
+        promo_start=now - timedelta(days=1),
+        promo_end=now + timedelta(days=30),
+    )
+    session.add(campaign)
+    await session.commit()
+    return campaign
+
+
+async def test_campaign_bot_sees_only_its_participants(session, campaign):
+    await PromoService.add_codes(session, ["D1", "D2"])
+    await PromoService.add_codes(session, ["S1"], campaign.id)
+    users = [
+        (await UserService.get_or_create_user(session, telegram_id=2000 + i))[0]
+        for i in range(3)
+    ]
+    # The first user claimed in both campaigns, the second in the default one only
+    for user, campaign_id in [(users[0], None), (users[0], campaign.id), (users[1], None)]:
+        async with async_session_maker() as claim_session:
+            assert await PromoService.get_available_code(claim_session, user, campaign_id)
+
+    def telegram_ids(found):
+        return sorted(user.telegram_id for user in found)
+
+    assert telegram_ids(await UserService.get_all_users(session)) == [2000, 2001, 2002]
+    assert telegram_ids(await UserService.get_all_users(session, campaign.id)) == [2000]
+    assert telegram_ids(await UserService.get_users_with_codes(session)) == [2000, 2001]
+    assert telegram_ids(await UserService.get_users_with_codes(session, campaign.id)) == [2000]
+    assert await UserService.get_unique_users_count(session) == 3
+    assert await UserService.get_unique_users_count(session, campaign.id) == 1
+    assert await BroadcastService.count_recipients(session) == 3
+    assert await BroadcastService.count_recipients(session, campaign.id) == 1
+
+
+async def test_one_code_per_campaign(session, campaign):
+    await PromoService.add_codes(session, ["D1", "D2"])
+    await PromoService.add_codes(session, ["S1", "S2"], campaign.id)
+    user, _ = await UserService.get_or_create_user(session, telegram_id=3000)
+
+    async def claim(campaign_id):
+        async with async_session_maker() as claim_session:
+            code = await PromoService.get_available_code(claim_session, user, campaign_id)
+            return code.raw_code if code else None
+
+    assert await claim(None) == "D1"
+    assert await claim(campaign.id) == "S1"
+    assert await claim(None) is None
+    assert await claim(campaign.id) is None
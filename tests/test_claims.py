@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from app.database import async_session_maker
+from app.services import PromoService, UserService
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_users(session, count: int):
+    return [
+        (await UserService.get_or_create_user(session, telegram_id=1000 + i))[0]
+        for i in range(count)
+    ]
+
+
+async def claim(user):
+    async with async_session_maker() as session:
+        code = await PromoService.get_available_code(session, user)
+        return code.raw_code if code else None
+
+
+async def test_codes_are_allocated_in_id_order(session):
+    await PromoService.add_codes(session, ["C3", "C1", "C2"])
+    users = await create_users(session, 3)
+    assert [await claim(user) for user in users] == ["C3", "C1", "C2"]
+
+
+async def test_parallel_claims_get_distinct_codes(session):
+    await PromoService.add_codes(session, ["P1", "P2", "P3"])
+    users = await create_users(session, 4)
+    codes = await asyncio.gather(*(claim(user) for user in users))
+    assert sorted(code for code in codes if code) == ["P1", "P2", "P3"]
+    assert codes.count(None) == 1
+
+
+async def test_user_gets_one_code(session):
+    await PromoService.add_codes(session, ["U1", "U2"])
+    [user] = await create_users(session, 1)
+    codes = await asyncio.gather(*(claim(user) for _ in range(3)))
+    assert codes.count("U1") == 1 and codes.count(None) == 2
+    stats = await PromoService.get_codes_stats(session)
+    assert (stats["assigned"], stats["available"]) == (1, 1)
@@ -0,0 +1,23 @@
+import pytest
+
+from app.database.pool import PoolStats
+
+
+def test_snapshot_reports_milliseconds_and_resets():
+    stats = PoolStats()
+    stats.record(0.002)
+    stats.record(0.004)
+    stats.timeouts += 1
+
+    assert stats.snapshot() == {
+        "checkouts": 2,
+        "timeouts": 1,
+        "avg_wait_ms": pytest.approx(3.0),
+        "max_wait_ms": pytest.approx(4.0),
+    }
+    assert stats.snapshot() == {
+        "checkouts": 0,
+        "timeouts": 0,
+        "avg_wait_ms": 0.0,
+        "max_wait_ms": 0.0,
+    }
@@ -0,0 +1,31 @@
+from app.database.schema import get_head_revisions
+
+MIGRATION = '''
+revision: str = {revision!r}
+down_revision = {down!r}
+'''
+
+
+def write_migration(directory, name, revision, down):
+    (directory / f"{name}.py").write_text(MIGRATION.format(revision=revision, down=down))
+
+
+def test_repository_has_single_head():
+    assert len(get_head_revisions()) == 1
+
+
+def test_head_of_linear_history(tmp_path):
+    write_migration(tmp_path, "a", "aaa", None)
+    write_migration(tmp_path, "b", "bbb", "aaa")
+    write_migration(tmp_path, "c", "ccc", "bbb")
+    assert get_head_revisions(tmp_path) == {"ccc"}
+
+
+def test_branches_and_merges(tmp_path):
+    write_migration(tmp_path, "a", "aaa", None)
+    write_migration(tmp_path, "b", "bbb", "aaa")
+    write_migration(tmp_path, "c", "ccc", "aaa")
+    assert get_head_revisions(tmp_path) == {"bbb", "ccc"}
+
+    write_migration(tmp_path, "d", "ddd", ("bbb", "ccc"))
+    assert get_head_revisions(tmp_path) == {"ddd"}
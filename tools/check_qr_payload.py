@@ -0,0 +1,93 @@
+"""
+Check the bot's copy of the signed QR payload module.
+
+The landing owns ``landing/app/services/qr_payload.py``: it has no app
+dependencies and is shipped to tills as is. The bot image contains only
+``app/``, so the bot signs with a byte-for-byte copy in
+``app/utils/qr_payload.py``. This tool fails if the copy differs, and
+signs payloads with the bot's copy to verify them with the landing's.
+
+Usage:
+    python -m tools.check_qr_payload          # exit 1 on any mismatch
+    python -m tools.check_qr_payload --fix    # refresh the copy first
+"""
+
+import argparse
+import importlib.util
+import shutil
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+from app.utils import qr_payload as bot_payload
+
+ROOT = Path(__file__).resolve().parents[1]
+LANDING_PATH = ROOT / "landing" / "app" / "services" / "qr_payload.py"
+BOT_PATH = ROOT / "app" / "utils" / "qr_payload.py"
+
+
+def load_landing_payload() -> ModuleType:
+    """
+    Load the landing's module by file path.
+
+    The landing is a separate application whose package is also called
+    ``app``, so it cannot be imported next to the bot's package.
+    """
+    spec = importlib.util.spec_from_file_location("landing_qr_payload", LANDING_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def round_trip(landing: ModuleType) -> list[str]:
+    """Sign with the bot's copy, verify with the landing's module."""
+    algorithms = ["hmac"]
+    if landing.Ed25519PrivateKey is not None:
+        algorithms.append("ed25519")
+
+    errors = []
+    expires_at = int(time.time()) + 3600
+    for algorithm in algorithms:
+        signing, verifying = landing.generate_key(algorithm, "check")
+        payload = bot_payload.PayloadSigner(signing).sign("123456789012345", expires_at)
+        try:
+            signed = landing.PayloadVerifier([verifying]).verify(payload)
+        except landing.InvalidPayload as e:
+            errors.append(f"{algorithm}: landing rejects the bot's payload: {e}")
+            continue
+        if (signed.code, signed.expires_at) != ("123456789012345", expires_at):
+            errors.append(f"{algorithm}: landing decodes {signed} from the bot's payload")
+        print(f"{algorithm}: {payload}")
+    return errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fix", action="store_true", help="Copy the landing's module over the bot's")
+    args = parser.parse_args()
+
+    if not LANDING_PATH.exists():
+        print(f"{LANDING_PATH} not found: run from a full checkout")
+        sys.exit(1)
+
+    if args.fix:
+        shutil.copyfile(LANDING_PATH, BOT_PATH)
+        print(f"Copied {LANDING_PATH.relative_to(ROOT)} to {BOT_PATH.relative_to(ROOT)}")
+        print("Run the tool again without --fix to check the refreshed copy")
+        return
+
+    errors = []
+    if BOT_PATH.read_bytes() != LANDING_PATH.read_bytes():
+        errors.append(f"{BOT_PATH.relative_to(ROOT)} differs from the landing's module; run with --fix")
+    errors += round_trip(load_landing_payload())
+
+    for error in errors:
+        print(f"FAIL {error}")
+    if errors:
+        sys.exit(1)
+    print("QR payload copy is in sync")
+
+
+if __name__ == "__main__":
+    main()
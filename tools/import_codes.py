@@ -3,9 +3,10 @@
 import asyncio
 import sys
 from pathlib import Path
+from typing import Optional
 
 from app.database.session import async_session_maker, init_db
-from app.services import PromoService
+from app.services import CampaignService, PromoService
 from app.utils.logging import setup_logging, get_logger
 from app.config import config
 
@@ -13,12 +14,24 @@ setup_logging(config.LOG_LEVEL)
 logger = get_logger(__name__)
 
 
-async def import_from_file(file_path: str) -> None:
+async def resolve_campaign_id(session, slug: Optional[str]) -> Optional[int]:
+    """Map a campaign slug to its id; None means the default campaign."""
+    if slug is None:
+        return None
+    campaign = await CampaignService.get_campaign_by_slug(session, slug)
+    if campaign is None:
+        logger.error("Campaign not found", slug=slug)
+        sys.exit(1)
+    return campaign.id
+
+
+async def import_from_file(file_path: str, campaign_slug: Optional[str] = None) -> None:
     """
     Import promo codes from file.
 
     Args:
         file_path: Path to file with codes (one per line)
+        campaign_slug: Campaign to import into, None for the default one
     """
     path = Path(file_path)
 
@@ -45,7 +58,8 @@ async def import_from_file(file_path: str) -> None:
 
     # Import codes
     async with async_session_maker() as session:
-        added, skipped = await PromoService.add_codes(session, codes)
+        campaign_id = await resolve_campaign_id(session, campaign_slug)
+        added, skipped = await PromoService.add_codes(session, codes, campaign_id)
 
     logger.info(
         "Import completed",
@@ -60,7 +74,7 @@ async def import_from_file(file_path: str) -> None:
     print(f"   Total: {len(codes)}")
 
 
-async def import_test_codes() -> None:
+async def import_test_codes(campaign_slug: Optional[str] = None) -> None:
     """Import test codes."""
     test_codes = [
         "987651527138080",
@@ -77,7 +91,8 @@ async def import_test_codes() -> None:
 
     # Import codes
     async with async_session_maker() as session:
-        added, skipped = await PromoService.add_codes(session, test_codes)
+        campaign_id = await resolve_campaign_id(session, campaign_slug)
+        added, skipped = await PromoService.add_codes(session, test_codes, campaign_id)
 
     logger.info(
         "Test codes import completed",
@@ -94,10 +109,22 @@ async def import_test_codes() -> None:
 
 def main():
     """Main CLI entry point."""
+    # Optional trailing "--campaign <slug>"; without it codes go to the
+    # default campaign configured in .env
+    campaign_slug = None
+    if "--campaign" in sys.argv:
+        index = sys.argv.index("--campaign")
+        if index + 1 >= len(sys.argv):
+            print("Error: campaign slug required after --campaign")
+            sys.exit(1)
+        campaign_slug = sys.argv[index + 1]
+        del sys.argv[index:index + 2]
+
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python -m tools.import_codes --file <path>  # Import from file")
         print("  python -m tools.import_codes --test         # Import test codes")
+        print("  ... --campaign <slug>                       # Into a campaign")
         sys.exit(1)
 
     command = sys.argv[1]
@@ -108,10 +135,10 @@ def main():
             print("Usage: python -m tools.import_codes --file <path>")
             sys.exit(1)
         file_path = sys.argv[2]
-        asyncio.run(import_from_file(file_path))
+        asyncio.run(import_from_file(file_path, campaign_slug))
 
     elif command == "--test":
-        asyncio.run(import_test_codes())
+        asyncio.run(import_test_codes(campaign_slug))
 
     else:
         print(f"Unknown command: {command}")
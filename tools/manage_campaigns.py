@@ -0,0 +1,137 @@
+"""CLI tool for managing promo campaigns."""
+
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from app.database.session import async_session_maker, init_db
+from app.services import CampaignService
+from app.utils.logging import setup_logging, get_logger
+from app.config import config
+
+setup_logging(config.LOG_LEVEL)
+logger = get_logger(__name__)
+
+USAGE = """Usage:
+  python -m tools.manage_campaigns --list
+  python -m tools.manage_campaigns --add <slug> <bot_token> <@channel> <start YYYY-MM-DD> <end YYYY-MM-DD>
+  python -m tools.manage_campaigns --enable <slug>
+  python -m tools.manage_campaigns --disable <slug>
+
+Changes take effect after the bot is restarted."""
+
+
+def parse_date(value: str, end_of_day: bool = False) -> datetime:
+    """Parse YYYY-MM-DD as a UTC date, like PROMO_START/PROMO_END in .env."""
+    date = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    if end_of_day:
+        date = date.replace(hour=23, minute=59, second=59)
+    return date
+
+
+async def list_campaigns() -> None:
+    """Print all campaigns."""
+    await init_db()
+
+    async with async_session_maker() as session:
+        campaigns = await CampaignService.get_campaigns(session)
+
+    if not campaigns:
+        print("No campaigns. The bot serves only the default campaign from .env")
+        return
+
+    for campaign in campaigns:
+        status = "active" if campaign.is_active else "disabled"
+        print(
+            f"{campaign.id:>4}  {campaign.slug:<20} {campaign.channel_username:<24} "
+            f"{campaign.promo_start:%Y-%m-%d} .. {campaign.promo_end:%Y-%m-%d}  {status}"
+        )
+
+
+async def add_campaign(
+    slug: str,
+    bot_token: str,
+    channel_username: str,
+    promo_start: datetime,
+    promo_end: datetime,
+) -> None:
+    """Create a campaign."""
+    await init_db()
+
+    async with async_session_maker() as session:
+        try:
+            campaign = await CampaignService.create_campaign(
+                session,
+                slug=slug,
+                bot_token=bot_token,
+                channel_username=channel_username,
+                promo_start=promo_start,
+                promo_end=promo_end,
+            )
+        except IntegrityError:
+            logger.error("Campaign slug or bot token already exists", slug=slug)
+            sys.exit(1)
+        except ValueError as e:
+            logger.error("Invalid campaign", slug=slug, error=str(e))
+            sys.exit(1)
+
+    print(f"\n✅ Campaign created: {campaign.slug} (id={campaign.id})")
+    print(f"   Import codes: python -m tools.import_codes --file <path> --campaign {campaign.slug}")
+
+
+async def set_active(slug: str, is_active: bool) -> None:
+    """Enable or disable a campaign."""
+    await init_db()
+
+    async with async_session_maker() as session:
+        campaign = await CampaignService.get_campaign_by_slug(session, slug)
+        if campaign is None:
+            logger.error("Campaign not found", slug=slug)
+            sys.exit(1)
+        await CampaignService.set_campaign_active(session, campaign, is_active)
+
+    print(f"\n✅ Campaign {slug} {'enabled' if is_active else 'disabled'}")
+
+
+def main():
+    """Main CLI entry point."""
+    if len(sys.argv) < 2:
+        print(USAGE)
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    if command == "--list":
+        asyncio.run(list_campaigns())
+
+    elif command == "--add":
+        if len(sys.argv) < 7:
+            print("Error: slug, bot token, channel, start and end dates required")
+            print(USAGE)
+            sys.exit(1)
+        slug, bot_token, channel, start, end = sys.argv[2:7]
+        try:
+            promo_start = parse_date(start)
+            promo_end = parse_date(end, end_of_day=True)
+        except ValueError:
+            print("Error: dates must be in YYYY-MM-DD format")
+            sys.exit(1)
+        asyncio.run(add_campaign(slug, bot_token, channel, promo_start, promo_end))
+
+    elif command in ("--enable", "--disable"):
+        if len(sys.argv) < 3:
+            print("Error: campaign slug required")
+            print(USAGE)
+            sys.exit(1)
+        asyncio.run(set_active(sys.argv[2], command == "--enable"))
+
+    else:
+        print(f"Unknown command: {command}")
+        print(USAGE)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()